@@ -0,0 +1,44 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_operations
+from src.card_shards import get_card_partitioned
+from src.utils_views import get_card
+
+
+def main(rows: int, cards: int, workers: list[int], shards_per_worker: int) -> None:
+    df = make_operations(rows)
+    df["Дата операции"] = pd.to_datetime(df["Дата операции"], format="%d.%m.%Y %H:%M:%S")
+    rng = np.random.default_rng(1)
+    df["Номер карты"] = pd.Series([f"*{number:06d}" for number in range(cards)]).to_numpy()[
+        rng.integers(0, cards, rows)
+    ]
+    print(f"Строк: {rows}, карт: {cards}, ядер: {os.cpu_count()}")
+
+    start = time.perf_counter()
+    expected = get_card(df)
+    base = time.perf_counter() - start
+    print(f"{'get_card':>24}: {base:7.2f} с")
+
+    for count in workers:
+        start = time.perf_counter()
+        result = get_card_partitioned(df, shards=count * shards_per_worker, max_workers=count)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{f'процессов: {count}':>24}: {elapsed:7.2f} с, ускорение {base / elapsed:5.2f}, "
+            f"результат {'совпадает' if result == expected else 'ОТЛИЧАЕТСЯ'}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Показатели по картам: get_card и разбиение по номеру карты")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--cards", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--shards-per-worker", type=int, default=1, help="Частей на процесс")
+    args = parser.parse_args()
+    main(args.rows, args.cards, args.workers, args.shards_per_worker)
@@ -0,0 +1,44 @@
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import CATEGORIES, make_operations
+from src.indexes import OperationsIndex
+from src.query import OperationsQuery
+
+
+def best_of(func, repeat: int = 5) -> float:  # type: ignore[no-untyped-def]
+    """Минимальное время выполнения func за repeat запусков, мс"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main(rows: int) -> None:
+    df = make_operations(rows)
+    df["Дата операции"] = pd.to_datetime(df["Дата операции"], format="%d.%m.%Y %H:%M:%S")
+
+    start = time.perf_counter()
+    index = OperationsIndex.build(df)
+    print(f"Строк: {rows}, построение индексов: {(time.perf_counter() - start) * 1000:.1f} мс")
+
+    counts = df["Категория"].value_counts()
+    for label, category in (("частая", CATEGORIES[0]), ("редкая", CATEGORIES[-1])):
+        base = OperationsQuery(df).between("2020-09-30", "2020-12-30", whole_days=True).expenses()
+        indexed = OperationsQuery(df, index).between("2020-09-30", "2020-12-30", whole_days=True).expenses()
+        plain_ms = best_of(lambda: base.category(category).collect())
+        indexed_ms = best_of(lambda: indexed.category(category).collect())
+        print(
+            f"{label} категория «{category}» ({counts[category]} строк): "
+            f"без индекса {plain_ms:.2f} мс, с индексом {indexed_ms:.2f} мс"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Выборка по категории с индексами и без")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    main(parser.parse_args().rows)
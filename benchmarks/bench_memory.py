@@ -0,0 +1,72 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from benchmarks.synthetic import CATEGORIES, make_operations
+from src import memprofile
+from src.reports import category_spending, report_period
+from src.utils import calculate_investment_for_transactions, filter_transactions_by_month
+from src.utils_views import get_card, get_date_period, get_outliers, get_period, get_top_transactions, load_operations
+
+CEILINGS_PATH = os.path.join(os.path.dirname(__file__), "memory_ceilings.json")
+
+
+def run_pipeline(path: str, date_time: str = "2021-12-20 12:00:00") -> None:
+    """Этапы main_views, spending_by_category и «Инвесткопилки» по выгрузке path"""
+    operations = load_operations(path)
+    sorted_df = get_period(operations, get_date_period(date_time))
+    get_card(sorted_df)
+    get_top_transactions(sorted_df, 5)
+    get_outliers(sorted_df, operations)
+
+    # spending_by_category без записи data/result.xlsx: те же шаги, что и в нем
+    raw = pd.read_excel(path, sheet_name="Отчет по операциям")
+    with memprofile.stage("bench.spending_by_category"):
+        with memprofile.stage("to_datetime"):
+            raw["Дата операции"] = pd.to_datetime(raw["Дата операции"], format="%d.%m.%Y %H:%M:%S", errors="coerce")
+        start, end = report_period(date_time)
+        category_spending(raw, CATEGORIES[0], start, end)
+
+    records = raw.assign(**{"Дата операции": raw["Дата операции"].dt.strftime("%Y-%m-%d")}).to_dict("records")
+    month_records = filter_transactions_by_month(records, date_time[:7])
+    calculate_investment_for_transactions(month_records, 50)
+
+
+def main(argv: Optional[list] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Память по этапам обработки выгрузки (tracemalloc и RSS)")
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--input", help="Готовая выгрузка xlsx вместо синтетической")
+    parser.add_argument("--ceilings", default=CEILINGS_PATH, help="JSON «этап → потолок, МБ» ('' — не проверять)")
+    parser.add_argument("--output", help="Куда записать JSON-отчет")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.input
+        if path is None:
+            path = os.path.join(directory, "operations.xlsx")
+            make_operations(args.rows).to_excel(path, sheet_name="Отчет по операциям", index=False)
+        with memprofile.profiling() as profile:
+            run_pipeline(path)
+    report = profile.report()
+    print(memprofile.format_report(report))
+    if args.output:
+        memprofile.write_report(report, args.output)
+
+    if args.ceilings:
+        with open(args.ceilings, "r", encoding="utf-8") as file:
+            ceilings = json.load(file)
+        violations = memprofile.check_ceilings(report, ceilings)
+        for violation in violations:
+            print(f"Превышен потолок памяти: {violation}")
+        if violations:
+            sys.exit(1)
+    return report
+
+
+if __name__ == "__main__":
+    main()
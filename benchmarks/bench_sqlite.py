@@ -0,0 +1,71 @@
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.bench_indexes import best_of
+from benchmarks.synthetic import CATEGORIES, make_operations
+from src.operations_store import OperationsStore
+from src.reports import category_spending
+from src.services import stream_round_ups
+from src.utils_views import get_card, get_date_period, get_period, get_top_transactions
+
+
+def main(rows: int, chunk_size: int) -> None:
+    raw = make_operations(rows)
+    operations = raw.assign(**{"Дата операции": pd.to_datetime(raw["Дата операции"], dayfirst=True)})
+    records = operations.assign(**{"Дата операции": operations["Дата операции"].dt.strftime("%Y-%m-%d")})
+    records = records.to_dict("records")
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = OperationsStore(os.path.join(directory, "operations.db"))
+        start = time.perf_counter()
+        store.load(raw.iloc[offset:offset + chunk_size] for offset in range(0, rows, chunk_size))
+        size = os.path.getsize(store.db_path) / 1024 / 1024
+        print(f"Строк: {rows}, загрузка в SQLite: {time.perf_counter() - start:.1f} с, база {size:.1f} МБ")
+
+        period = get_date_period("2021-12-20 12:00:00")
+        window = (pd.Timestamp("2021-09-20").date(), pd.Timestamp("2021-12-20").date())
+        outliers = store.flag_outliers()
+        cases = [
+            ("период месяца", lambda: get_period(operations, period), lambda: store.get_period(period)),
+            (
+                "суммы по картам",
+                lambda: get_card(get_period(operations, period)),
+                lambda: store.get_card(period),
+            ),
+            (
+                "топ-5 операций",
+                lambda: get_top_transactions(get_period(operations, period), 5),
+                lambda: store.get_top_transactions(period, 5),
+            ),
+            (
+                f"категория «{CATEGORIES[-1]}» за 3 мес.",
+                lambda: category_spending(operations, CATEGORIES[-1], *window, outliers=outliers),
+                lambda: store.category_spending(CATEGORIES[-1], *window, outliers=outliers),
+            ),
+            (
+                "копилка за месяц",
+                lambda: stream_round_ups(records, 50, "2021-12"),
+                lambda: store.round_ups(50, "2021-12"),
+            ),
+        ]
+        for label, in_memory, in_store in cases:
+            expected, result = in_memory(), in_store()
+            same = expected.equals(result) if isinstance(expected, pd.DataFrame) else expected == result
+            memory_ms = best_of(in_memory, repeat=3)
+            store_ms = best_of(in_store, repeat=3)
+            print(
+                f"{label:<40} pandas {memory_ms:9.2f} мс, SQLite {store_ms:9.2f} мс, "
+                f"результат {'совпадает' if same else 'ОТЛИЧАЕТСЯ'}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Запросы страницы «Главная» и отчетов: pandas и SQLite")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    args = parser.parse_args()
+    main(args.rows, args.chunk_size)
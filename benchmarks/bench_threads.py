@@ -0,0 +1,69 @@
+import argparse
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from benchmarks.loadtest import InProcessTarget, date_sampler, run_load
+from src.context import OperationsCache
+from src.stub_server import FaultProfile, StubMarketServer, stub_context
+from src.views import main_views
+
+
+def check_isolation(ctx: Any, dates: List[str], threads: int) -> bool:
+    """Ответы, полученные параллельно в threads потоков, совпадают с последовательными"""
+    sequential = [main_views(date_time, compact=True, ctx=ctx) for date_time in dates]
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        parallel = list(executor.map(lambda date_time: main_views(date_time, compact=True, ctx=ctx), dates))
+    return sequential == parallel
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Масштабирование main_views по числу потоков")
+    parser.add_argument("--requests", type=int, default=64, help="Запросов на каждое число потоков")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--upstream-latency", type=float, default=0.2, help="Задержка ответа API, с")
+    parser.add_argument("--no-cache", action="store_true", help="Читать выгрузку при каждом запросе")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with StubMarketServer(FaultProfile("fixed", (args.upstream_latency,))) as stub:
+        # Фиксированные часы: ответы не зависят от момента запуска и их можно сравнивать
+        ctx = stub_context(
+            stub,
+            clock=lambda: datetime(2021, 12, 31, 12, 0),
+            operations_cache=None if args.no_cache else OperationsCache(),
+        )
+        next_date = date_sampler("uniform", "2020-01-01 00:00:00", "2021-12-31 23:59:59", args.seed)
+        isolated = check_isolation(ctx, [next_date() for _ in range(8)], threads=8)
+
+        rows = []
+        for threads in args.threads:
+            result = run_load(InProcessTarget(ctx), args.requests, threads, lambda: "views_compact", next_date)
+            stats = result["results"]["all"]
+            rows.append(
+                {
+                    "threads": threads,
+                    "throughput_rps": stats["throughput_rps"],
+                    "p50_ms": stats["p50_ms"],
+                    "p95_ms": stats["p95_ms"],
+                    "errors": stats["errors"],
+                }
+            )
+
+    base = rows[0]["throughput_rps"] or 1.0
+    print(f"Параллельные ответы совпадают с последовательными: {'да' if isolated else 'НЕТ'}")
+    print(f"{'потоков':>8} {'запр/с':>8} {'ускорение':>10} {'p50, мс':>9} {'p95, мс':>9} {'ошибок':>7}")
+    for row in rows:
+        row["speedup"] = round(row["throughput_rps"] / base, 2)
+        print(
+            f"{row['threads']:>8} {row['throughput_rps']:>8} {row['speedup']:>10} "
+            f"{row['p50_ms']:>9} {row['p95_ms']:>9} {row['errors']:>7}"
+        )
+    summary = {"config": vars(args), "isolated": isolated, "scaling": rows}
+    print(json.dumps(summary, ensure_ascii=False))
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+import argparse
+import html
+import json
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import numpy as np
+import requests
+
+from src.context import OperationsCache, ViewsContext
+from src.stub_server import LATENCY_KINDS, FaultProfile, StubMarketServer, stub_context
+from src.views import main_views
+
+# Виды запросов: полный ответ с отступами и компактный
+REQUEST_KINDS = ("views", "views_compact")
+DATE_DISTRIBUTIONS = ("uniform", "recent")
+# Границы корзин гистограммы задержек, мс (логарифмическая шкала)
+HISTOGRAM_BOUNDS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+
+class LatencyRecorder:
+    """Потокобезопасный сбор задержек и ошибок по видам запросов"""
+
+    def __init__(self) -> None:
+        self._latencies: Dict[str, List[float]] = {}
+        self._errors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self._latencies.setdefault(kind, []).append(seconds)
+            self._errors[kind] = self._errors.get(kind, 0) + (not ok)
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        """Перцентили, гистограмма и пропускная способность — всего и по видам запросов"""
+        with self._lock:
+            groups = {kind: list(values) for kind, values in self._latencies.items()}
+            errors = dict(self._errors)
+        groups["all"] = [value for values in groups.values() for value in values]
+        errors["all"] = sum(errors.values())
+        return {kind: _latency_stats(values, errors.get(kind, 0), elapsed) for kind, values in groups.items()}
+
+
+def _latency_stats(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    if not latencies:
+        return {"requests": 0, "errors": errors}
+    ms = np.asarray(latencies) * 1000
+    counts, _ = np.histogram(ms, bins=[0, *HISTOGRAM_BOUNDS_MS, math.inf])
+    labels = [f"<{bound} мс" for bound in HISTOGRAM_BOUNDS_MS] + [f">={HISTOGRAM_BOUNDS_MS[-1]} мс"]
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(float(ms.mean()), 2),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+        "max_ms": round(float(ms.max()), 2),
+        "histogram": {label: int(count) for label, count in zip(labels, counts) if count},
+    }
+
+
+def date_sampler(distribution: str, start: str, end: str, seed: Optional[int] = None) -> Callable[[], str]:
+    """
+    Генератор дат запросов "YYYY-MM-DD HH:MM:SS" в периоде [start, end]:
+    "uniform" — равномерно, "recent" — чаще ближе к концу периода (экспоненциально).
+    """
+    if distribution not in DATE_DISTRIBUTIONS:
+        raise ValueError(f"Неизвестное распределение дат: {distribution}")
+    first = datetime.fromisoformat(start)
+    span = (datetime.fromisoformat(end) - first).total_seconds()
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def sample() -> str:
+        with lock:
+            if distribution == "uniform":
+                offset = rng.uniform(0, span)
+            else:
+                offset = span - min(span, rng.expovariate(10 / span))
+        return (first + timedelta(seconds=offset)).strftime("%Y-%m-%d %H:%M:%S")
+
+    return sample
+
+
+def kind_sampler(mix: Dict[str, float], seed: Optional[int] = None) -> Callable[[], str]:
+    """Генератор видов запросов в заданных долях"""
+    unknown = set(mix) - set(REQUEST_KINDS)
+    if unknown:
+        raise ValueError(f"Неизвестные виды запросов: {sorted(unknown)}")
+    kinds, weights = list(mix), list(mix.values())
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def sample() -> str:
+        with lock:
+            return rng.choices(kinds, weights)[0]
+
+    return sample
+
+
+class InProcessTarget:
+    """Вызов main_views в текущем процессе с контекстом ctx"""
+
+    def __init__(self, ctx: ViewsContext) -> None:
+        self.ctx = ctx
+
+    def __call__(self, kind: str, date_time: str) -> Any:
+        return main_views(date_time, compact=kind == "views_compact", ctx=self.ctx)
+
+
+class HttpTarget:
+    """Запросы к локальному сервису страницы «Главная», по сессии на поток"""
+
+    def __init__(self, base_url: str) -> None:
+        self.base_url = base_url
+        self._local = threading.local()
+
+    def __call__(self, kind: str, date_time: str) -> Any:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        query = urlencode({"date_time": date_time, "compact": int(kind == "views_compact")})
+        response = session.get(f"{self.base_url}/views?{query}", timeout=60)
+        response.raise_for_status()
+        return response.text
+
+
+class _DashboardHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        parsed = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        if parsed.path != "/views" or "date_time" not in query:
+            status, payload = 404, b'{"error": "not found"}'
+        else:
+            try:
+                status = 200
+                ctx = self.server.ctx  # type: ignore[attr-defined]
+                payload = main_views(query["date_time"], compact=query.get("compact") == "1", ctx=ctx).encode("utf-8")
+            except Exception as e:
+                status, payload = 500, json.dumps({"error": str(e)}, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class _DashboardHTTPServer(ThreadingHTTPServer):
+    ctx: ViewsContext
+
+
+class DashboardServer:
+    """Локальный HTTP-сервис: GET /views?date_time=...&compact=0|1 отдает ответ main_views"""
+
+    def __init__(self, ctx: ViewsContext, host: str = "127.0.0.1", port: int = 0) -> None:
+        self._httpd = _DashboardHTTPServer((host, port), _DashboardHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.ctx = ctx
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="dashboard", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.socket.getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "DashboardServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def run_load(
+    target: Callable[[str, str], Any],
+    total_requests: int,
+    concurrency: int,
+    next_kind: Callable[[], str],
+    next_date: Callable[[], str],
+) -> Dict[str, Any]:
+    """
+    Выполняет total_requests запросов в concurrency потоков и собирает задержки.
+
+    Returns:
+        Сводка по видам запросов и в целом (ключ "all")
+    """
+    recorder = LatencyRecorder()
+
+    def one_request(_: int) -> None:
+        kind, date_time = next_kind(), next_date()
+        start = time.perf_counter()
+        try:
+            target(kind, date_time)
+            ok = True
+        except Exception:
+            ok = False
+        recorder.record(kind, time.perf_counter() - start, ok)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one_request, range(total_requests)))
+    elapsed = time.perf_counter() - start
+    return {"elapsed_seconds": round(elapsed, 3), "results": recorder.summary(elapsed)}
+
+
+def write_html(summary: Dict[str, Any], path: str) -> None:
+    """Сохраняет сводку в виде HTML-страницы: параметры, таблица перцентилей и гистограммы"""
+    rows = []
+    histograms = []
+    for kind, stats in summary["results"].items():
+        if not stats["requests"]:
+            continue
+        rows.append(
+            "<tr>"
+            + "".join(
+                f"<td>{html.escape(str(value))}</td>"
+                for value in (
+                    kind,
+                    stats["requests"],
+                    stats["errors"],
+                    stats["throughput_rps"],
+                    stats["p50_ms"],
+                    stats["p95_ms"],
+                    stats["p99_ms"],
+                    stats["max_ms"],
+                )
+            )
+            + "</tr>"
+        )
+        peak = max(stats["histogram"].values())
+        bars = "".join(
+            f"<div><span class='label'>{html.escape(label)}</span>"
+            f"<span class='bar' style='width:{300 * count // peak}px'></span> {count}</div>"
+            for label, count in stats["histogram"].items()
+        )
+        histograms.append(f"<h3>{html.escape(kind)}</h3>{bars}")
+
+    page = f"""<!DOCTYPE html>
+<html lang="ru"><head><meta charset="utf-8"><title>Нагрузочный тест main_views</title>
+<style>
+body {{ font-family: sans-serif; }} td, th {{ padding: 4px 10px; text-align: right; }}
+.label {{ display: inline-block; width: 90px; }} .bar {{ display: inline-block; height: 12px; background: #4a7; }}
+</style></head><body>
+<h1>Нагрузочный тест main_views</h1>
+<pre>{html.escape(json.dumps(summary["config"], ensure_ascii=False, indent=2))}</pre>
+<table><tr><th>Вид</th><th>Запросов</th><th>Ошибок</th><th>RPS</th>
+<th>p50, мс</th><th>p95, мс</th><th>p99, мс</th><th>max, мс</th></tr>
+{"".join(rows)}</table>
+{"".join(histograms)}
+</body></html>
+"""
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(page)
+
+
+def _parse_mix(value: str) -> Dict[str, float]:
+    """'views=0.8,views_compact=0.2' → {'views': 0.8, 'views_compact': 0.2}"""
+    pairs: List[Tuple[str, str]] = [tuple(item.split("=", 1)) for item in value.split(",")]  # type: ignore[misc]
+    return {kind.strip(): float(weight) for kind, weight in pairs}
+
+
+def main() -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Нагрузочный тест страницы «Главная» (main_views)")
+    parser.add_argument("--mode", choices=("inprocess", "http"), default="inprocess")
+    parser.add_argument("--requests", type=int, default=200, help="Всего запросов")
+    parser.add_argument("--concurrency", type=int, default=8, help="Одновременных запросов")
+    parser.add_argument("--mix", type=_parse_mix, default={"views": 0.8, "views_compact": 0.2})
+    parser.add_argument("--dates", choices=DATE_DISTRIBUTIONS, default="recent", help="Распределение дат")
+    parser.add_argument("--start", default="2018-01-01 00:00:00", help="Начало периода дат")
+    parser.add_argument("--end", default="2021-12-31 23:59:59", help="Конец периода дат")
+    parser.add_argument("--upstream-latency", choices=LATENCY_KINDS, default="lognormal")
+    parser.add_argument("--upstream-latency-params", type=float, nargs="+", default=[0.05, 0.5])
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+    parser.add_argument("--upstream-rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache-operations", action="store_true", help="Читать выгрузку один раз на все запросы")
+    parser.add_argument("--json", default=None, help="Файл для JSON-сводки")
+    parser.add_argument("--html", default=None, help="Файл для HTML-сводки")
+    args = parser.parse_args()
+
+    profile = FaultProfile(
+        args.upstream_latency,
+        args.upstream_latency_params,
+        args.upstream_error_rate,
+        args.upstream_rate_limit_rate,
+        seed=args.seed,
+    )
+    next_kind = kind_sampler(args.mix, args.seed)
+    next_date = date_sampler(args.dates, args.start, args.end, args.seed)
+
+    with StubMarketServer(profile) as stub:
+        ctx = stub_context(stub, operations_cache=OperationsCache() if args.cache_operations else None)
+        if args.mode == "http":
+            with DashboardServer(ctx) as dashboard:
+                target = HttpTarget(dashboard.base_url)
+                result = run_load(target, args.requests, args.concurrency, next_kind, next_date)
+        else:
+            result = run_load(InProcessTarget(ctx), args.requests, args.concurrency, next_kind, next_date)
+        upstream = stub.stats()
+
+    config = {key: value for key, value in vars(args).items() if key not in ("json", "html")}
+    summary = {"config": config, **result, "upstream": upstream}
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(summary, file, ensure_ascii=False, indent=2)
+    if args.html:
+        write_html(summary, args.html)
+    return summary
+
+
+if __name__ == "__main__":
+    main()
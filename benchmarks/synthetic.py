@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+CATEGORIES = [
+    "Супермаркеты", "Фастфуд", "Переводы", "Каршеринг", "Аптеки", "Рестораны", "Транспорт", "Связь",
+    "Одежда и обувь", "Красота", "Дом и ремонт", "Развлечения", "Такси", "Топливо", "Цветы", "Кино",
+    "Книги", "Образование", "Медицина", "Животные", "Спорттовары", "Подарки", "Турагентства",
+    "Авиабилеты", "Ж/д билеты", "Отели", "Музыка", "Госуслуги", "Сувениры", "Бонусы",
+]
+DESCRIPTIONS = ["Колхоз", "Магнит", "Пятёрочка", "Перекрёсток", "ВкусВилл", "Аптека Вита", "Яндекс Такси", "OZON"]
+
+
+def make_operations(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Синтетическая выгрузка операций в формате data/operations.xlsx.
+    Категории распределены по закону Ципфа: первые встречаются часто, последние — редко.
+    """
+    rng = np.random.default_rng(seed)
+    weights = 1 / np.arange(1, len(CATEGORIES) + 1) ** 2
+    categories = rng.choice(CATEGORIES, size=rows, p=weights / weights.sum())
+    dates = pd.Timestamp("2018-01-01") + pd.to_timedelta(rng.integers(0, 4 * 365 * 86400, rows), unit="s")
+    amounts = -np.round(rng.gamma(2.0, 400.0, rows), 2)
+    amounts[rng.random(rows) < 0.1] *= -1
+    cashback = np.where(rng.random(rows) < 0.3, np.round(-amounts / 100, 2), np.nan)
+    return pd.DataFrame(
+        {
+            "Дата операции": dates.strftime("%d.%m.%Y %H:%M:%S"),
+            "Дата платежа": dates.strftime("%d.%m.%Y"),
+            "Номер карты": rng.choice(["*7197", "*5091", "*4556", "*1112", "*5507"], size=rows),
+            "Статус": np.where(rng.random(rows) < 0.98, "OK", "FAILED"),
+            "Сумма операции": amounts,
+            "Валюта операции": "RUB",
+            "Сумма платежа": amounts,
+            "Валюта платежа": "RUB",
+            "Кэшбэк": cashback,
+            "Категория": categories,
+            "MCC": rng.choice([5411, 5814, 5912, 4121, 5541, 5812], size=rows).astype(float),
+            "Описание": rng.choice(DESCRIPTIONS, size=rows),
+            "Бонусы (включая кэшбэк)": np.round(-amounts / 100, 0),
+            "Округление на инвесткопилку": 0,
+            "Сумма операции с округлением": np.abs(amounts),
+        }
+    )
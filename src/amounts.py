@@ -0,0 +1,120 @@
+import logging
+import re
+from typing import Any, Callable, Dict, Iterable, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+amounts_logger = logging.getLogger("amounts")
+
+# Пробелы (в том числе неразрывные — разделители разрядов), апострофы и обозначения валюты
+_NOISE = r"[\s']|₽|RUB|руб\.?"
+_NOISE_RE = re.compile(_NOISE)
+# Сколько отклоненных значений попадает в отчет примерами
+REJECTION_EXAMPLES = 5
+
+
+def _bulk_replace(strings: Sequence[str], transform: Callable[[str], str]) -> pd.Series:
+    """
+    Применяет строковое преобразование ко всем строкам сразу: строки склеиваются через "\\0",
+    преобразуются одним вызовом и разбиваются обратно. Если "\\0" встречается в данных — по одной.
+    """
+    joined = "\0".join(strings)
+    if joined.count("\0") == len(strings) - 1:
+        return pd.Series(transform(joined).split("\0"), dtype=object)
+    return pd.Series([transform(string) for string in strings], dtype=object)
+
+
+def _parse_strings(strings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Разбирает строковые суммы: убирает пробелы и валюту, определяет десятичный разделитель.
+    Запятая считается десятичной, если она одна и стоит после последней точки ("1 234,50", "1.234,5");
+    иначе запятые и повторяющиеся точки — разделители разрядов ("1,234,567", "1,234.50", "1.234.567").
+    Каждая различная строка разбирается один раз.
+
+    Returns:
+        Числа (NaN, если строка не разобрана) и признак пустой строки
+    """
+    codes, uniques = pd.factorize(strings)
+    text = _bulk_replace(uniques, lambda joined: _NOISE_RE.sub("", joined).replace("−", "-"))
+    numbers = pd.to_numeric(text, errors="coerce").astype(float)
+
+    # Самый частый случай после очистки — одна десятичная запятая ("1234,50")
+    unparsed = text[numbers.isna()]
+    unparsed = unparsed[unparsed.str.contains(",", regex=False)]
+    if len(unparsed):
+        decimal = _bulk_replace(unparsed.tolist(), lambda joined: joined.replace(",", ".")).set_axis(unparsed.index)
+        numbers[unparsed.index] = pd.to_numeric(decimal, errors="coerce")
+
+    # Остальные разделители разрядов разбираются только у строк, которые так и не стали числом
+    unparsed = text[numbers.isna()]
+    separated = unparsed[unparsed.str.contains(r",|\..*\.", regex=True)]
+    if len(separated):
+        comma_decimal = (separated.str.count(",") == 1) & (separated.str.rfind(",") > separated.str.rfind("."))
+        decimal_comma = separated.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+        separated = separated.str.replace(",", "", regex=False).mask(comma_decimal, decimal_comma)
+        many_dots = ~comma_decimal & (separated.str.count(r"\.") > 1)
+        separated = separated.mask(many_dots, separated.str.replace(".", "", regex=False))
+        numbers[separated.index] = pd.to_numeric(separated, errors="coerce")
+
+    return numbers.to_numpy()[codes], (text == "").to_numpy()[codes]
+
+
+def clean_amounts(values: Union[pd.Series, Iterable[Any]]) -> Tuple[pd.Series, Dict[str, Any]]:
+    """
+    Приводит колонку сумм к числам целиком, без цикла по строкам.
+
+    Числа проходят как есть, строки очищаются векторными строковыми операциями
+    и преобразуются одним pd.to_numeric. Поддерживаются пробелы и апострофы
+    как разделители разрядов, десятичная запятая, «₽», «RUB», «руб.».
+
+    Args:
+        values: Колонка таблицы или последовательность сумм (строки, int, float, None)
+
+    Returns:
+        Очищенная колонка с тем же индексом (целочисленная колонка остается int64,
+        остальные приводятся к float64 с NaN на месте отклоненных) и компактный отчет:
+        {"total", "rejected", "by_reason": {"empty"|"not_a_number"|"not_finite": count},
+        "examples": [{"index", "value", "reason"}, ...]}
+    """
+    raw = values if isinstance(values, pd.Series) else pd.Series(list(values), dtype=object)
+
+    if pd.api.types.is_integer_dtype(raw) and not isinstance(raw.dtype, pd.api.extensions.ExtensionDtype):
+        return raw, {"total": len(raw), "rejected": 0, "by_reason": {}, "examples": []}
+
+    if pd.api.types.is_float_dtype(raw):
+        numbers = raw.to_numpy(dtype=float, na_value=np.nan)
+        empty = np.isnan(numbers)
+    else:
+        items = raw.to_numpy(dtype=object)
+        empty = raw.isna().to_numpy(dtype=bool)
+        is_string = np.fromiter((isinstance(item, str) for item in items), dtype=bool, count=len(items))
+        numbers = np.full(len(items), np.nan)
+        # Числа и прочие значения — одним pd.to_numeric, строки — через очистку
+        others = ~is_string & ~empty
+        if others.any():
+            numbers[others] = pd.to_numeric(pd.Series(items[others]), errors="coerce").astype(float)
+        if is_string.any():
+            numbers[is_string], empty[is_string] = _parse_strings(items[is_string])
+
+    reasons = np.select(
+        [empty, np.isnan(numbers), np.isinf(numbers)], ["empty", "not_a_number", "not_finite"], default=""
+    )
+    rejected = reasons != ""
+    numbers[rejected] = np.nan
+    clean = pd.Series(numbers, index=raw.index, name=raw.name)
+
+    positions = np.flatnonzero(rejected)
+    by_reason, counts = np.unique(reasons[rejected], return_counts=True)
+    report: Dict[str, Any] = {
+        "total": len(raw),
+        "rejected": len(positions),
+        "by_reason": {str(reason): int(count) for reason, count in zip(by_reason, counts)},
+        "examples": [
+            {"index": raw.index[position], "value": str(raw.iloc[position]), "reason": str(reasons[position])}
+            for position in positions[:REJECTION_EXAMPLES]
+        ],
+    }
+    if report["rejected"]:
+        amounts_logger.warning(f"Отклонено сумм: {report['rejected']} из {report['total']}: {report['by_reason']}")
+    return clean, report
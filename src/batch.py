@@ -0,0 +1,163 @@
+import argparse
+import json
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.context import ViewsContext
+from src.resilience import DEFAULT_BUDGET, Deadline
+from src.serializers import dumps
+from src.utils_views import (_fetch_all, get_currency_rate, get_date_period, get_path_and_period, get_stock_price,
+                             load_user_settings)
+from src.views import build_views_data
+
+batch_logger = logging.getLogger("batch")
+
+# Запрос рыночных данных: куда записать значение, тикер или валюта, функция загрузки, описание для лога
+MarketRequest = Tuple[Dict[str, Any], str, Callable[..., float], str]
+
+
+def read_manifest(manifest_path: str) -> List[Dict[str, Any]]:
+    """
+    Читает манифест пакетной генерации.
+
+    Args:
+        manifest_path: Путь к JSONL-файлу, каждая строка которого содержит
+            ключи "operations", "settings" и "date_time"
+
+    Returns:
+        Список заданий в порядке следования в файле
+    """
+    jobs = []
+    with open(manifest_path, "r", encoding="utf-8") as file:
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            job = json.loads(line)
+            missing = {"operations", "settings", "date_time"} - set(job)
+            if missing:
+                raise ValueError(f"Строка {line_number}: отсутствуют поля {sorted(missing)}")
+            jobs.append(job)
+    batch_logger.info(f"Прочитано {len(jobs)} заданий из {manifest_path}")
+    return jobs
+
+
+def prefetch_market_data(
+    jobs: List[Dict[str, Any]], budget: Optional[float] = DEFAULT_BUDGET, ctx: Optional[ViewsContext] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Загружает курсы валют и стоимость акций один раз для всех заданий.
+
+    Все запросы выполняются одновременно (_fetch_all) в общем бюджете времени budget
+    с таймаутами и повторами resilient_get, поэтому медленный сервис не задерживает пакет.
+
+    Args:
+        jobs: Список заданий из манифеста
+        budget: Общий бюджет времени на рыночные данные, секунды (None — без ограничений)
+        ctx: Ключи и адреса API (по умолчанию — ViewsContext.from_env())
+
+    Returns:
+        Словарь {"currencies": {валюта: курс}, "stocks": {тикер: цена}}.
+        Если запрос завершился ошибкой, вместо значения сохраняется None.
+    """
+    ctx = ctx or ViewsContext.from_env()
+    deadline = Deadline(budget) if budget is not None else None
+    currencies: Dict[str, Any] = {}
+    stocks: Dict[str, Any] = {}
+
+    for settings_path in dict.fromkeys(job["settings"] for job in jobs):
+        settings = load_user_settings(settings_path)
+        for currency in settings.get("user_currencies", []):
+            currencies.setdefault(currency, None)
+        for stock in settings.get("user_stocks", []):
+            stocks.setdefault(stock, None)
+
+    def fetch(request: MarketRequest) -> None:
+        values, symbol, get_value, description = request
+        try:
+            values[symbol] = get_value(symbol, deadline, ctx)
+        except Exception as e:
+            batch_logger.error(f"Не удалось получить {description} {symbol}: {e}")
+
+    tasks: List[MarketRequest] = [(currencies, currency, get_currency_rate, "курс") for currency in currencies]
+    tasks += [(stocks, stock, get_stock_price, "стоимость акции") for stock in stocks]
+    _fetch_all(fetch, tasks)
+
+    batch_logger.info(f"Загружено валют: {len(currencies)}, акций: {len(stocks)}")
+    return {"currencies": currencies, "stocks": stocks}
+
+
+def run_job(job: Dict[str, Any], market: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Формирует данные страницы «Главная» для одного задания.
+
+    Args:
+        job: Задание с ключами "operations", "settings" и "date_time"
+        market: Заранее загруженные рыночные данные из prefetch_market_data
+
+    Returns:
+        Словарь с заданием, временем выполнения и результатом или ошибкой
+    """
+    start = time.perf_counter()
+    record: Dict[str, Any] = {"operations": job["operations"], "date_time": job["date_time"]}
+
+    try:
+        settings = load_user_settings(job["settings"])
+        sorted_df = get_path_and_period(job["operations"], get_date_period(job["date_time"]))
+        currency = [{"currency": i, "rate": market["currencies"].get(i)} for i in settings.get("user_currencies", [])]
+        stocks = [{"stock": i, "price": market["stocks"].get(i)} for i in settings.get("user_stocks", [])]
+        now = datetime.strptime(job["date_time"], "%Y-%m-%d %H:%M:%S")
+        record["result"] = build_views_data(sorted_df, currency, stocks, now=now)
+    except Exception as e:
+        batch_logger.error(f"Ошибка в задании {job['operations']}: {e}")
+        record["error"] = str(e)
+
+    record["elapsed"] = round(time.perf_counter() - start, 6)
+    return record
+
+
+def run_batch(manifest_path: str, output_path: str, max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Выполняет все задания манифеста в пуле процессов и пишет результаты в JSONL.
+
+    Args:
+        manifest_path: Путь к манифесту заданий
+        output_path: Путь к выходному JSONL-файлу (по строке на задание, в порядке манифеста)
+        max_workers: Число процессов (по умолчанию — число ядер)
+
+    Returns:
+        Сводка: число заданий и ошибок, общее время и пропускная способность
+    """
+    start = time.perf_counter()
+    jobs = read_manifest(manifest_path)
+    market = prefetch_market_data(jobs)
+    market_seconds = time.perf_counter() - start
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        with open(output_path, "w", encoding="utf-8") as output:
+            for record in executor.map(run_job, jobs, [market] * len(jobs)):
+                failed += "error" in record
+                output.write(dumps(record) + "\n")
+
+    total_seconds = time.perf_counter() - start
+    summary = {
+        "jobs": len(jobs),
+        "failed": failed,
+        "market_data_seconds": round(market_seconds, 6),
+        "total_seconds": round(total_seconds, 6),
+        "jobs_per_second": round(len(jobs) / total_seconds, 2) if total_seconds else 0.0,
+    }
+    batch_logger.info(f"Пакетная генерация завершена: {summary}")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Пакетная генерация страницы «Главная»")
+    parser.add_argument("manifest", help="JSONL-манифест заданий")
+    parser.add_argument("output", help="JSONL-файл результатов")
+    parser.add_argument("--workers", type=int, default=None, help="Число процессов")
+    args = parser.parse_args()
+    print(json.dumps(run_batch(args.manifest, args.output, args.workers), ensure_ascii=False, indent=4))
@@ -0,0 +1,236 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.cashback import CashbackRules, default_rules
+
+card_shards_logger = logging.getLogger("card_shards")
+
+CARD_COLUMN = "Номер карты"
+ROUNDED_COLUMN = "Сумма операции с округлением"
+# Колонки, которые нужны правилам кэшбэка и топу операций карты
+RULE_COLUMNS = ("MCC", "Категория", "Дата операции")
+TOP_COLUMNS = ("Дата платежа", "Описание", "Категория")
+# Поля операций топа (как в get_top_transactions) по колонкам таблицы
+TOP_FIELDS = {"Дата платежа": "date", ROUNDED_COLUMN: "amount", "Категория": "category", "Описание": "description"}
+# Сколько крупнейших операций хранится для каждой карты
+DEFAULT_TOP = 3
+
+
+def card_shard_numbers(cards: pd.Series, shards: int) -> np.ndarray:
+    """
+    Номер шарда для каждой операции: хэш номера карты по модулю shards.
+    Хэшируются только различные номера (pd.util.hash_pandas_object не зависит
+    от процесса, в отличие от hash), все операции карты попадают в один шард.
+    """
+    codes, uniques = pd.factorize(cards, use_na_sentinel=False)
+    hashes = pd.util.hash_pandas_object(pd.Series(uniques, dtype=object), index=False).to_numpy()
+    shard_of_card = (hashes % np.uint64(shards)).astype(np.intp)
+    numbers: np.ndarray = shard_of_card[codes]
+    return numbers
+
+
+def partition_by_card(operations: pd.DataFrame, shards: int) -> List[Tuple[pd.DataFrame, np.ndarray]]:
+    """
+    Делит таблицу на shards частей по номеру карты.
+
+    Returns:
+        Пары (часть таблицы, позиции ее строк в operations); внутри части строки
+        идут в исходном порядке, пустые части пропускаются
+    """
+    numbers = card_shard_numbers(operations[CARD_COLUMN], shards)
+    order = np.argsort(numbers, kind="stable")
+    bounds = np.searchsorted(numbers[order], np.arange(1, shards))
+    parts = []
+    for positions in np.split(order, bounds):
+        if len(positions):
+            parts.append((operations.iloc[positions], positions))
+    return parts
+
+
+def card_partials(
+    shard: pd.DataFrame, positions: np.ndarray, rules: CashbackRules, top: int = DEFAULT_TOP
+) -> Dict[str, pd.DataFrame]:
+    """
+    Частичные показатели карт одной части таблицы.
+
+    Returns:
+        {"totals": карта, позиция первой операции, сумма, кэшбэк (сумма × процент, ×100), число операций;
+         "top": до top крупнейших операций каждой карты с позициями и теми колонками TOP_COLUMNS,
+         которые есть в таблице}
+    """
+    percent, _ = rules.percents(shard)
+    # Как в get_card: копейки отбрасываются у каждой операции
+    spent = shard[ROUNDED_COLUMN].astype(int).to_numpy()
+    rows = pd.DataFrame(
+        {
+            CARD_COLUMN: shard[CARD_COLUMN].to_numpy(),
+            "position": positions,
+            "spent": spent,
+            "cashback": spent * percent,
+        }
+    )
+    totals = (
+        rows.groupby(CARD_COLUMN, sort=False, dropna=False)
+        .agg(
+            first=("position", "min"),
+            spent=("spent", "sum"),
+            cashback=("cashback", "sum"),
+            operations=("position", "size"),
+        )
+        .reset_index()
+    )
+
+    if top <= 0:
+        return {"totals": totals, "top": pd.DataFrame(columns=[CARD_COLUMN, ROUNDED_COLUMN, "position"])}
+    top_columns = [column for column in TOP_COLUMNS if column in shard.columns]
+    top_rows = (
+        shard[[CARD_COLUMN, *top_columns, ROUNDED_COLUMN]]
+        .assign(position=positions)
+        .sort_values(ROUNDED_COLUMN, ascending=False, kind="stable")
+        .groupby(CARD_COLUMN, sort=False, dropna=False)
+        .head(top)
+    )
+    return {"totals": totals, "top": top_rows}
+
+
+def merge_card_partials(
+    partials: Iterable[Dict[str, pd.DataFrame]], top: int = DEFAULT_TOP
+) -> Dict[str, pd.DataFrame]:
+    """
+    Объединяет частичные показатели: суммы складываются, первая позиция — наименьшая,
+    из топов остаются top крупнейших операций карты (при равных — более ранняя).
+    Результат не зависит от порядка частей: карты упорядочены по первой операции.
+    Если каждая карта есть только в одной части (partition_by_card), кэшбэк совпадает
+    с расчетом по всей таблице до последнего знака.
+    """
+    partials = list(partials)
+    totals = pd.concat([partial["totals"] for partial in partials], ignore_index=True)
+    totals = (
+        totals.groupby(CARD_COLUMN, sort=False, dropna=False)
+        .agg(
+            first=("first", "min"),
+            spent=("spent", "sum"),
+            cashback=("cashback", "sum"),
+            operations=("operations", "sum"),
+        )
+        .reset_index()
+        .sort_values("first", kind="stable")
+        .reset_index(drop=True)
+    )
+    top_rows = pd.concat([partial["top"] for partial in partials])
+    top_rows = (
+        top_rows.sort_values([ROUNDED_COLUMN, "position"], ascending=[False, True], kind="stable")
+        .groupby(CARD_COLUMN, sort=False, dropna=False)
+        .head(top)
+    )
+    return {"totals": totals, "top": top_rows}
+
+
+def card_statistics(
+    operations: pd.DataFrame,
+    shards: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    rules: Optional[CashbackRules] = None,
+    top: int = DEFAULT_TOP,
+) -> list[dict]:
+    """
+    Показатели по картам с разбиением по номеру карты (map-reduce).
+
+    Таблица делится на shards частей хэшем номера карты, частичные показатели
+    частей считаются в пуле процессов и объединяются merge_card_partials.
+    В процессы передаются только нужные колонки, но каждая часть целиком
+    сериализуется (pickle) и копируется в процесс. Ускорение от числа ядер
+    не измерено (см. benchmarks/bench_card_shards.py): при малых таблицах
+    копирование частей может съесть весь выигрыш.
+
+    Args:
+        operations: Таблица операций (например, выборка периода get_period)
+        shards: Число частей (по умолчанию — число процессов)
+        max_workers: Число процессов (по умолчанию — число ядер; 1 — без пула)
+        rules: Правила кэшбэка (по умолчанию — cashback_rules.json)
+        top: Сколько крупнейших операций вернуть для каждой карты
+
+    Returns:
+        Карты в порядке первой операции: last_digits, total_spent и cashback (как в get_card),
+        operations — число операций, top_transactions — крупнейшие операции (как в get_top_transactions)
+
+        Если в таблице нет какой-то из колонок TOP_COLUMNS, соответствующего поля
+        в top_transactions нет; колонки правил кэшбэка тоже необязательны.
+
+    Raises:
+        ValueError: в таблице нет номера карты или суммы с округлением
+    """
+    missing = [column for column in (CARD_COLUMN, ROUNDED_COLUMN) if column not in operations.columns]
+    if missing:
+        raise ValueError(f"В таблице операций нет колонок: {', '.join(missing)}")
+    rules = rules or default_rules()
+    workers = max_workers or os.cpu_count() or 1
+    shards = shards or workers
+    columns = [CARD_COLUMN, ROUNDED_COLUMN, *(TOP_COLUMNS if top > 0 else ()), *RULE_COLUMNS]
+    needed = list(dict.fromkeys(column for column in columns if column in operations.columns))
+    parts = partition_by_card(operations[needed], shards)
+    if not parts:
+        return []
+
+    if workers == 1 or len(parts) == 1:
+        partials = [card_partials(shard, positions, rules, top) for shard, positions in parts]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(parts))) as pool:
+            partials = list(
+                pool.map(
+                    card_partials,
+                    [shard for shard, _ in parts],
+                    [positions for _, positions in parts],
+                    [rules] * len(parts),
+                    [top] * len(parts),
+                )
+            )
+    merged = merge_card_partials(partials, top)
+    card_shards_logger.info(f"Показатели {len(merged['totals'])} карт по {len(parts)} частям, процессов: {workers}")
+
+    totals = merged["totals"]
+    cards = totals[CARD_COLUMN]
+    top_by_card: Dict[Any, List[dict]] = {}
+    top_rows = merged["top"]
+    fields = [(field, top_rows[column].tolist()) for column, field in TOP_FIELDS.items() if column in top_rows]
+    for position, card in enumerate(top_rows[CARD_COLUMN].tolist()):
+        top_by_card.setdefault(card if pd.notna(card) else None, []).append(
+            {field: f"{values[position]}" for field, values in fields}
+        )
+    card_keys = cards.astype(object).where(cards.notna(), None).tolist() if top_by_card else [None] * len(totals)
+
+    statistics = []
+    rows = zip(
+        cards.astype(str).str.replace("*", "", regex=False).tolist(),
+        totals["spent"].astype(int).tolist(),
+        totals["cashback"].astype(float).tolist(),
+        totals["operations"].astype(int).tolist(),
+        card_keys,
+    )
+    for last_digits, total_spent, cashback, count, key in rows:
+        statistics.append(
+            {
+                "last_digits": last_digits,
+                "total_spent": total_spent,
+                "cashback": round(cashback / 100, 2),
+                "operations": count,
+                "top_transactions": top_by_card.get(key, []),
+            }
+        )
+    return statistics
+
+
+def get_card_partitioned(
+    sorted_df: pd.DataFrame,
+    shards: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    rules: Optional[CashbackRules] = None,
+) -> list[dict]:
+    """Результат get_card, посчитанный по частям таблицы в пуле процессов (см. card_statistics)"""
+    statistics = card_statistics(sorted_df, shards, max_workers, rules, top=0)
+    return [{key: card[key] for key in ("last_digits", "total_spent", "cashback")} for card in statistics]
@@ -0,0 +1,255 @@
+import datetime
+import json
+import logging
+import os
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+cashback_logger = logging.getLogger("cashback")
+
+file_path_rules = os.path.join(os.path.dirname(__file__), "../cashback_rules.json")
+DATE_FORMAT = "%d.%m.%Y %H:%M:%S"
+# Процент кэшбэка и бонусов, если ни одно правило не подошло
+DEFAULT_PERCENT = 1.0
+# Коды MCC четырехзначные: таблица «MCC → правило» — массив на 10000 элементов
+MCC_TABLE_SIZE = 10000
+
+
+def _date(value: Optional[str]) -> Optional[datetime.date]:
+    return datetime.date.fromisoformat(value) if value else None
+
+
+def _mcc(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _card(value: Any) -> str:
+    return str(value).replace("*", "")
+
+
+class CashbackRule:
+    """
+    Правило программы лояльности: процент кэшбэка (и бонусов) для операций,
+    подходящих под все заданные условия. Не заданное условие подходит всегда.
+    """
+
+    def __init__(
+        self,
+        percent: float,
+        bonus_percent: Optional[float] = None,
+        mcc: Optional[Sequence[int]] = None,
+        categories: Optional[Sequence[str]] = None,
+        cards: Optional[Sequence[str]] = None,
+        start: Optional[datetime.date] = None,
+        end: Optional[datetime.date] = None,
+        name: str = "",
+    ) -> None:
+        self.percent = float(percent)
+        self.bonus_percent = float(bonus_percent) if bonus_percent is not None else self.percent
+        self.mcc: Optional[FrozenSet[int]] = frozenset(int(code) for code in mcc) if mcc is not None else None
+        self.categories = frozenset(categories) if categories is not None else None
+        self.cards = frozenset(_card(card) for card in cards) if cards is not None else None
+        self.start = start
+        self.end = end
+        self.name = name
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CashbackRule":
+        return cls(
+            percent=data["percent"],
+            bonus_percent=data.get("bonus_percent"),
+            mcc=data.get("mcc"),
+            categories=data.get("category"),
+            cards=data.get("card"),
+            start=_date(data.get("start")),
+            end=_date(data.get("end")),
+            name=data.get("name", ""),
+        )
+
+    @property
+    def is_promo(self) -> bool:
+        """Правило с условиями помимо MCC (категория, карта, период действия)"""
+        return any(condition is not None for condition in (self.categories, self.cards, self.start, self.end))
+
+    def matches(self, mcc: Any, category: Any, card: Any, day: Optional[datetime.date]) -> bool:
+        """Проверка одной операции (для потоковой обработки и проверки векторного расчета)"""
+        if self.mcc is not None and _mcc(mcc) not in self.mcc:
+            return False
+        if self.categories is not None and category not in self.categories:
+            return False
+        if self.cards is not None and (pd.isna(card) or _card(card) not in self.cards):
+            return False
+        if (self.start is not None or self.end is not None) and day is None:
+            return False
+        if self.start is not None and day < self.start:  # type: ignore[operator]
+            return False
+        if self.end is not None and day > self.end:  # type: ignore[operator]
+            return False
+        return True
+
+
+class CashbackRules:
+    """
+    Таблица правил кэшбэка. Срабатывает первое подходящее правило в порядке
+    списка, иначе действует default_percent.
+
+    Для расчета по таблице правила компилируются в векторные выборки:
+    правила только по MCC — в массив «MCC → номер правила», правила с периодом
+    действия — в отрезки дат, на которые границы периодов делят ось времени
+    (интервальное соединение через np.searchsorted). Категории и карты
+    сравниваются через isin. Расчет идет за один проход по колонкам, без цикла по строкам.
+    """
+
+    def __init__(self, rules: Sequence[CashbackRule] = (), default_percent: float = DEFAULT_PERCENT) -> None:
+        self.rules = list(rules)
+        self.default_percent = float(default_percent)
+        count = len(self.rules)
+        self._percents = np.array([rule.percent for rule in self.rules] + [self.default_percent])
+        self._bonus_percents = np.array([rule.bonus_percent for rule in self.rules] + [self.default_percent])
+
+        # Первое подходящее правило без дополнительных условий для каждого MCC и для операций без MCC
+        self._mcc_table = np.full(MCC_TABLE_SIZE, count, dtype=np.int64)
+        self._no_mcc_rule = count
+        for number in reversed(range(count)):
+            rule = self.rules[number]
+            if rule.is_promo:
+                continue
+            if rule.mcc is None:
+                self._mcc_table[:] = number
+                self._no_mcc_rule = number
+            else:
+                codes = [code for code in rule.mcc if 0 <= code < MCC_TABLE_SIZE]
+                self._mcc_table[codes] = number
+
+        # Отрезки оси времени между границами периодов акций и активные на каждом отрезке акции
+        self._promos = [number for number, rule in enumerate(self.rules) if rule.is_promo]
+        bounds = set()
+        for number in self._promos:
+            rule = self.rules[number]
+            if rule.start is not None:
+                bounds.add(np.datetime64(rule.start, "D"))
+            if rule.end is not None:
+                bounds.add(np.datetime64(rule.end, "D") + np.timedelta64(1, "D"))
+        self._bounds = np.array(sorted(bounds), dtype="datetime64[D]")
+        segment_starts = [None, *self._bounds]
+        self._active = np.array(
+            [[self._active_on(self.rules[number], start) for number in self._promos] for start in segment_starts],
+            dtype=bool,
+        ).reshape(len(segment_starts), len(self._promos))
+
+    @staticmethod
+    def _active_on(rule: CashbackRule, segment_start: Optional[np.datetime64]) -> bool:
+        # Отрезок целиком внутри или целиком вне периода акции: достаточно проверить его начало
+        if segment_start is None:
+            return rule.start is None
+        day = segment_start.astype(datetime.date)
+        return (rule.start is None or rule.start <= day) and (rule.end is None or day <= rule.end)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CashbackRules":
+        rules = [CashbackRule.from_dict(rule) for rule in data.get("rules", [])]
+        return cls(rules, data.get("default_percent", DEFAULT_PERCENT))
+
+    def rule_numbers(self, operations: pd.DataFrame, dates: Optional[pd.Series] = None) -> np.ndarray:
+        """
+        Номер сработавшего правила для каждой строки (len(rules) — процент по умолчанию).
+
+        Args:
+            operations: Таблица с колонками «MCC», «Категория», «Номер карты»
+                (отсутствующая колонка не подходит ни под одно условие по ней)
+            dates: Даты операций (по умолчанию — колонка «Дата операции»)
+        """
+        size = len(operations)
+        mcc = self._column(operations, "MCC")
+        if mcc is None:
+            numbers = np.full(size, self._no_mcc_rule, dtype=np.int64)
+            codes = np.full(size, -1, dtype=np.int64)
+        else:
+            codes_float = pd.to_numeric(mcc, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+            valid = np.isfinite(codes_float) & (codes_float >= 0) & (codes_float < MCC_TABLE_SIZE)
+            codes = np.where(valid, codes_float, -1).astype(np.int64)
+            numbers = np.where(valid, self._mcc_table[np.where(valid, codes, 0)], self._no_mcc_rule)
+        if not self._promos:
+            return numbers
+
+        if dates is None:
+            dates = self._column(operations, "Дата операции")
+        if dates is not None:
+            if not pd.api.types.is_datetime64_any_dtype(dates):
+                dates = pd.to_datetime(dates, format=DATE_FORMAT, errors="coerce")
+            days = pd.Series(dates).to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+            has_day = ~np.isnat(days)
+            segments = np.searchsorted(self._bounds, days, side="right")
+        else:
+            has_day = np.zeros(size, dtype=bool)
+            segments = np.zeros(size, dtype=np.int64)
+        category = self._column(operations, "Категория")
+        card = self._column(operations, "Номер карты")
+        cards = card.map(_card, na_action="ignore") if card is not None else None
+
+        # Акции проверяются от последней к первой, чтобы более раннее правило перезаписывало позднее
+        for position in reversed(range(len(self._promos))):
+            number = self._promos[position]
+            if number > numbers.max(initial=-1):
+                continue
+            rule = self.rules[number]
+            mask = np.ones(size, dtype=bool)
+            if rule.start is not None or rule.end is not None:
+                mask &= has_day & self._active[segments, position]
+            if rule.mcc is not None:
+                mask &= np.isin(codes, list(rule.mcc))
+            if rule.categories is not None:
+                mask &= category.isin(rule.categories).to_numpy() if category is not None else False
+            if rule.cards is not None:
+                mask &= cards.isin(rule.cards).to_numpy() if cards is not None else False
+            numbers = np.where(mask & (number < numbers), number, numbers)
+        return numbers
+
+    def percents(self, operations: pd.DataFrame, dates: Optional[pd.Series] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Процент кэшбэка и процент бонусов для каждой строки таблицы"""
+        numbers = self.rule_numbers(operations, dates)
+        return self._percents[numbers], self._bonus_percents[numbers]
+
+    def percent_for(self, mcc: Any, category: Any, card: Any, day: Optional[datetime.date]) -> Tuple[float, float]:
+        """Процент кэшбэка и бонусов для одной операции"""
+        for rule in self.rules:
+            if rule.matches(mcc, category, card, day):
+                return rule.percent, rule.bonus_percent
+        return self.default_percent, self.default_percent
+
+    @staticmethod
+    def _column(operations: pd.DataFrame, name: str) -> Optional[pd.Series]:
+        return operations[name] if name in operations.columns else None
+
+
+def load_cashback_rules(path_file: str = file_path_rules) -> CashbackRules:
+    """
+    Читает правила кэшбэка из JSON. Пример:
+
+        {"default_percent": 1,
+         "rules": [{"name": "Супермаркеты", "percent": 5, "mcc": [5411], "start": "2024-01-01", "end": "2024-03-31"},
+                   {"percent": 3, "category": ["Рестораны"], "card": ["7197"], "bonus_percent": 1}]}
+
+    Без файла действует только процент по умолчанию.
+    """
+    try:
+        with open(path_file, "r", encoding="utf-8") as file:
+            data = json.load(file)
+    except FileNotFoundError:
+        cashback_logger.info(f"Файл правил {path_file} не найден, кэшбэк {DEFAULT_PERCENT}%")
+        return CashbackRules()
+    rules = CashbackRules.from_dict(data)
+    cashback_logger.info(f"Загружено правил кэшбэка: {len(rules.rules)}")
+    return rules
+
+
+@lru_cache(maxsize=1)
+def default_rules() -> CashbackRules:
+    """Правила из cashback_rules.json в корне проекта, читаются один раз"""
+    return load_cashback_rules()
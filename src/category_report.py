@@ -0,0 +1,155 @@
+import argparse
+import json
+import logging
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+import xlsxwriter  # type: ignore[import-untyped]
+
+from src.indexes import OperationsIndex
+from src.outliers import flag_outliers
+from src.reports import OUTPUT_COLUMNS, category_spending, file_path_param_r, report_period
+
+category_report_logger = logging.getLogger("category_report")
+
+SUMMARY_SHEET = "Итоги"
+SUMMARY_COLUMNS = ["Категория", "Операций", "Сумма расходов", "Кэшбэк", "Бонусы (включая кэшбэк)", "Секунд"]
+# Недопустимые в названии листа Excel символы и его максимальная длина
+_SHEET_NAME_FORBIDDEN = re.compile(r"[\[\]:*?/\\]")
+_SHEET_NAME_LENGTH = 31
+
+# Таблица операций, индекс и аномалии, подготовленные в процессе пула один раз
+_worker_transactions: Optional[pd.DataFrame] = None
+_worker_index: Optional[OperationsIndex] = None
+_worker_outliers: Optional[Dict[Any, Any]] = None
+
+
+def _init_worker(transactions: pd.DataFrame) -> None:
+    """Сохраняет таблицу в процессе пула и строит по ней индекс и отметки аномалий"""
+    global _worker_transactions, _worker_index, _worker_outliers
+    _worker_transactions = transactions
+    _worker_index = OperationsIndex.build(transactions)
+    _worker_outliers = flag_outliers(transactions)
+
+
+def _category_job(category: str, start: Any, end: Any) -> Dict[str, Any]:
+    """Расходы одной категории в процессе пула"""
+    job_start = time.perf_counter()
+    result = category_spending(
+        _worker_transactions, category, start, end, _worker_index, _worker_outliers  # type: ignore[arg-type]
+    )
+    return {"category": category, "result": result, "elapsed": round(time.perf_counter() - job_start, 6)}
+
+
+def sheet_names(categories: Sequence[str]) -> List[str]:
+    """
+    Названия листов для категорий: без запрещенных символов, не длиннее 31 знака
+    и без повторов (Excel не различает регистр в названиях листов).
+    """
+    used = {SUMMARY_SHEET.casefold()}
+    names = []
+    for category in categories:
+        base = _SHEET_NAME_FORBIDDEN.sub("_", str(category)).strip("'") or "_"
+        name = base[:_SHEET_NAME_LENGTH]
+        number = 1
+        while name.casefold() in used:
+            number += 1
+            suffix = f" ({number})"
+            length = _SHEET_NAME_LENGTH - len(suffix)
+            name = base[:length] + suffix
+        used.add(name.casefold())
+        names.append(name)
+    return names
+
+
+def _write_sheet(worksheet: Any, columns: Sequence[str], rows: Any) -> None:
+    """Лист в формате save_to_file: широкие колонки, заголовок, строки данных"""
+    for col_num, col_name in enumerate(columns):
+        worksheet.set_column(col_num, col_num, 50)
+        worksheet.write(0, col_num, col_name)
+    for row_num, row_data in enumerate(rows):
+        worksheet.write_row(row_num + 1, 0, row_data)
+
+
+def build_category_report(
+    transactions: pd.DataFrame,
+    output_path: str,
+    categories: Optional[Sequence[str]] = None,
+    date: Optional[str] = None,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Считает spending_by_category для нескольких категорий в пуле процессов и пишет
+    каждую на отдельный лист одной книги, первым листом — итоги по категориям.
+
+    Args:
+        transactions: Таблица операций (даты строкой "%d.%m.%Y %H:%M:%S" или datetime)
+        output_path: Путь к xlsx-файлу отчета
+        categories: Категории (по умолчанию — все категории расходов по алфавиту)
+        date: Дата отчета (по умолчанию — сегодня)
+        max_workers: Число процессов (по умолчанию — число ядер)
+
+    Returns:
+        Сводка: число категорий и строк, время самой долгой категории и общее время
+    """
+    start = time.perf_counter()
+    transactions = transactions.copy()
+    transactions["Дата операции"] = pd.to_datetime(
+        transactions["Дата операции"], format="%d.%m.%Y %H:%M:%S", errors="coerce"
+    )
+    if categories is None:
+        expenses = transactions[transactions["Сумма операции"] < 0]
+        categories = sorted(expenses["Категория"].dropna().unique())
+    categories = list(categories)
+    three_months_ago, specific_date = report_period(date)
+
+    workbook = xlsxwriter.Workbook(output_path, {"constant_memory": True})
+    summary_sheet = workbook.add_worksheet(SUMMARY_SHEET)
+    summary = []
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(transactions,)) as pool:
+            jobs = pool.map(
+                _category_job, categories, [three_months_ago] * len(categories), [specific_date] * len(categories)
+            )
+            for name, job in zip(sheet_names(categories), jobs):
+                result = job["result"]
+                _write_sheet(workbook.add_worksheet(name), OUTPUT_COLUMNS, result.values)
+                summary.append(
+                    [
+                        job["category"],
+                        len(result),
+                        round(float(result["Сумма операции"].abs().sum()), 2),
+                        round(float(result["Кэшбэк"].sum()), 2),
+                        round(float(result["Бонусы (включая кэшбэк)"].sum()), 2),
+                        job["elapsed"],
+                    ]
+                )
+                category_report_logger.debug(f"Лист «{name}»: {len(result)} строк")
+        _write_sheet(summary_sheet, SUMMARY_COLUMNS, summary)
+    finally:
+        workbook.close()
+
+    report = {
+        "categories": len(categories),
+        "rows": sum(row[1] for row in summary),
+        "slowest_category_seconds": max((row[-1] for row in summary), default=0.0),
+        "total_seconds": round(time.perf_counter() - start, 6),
+    }
+    category_report_logger.info(f"Отчет по категориям записан в {output_path}: {report}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Отчет по расходам всех категорий в одной книге")
+    parser.add_argument("output", help="xlsx-файл отчета")
+    parser.add_argument("--operations", default=file_path_param_r, help="xlsx-файл операций")
+    parser.add_argument("--date", default=None, help="Дата отчета")
+    parser.add_argument("--categories", nargs="*", default=None, help="Категории (по умолчанию — все)")
+    parser.add_argument("--workers", type=int, default=None, help="Число процессов")
+    args = parser.parse_args()
+    operations = pd.read_excel(args.operations, sheet_name="Отчет по операциям")
+    report = build_category_report(operations, args.output, args.categories, args.date, args.workers)
+    print(json.dumps(report, ensure_ascii=False, indent=4))
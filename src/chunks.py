@@ -0,0 +1,66 @@
+import logging
+from typing import Iterator, List, Optional
+
+import openpyxl
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+chunks_logger = logging.getLogger("chunks")
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+
+def _cell(value: object) -> object:
+    """Значение ячейки в том виде, в каком его передает парсеру pd.read_excel"""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _frame(rows: List[tuple], columns: List[str], offset: int) -> pd.DataFrame:
+    """
+    Порция с индексом, продолжающим нумерацию строк всей таблицы.
+    Типы колонок выводит тот же TextParser, что и у pd.read_excel.
+    """
+    chunk = TextParser(rows, names=columns, header=None).read()
+    chunk.index = pd.RangeIndex(offset, offset + len(rows))
+    return chunk
+
+
+def iter_excel_chunks(
+    path_file: str, sheet_name: str = "Отчет по операциям", chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[pd.DataFrame]:
+    """
+    Читает лист xlsx порциями по chunk_size строк (openpyxl в режиме read_only).
+    Первая строка листа — заголовки; индексы порций идут подряд, как у pd.read_excel.
+    """
+    workbook = openpyxl.load_workbook(path_file, read_only=True, data_only=True)
+    try:
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        header: Optional[tuple] = next(rows, None)
+        if header is None:
+            return
+        columns = [str(name) for name in header]
+
+        offset = 0
+        batch: List[tuple] = []
+        for row in rows:
+            batch.append(tuple(_cell(value) for value in row))
+            if len(batch) == chunk_size:
+                yield _frame(batch, columns, offset)
+                offset += len(batch)
+                batch = []
+        if batch:
+            yield _frame(batch, columns, offset)
+            offset += len(batch)
+        chunks_logger.info(f"Прочитано порциями из {path_file}: {offset} строк")
+    finally:
+        workbook.close()
+
+
+def iter_csv_chunks(path_file: str, chunk_size: int = DEFAULT_CHUNK_SIZE, **kwargs: object) -> Iterator[pd.DataFrame]:
+    """Читает csv порциями по chunk_size строк"""
+    with pd.read_csv(path_file, chunksize=chunk_size, **kwargs) as reader:  # type: ignore[call-overload]
+        yield from reader
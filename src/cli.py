@@ -0,0 +1,243 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from src.indexes import OperationsIndex
+from src.outliers import flag_outliers
+from src.query import OperationsQuery
+from src.reports import category_spending, file_path_param_r, report_period
+from src.resilience import DEFAULT_BUDGET, Deadline
+from src.serializers import dataframe_records, dumps
+from src.services import investment_bank
+from src.utils_views import (get_currency, get_currency_with_fallback, get_date_period, get_stocks,
+                             get_stocks_with_fallback)
+from src.views import build_views_data
+
+cli_logger = logging.getLogger("cli")
+
+file_path_settings = os.path.join(os.path.dirname(__file__), "../user_settings.json")
+
+# Тип запроса → обязательные поля
+QUERY_FIELDS = {"views": ("date_time",), "report": ("category",), "invest": ("month", "limit")}
+
+
+def read_queries(queries_path: str) -> List[Dict[str, Any]]:
+    """
+    Читает JSONL-файл запросов.
+
+    Args:
+        queries_path: Путь к файлу, каждая строка которого — запрос вида
+            {"type": "views", "date_time": ...}, {"type": "report", "category": ..., "date": ...}
+            или {"type": "invest", "month": ..., "limit": ...}
+
+    Returns:
+        Список запросов в порядке следования в файле
+    """
+    queries = []
+    with open(queries_path, "r", encoding="utf-8") as file:
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            query = json.loads(line)
+            query_type = query.get("type")
+            if query_type not in QUERY_FIELDS:
+                raise ValueError(f"Строка {line_number}: неизвестный тип запроса {query_type!r}")
+            missing = set(QUERY_FIELDS[query_type]) - set(query)
+            if missing:
+                raise ValueError(f"Строка {line_number}: отсутствуют поля {sorted(missing)}")
+            queries.append(query)
+    cli_logger.info(f"Прочитано {len(queries)} запросов из {queries_path}")
+    return queries
+
+
+def load_context(
+    operations: pd.DataFrame,
+    queries: List[Dict[str, Any]],
+    settings_path: str = file_path_settings,
+    budget: Optional[float] = DEFAULT_BUDGET,
+) -> Dict[str, Any]:
+    """
+    Готовит общие для всех запросов данные: таблицу с приведенными датами и индекс,
+    а также — только если они нужны запросам — аномалии flag_outliers по всей таблице,
+    курсы и цены акций и список транзакций для «Инвесткопилки».
+
+    Args:
+        operations: Таблица операций, прочитанная из xlsx
+        queries: Запросы из read_queries
+        settings_path: Путь к пользовательским настройкам (валюты и акции)
+        budget: Бюджет времени на внешние запросы в секундах (None — без ограничений)
+
+    Returns:
+        Словарь с ключами "operations", "index", "outliers", "currency", "stocks", "records"
+    """
+    operations = operations.copy()
+    operations["Дата операции"] = pd.to_datetime(
+        operations["Дата операции"], format="%d.%m.%Y %H:%M:%S", errors="coerce"
+    )
+    context: Dict[str, Any] = {
+        "operations": operations,
+        "index": OperationsIndex.build(operations),
+        "outliers": {},
+        "currency": [],
+        "stocks": [],
+        "records": [],
+    }
+    query_types = {query["type"] for query in queries}
+
+    if query_types & {"views", "report"}:
+        context["outliers"] = flag_outliers(operations)
+
+    if "views" in query_types:
+        if budget is not None:
+            deadline = Deadline(budget)
+            context["currency"] = get_currency_with_fallback(settings_path, deadline)
+            context["stocks"] = get_stocks_with_fallback(settings_path, deadline)
+        else:
+            context["currency"] = get_currency(settings_path)
+            context["stocks"] = get_stocks(settings_path)
+
+    if "invest" in query_types:
+        context["records"] = [
+            {"Дата операции": date, "Сумма операции": amount}
+            for date, amount in zip(
+                operations["Дата операции"].dt.strftime("%Y-%m-%d").fillna(""), operations["Сумма операции"]
+            )
+        ]
+    return context
+
+
+def run_query(query: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Выполняет один запрос над общими данными.
+
+    Returns:
+        Словарь с запросом, временем выполнения и результатом или ошибкой
+    """
+    start = time.perf_counter()
+    record: Dict[str, Any] = {"query": query}
+
+    try:
+        if query["type"] == "views":
+            start_date, last_date = get_date_period(query["date_time"])
+            sorted_df = (
+                OperationsQuery(context["operations"], context["index"])
+                .between(
+                    pd.to_datetime(start_date, format="%d.%m.%Y %H:%M:%S"),
+                    pd.to_datetime(last_date, format="%d.%m.%Y %H:%M:%S"),
+                )
+                .order_by("Дата операции")
+                .collect()
+            )
+            record["result"] = build_views_data(
+                sorted_df, context["currency"], context["stocks"], flags=context["outliers"]
+            )
+        elif query["type"] == "report":
+            three_months_ago, specific_date = report_period(query.get("date"))
+            resulted = category_spending(
+                context["operations"],
+                query["category"],
+                three_months_ago,
+                specific_date,
+                context["index"],
+                context["outliers"],
+            )
+            record["result"] = list(dataframe_records(resulted))
+        else:
+            record["result"] = json.loads(investment_bank(query["month"], context["records"], query["limit"]))
+    except Exception as e:
+        cli_logger.error(f"Ошибка в запросе {query}: {e}")
+        record["error"] = str(e)
+
+    record["elapsed"] = round(time.perf_counter() - start, 6)
+    return record
+
+
+def profile_summary(timings: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Время выполнения по типам запросов: число запросов и ошибок, сумма, среднее и максимум в секундах.
+    timings — записи вида {"type": ..., "elapsed": ..., "failed": ...}.
+    """
+    summary: Dict[str, Dict[str, Any]] = {}
+    for timing in timings:
+        stats = summary.setdefault(timing["type"], {"count": 0, "failed": 0, "total": 0.0, "max": 0.0})
+        stats["count"] += 1
+        stats["failed"] += timing["failed"]
+        stats["total"] += timing["elapsed"]
+        stats["max"] = max(stats["max"], timing["elapsed"])
+    for stats in summary.values():
+        stats["mean"] = round(stats["total"] / stats["count"], 6)
+        stats["total"] = round(stats["total"], 6)
+    return summary
+
+
+def run_queries(
+    queries_path: str,
+    output_path: str,
+    operations_path: str = file_path_param_r,
+    settings_path: str = file_path_settings,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Выполняет запросы из JSONL-файла над один раз загруженной таблицей операций
+    в пуле потоков и пишет результаты в JSONL в порядке запросов.
+
+    Args:
+        queries_path: Путь к файлу запросов
+        output_path: Путь к выходному JSONL-файлу
+        operations_path: Путь к xlsx-файлу операций
+        settings_path: Путь к пользовательским настройкам
+        max_workers: Число потоков
+
+    Returns:
+        Сводка: число запросов и ошибок, время загрузки, общее время и профиль по типам запросов
+    """
+    start = time.perf_counter()
+    queries = read_queries(queries_path)
+    operations = pd.read_excel(operations_path, sheet_name="Отчет по операциям")
+    context = load_context(operations, queries, settings_path)
+    load_seconds = time.perf_counter() - start
+
+    timings = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        with open(output_path, "w", encoding="utf-8") as output:
+            for record in executor.map(run_query, queries, [context] * len(queries)):
+                query_type, failed = record["query"]["type"], "error" in record
+                timings.append({"type": query_type, "elapsed": record["elapsed"], "failed": failed})
+                output.write(dumps(record) + "\n")
+
+    summary = {
+        "queries": len(queries),
+        "failed": sum(timing["failed"] for timing in timings),
+        "load_seconds": round(load_seconds, 6),
+        "total_seconds": round(time.perf_counter() - start, 6),
+        "profile": profile_summary(timings),
+    }
+    cli_logger.info(f"Запросы выполнены: {summary['queries']}, ошибок: {summary['failed']}")
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Выполнение пакета запросов views/report/invest")
+    parser.add_argument("queries", help="JSONL-файл запросов")
+    parser.add_argument("output", help="JSONL-файл результатов")
+    parser.add_argument("--operations", default=file_path_param_r, help="xlsx-файл операций")
+    parser.add_argument("--settings", default=file_path_settings, help="Файл пользовательских настроек")
+    parser.add_argument("--workers", type=int, default=None, help="Число потоков")
+    parser.add_argument("--profile", action="store_true", help="Вывести время по типам запросов")
+    args = parser.parse_args(argv)
+
+    summary = run_queries(args.queries, args.output, args.operations, args.settings, args.workers)
+    if args.profile:
+        print(json.dumps(summary, ensure_ascii=False, indent=4), file=sys.stderr)
+    return summary
+
+
+if __name__ == "__main__":
+    main()
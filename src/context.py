@@ -0,0 +1,102 @@
+import logging
+import os
+import threading
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+import requests
+from dotenv import load_dotenv
+from pandas import DataFrame
+
+from src.outliers import flag_outliers
+from src.resilience import CircuitBreaker, LastKnownCache, circuit_breaker, last_known
+
+context_logger = logging.getLogger("context")
+
+load_dotenv()
+
+file_path_operations = os.path.join(os.path.dirname(__file__), "../data/operations.xlsx")
+file_path_settings = os.path.join(os.path.dirname(__file__), "../user_settings.json")
+DEFAULT_FIXER_BASE_URL = "https://api.apilayer.com"
+DEFAULT_STOCKS_BASE_URL = "https://api.massive.com"
+
+
+class OperationsCache:
+    """
+    Загруженные таблицы операций по пути к файлу. Таблица перечитывается, если
+    у файла изменились время изменения или размер. Одновременные запросы к
+    одному файлу ждут одной загрузки. Таблицы из кэша общие для потоков:
+    вызывающий код не должен их изменять. Аномалии flag_outliers по всей
+    таблице считаются один раз для каждой загруженной версии.
+    """
+
+    def __init__(self) -> None:
+        self._tables: Dict[str, Tuple[Tuple[int, int], DataFrame]] = {}
+        self._outliers: Dict[str, Tuple[DataFrame, Dict[Hashable, Dict[str, Any]]]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _path_lock(self, path: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(path, threading.Lock())
+
+    def get(self, path: str, loader: Callable[[str], DataFrame]) -> DataFrame:
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._path_lock(path):
+            cached = self._tables.get(path)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            table = loader(path)
+            self._tables[path] = (version, table)
+            context_logger.info(f"Таблица операций {path} загружена в кэш: {len(table)} строк")
+            return table
+
+    def outliers(self, path: str, loader: Callable[[str], DataFrame]) -> Dict[Hashable, Dict[str, Any]]:
+        """Аномалии flag_outliers по всей таблице файла path (вычисляются при первом запросе к версии)"""
+        table = self.get(path, loader)
+        with self._path_lock(path):
+            cached = self._outliers.get(path)
+            if cached is not None and cached[0] is table:
+                return cached[1]
+            flags = flag_outliers(table)
+            self._outliers[path] = (table, flags)
+            return flags
+
+
+class ViewsContext(NamedTuple):
+    """
+    Неизменяемые настройки запроса страницы «Главная»: пути к файлам, ключи
+    и адреса API, часы, HTTP-клиент и общие кэши. Передается через все этапы
+    вместо глобальных переменных модулей, поэтому запросы с разными контекстами
+    можно выполнять одновременно в потоках. Изменение — через _replace.
+    """
+
+    operations_path: str = file_path_operations
+    settings_path: str = file_path_settings
+    api_key: Optional[str] = None
+    api_key_stocks: Optional[str] = None
+    fixer_base_url: str = DEFAULT_FIXER_BASE_URL
+    stocks_base_url: str = DEFAULT_STOCKS_BASE_URL
+    # Текущее время запроса (приветствие, период цен акций)
+    clock: Callable[[], datetime] = datetime.now
+    # Объект с методом get: модуль requests или requests.Session
+    http: Any = requests
+    breaker: CircuitBreaker = circuit_breaker
+    last_known: LastKnownCache = last_known
+    operations_cache: Optional[OperationsCache] = None
+
+    @classmethod
+    def from_env(cls, **overrides: Any) -> "ViewsContext":
+        """Контекст с ключами и адресами API из переменных окружения на момент вызова"""
+        values: Dict[str, Any] = {
+            "api_key": os.getenv("API_KEY"),
+            "api_key_stocks": os.getenv("API_KEY_STOCKS"),
+            "fixer_base_url": os.getenv("FIXER_BASE_URL", DEFAULT_FIXER_BASE_URL),
+            "stocks_base_url": os.getenv("STOCKS_BASE_URL", DEFAULT_STOCKS_BASE_URL),
+        }
+        values.update(overrides)
+        return cls(**values)
+
+    def today(self) -> date:
+        return self.clock().date()
@@ -0,0 +1,105 @@
+import logging
+from datetime import timedelta
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.market_store import MarketStore
+
+fx_logger = logging.getLogger("fx")
+
+BASE_CURRENCY = "RUB"
+# На сколько дней раньше первой операции запрашиваются курсы, чтобы у нее был предыдущий курс
+LOOKBACK_DAYS = 7
+
+
+def _operation_dates(dates: pd.Series) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates
+    return pd.to_datetime(dates, format="%d.%m.%Y %H:%M:%S", errors="coerce")
+
+
+def rate_table(store: MarketStore, currencies: pd.Series, dates: pd.Series) -> pd.DataFrame:
+    """
+    Таблица дневных курсов к рублю (currency, date, rate) для переданных валют операций.
+    Для каждой валюты берется период ее операций; недостающие дни догружаются
+    запросами не длиннее MAX_TIMESERIES_DAYS (см. MarketStore.ensure_rates).
+    """
+    frames = []
+    spans = (
+        pd.DataFrame({"currency": currencies, "date": dates})
+        .dropna()
+        .groupby("currency")["date"]
+        .agg(["min", "max"])
+    )
+    for currency, first, last in spans.itertuples(name=None):
+        rates = store.get_rates(currency, first.date() - timedelta(days=LOOKBACK_DAYS), last.date())
+        frames.append(pd.DataFrame(rates, columns=["date", "rate"]).assign(currency=currency))
+        fx_logger.debug(f"Курсы {currency}: {len(rates)} дней")
+
+    if not frames:
+        empty = {"currency": pd.Series(dtype=object), "date": pd.Series(dtype="datetime64[ns]"), "rate": []}
+        return pd.DataFrame(empty)
+    table = pd.concat(frames, ignore_index=True)
+    table["date"] = pd.to_datetime(table["date"], format="%Y-%m-%d")
+    return table[["currency", "date", "rate"]]
+
+
+def convert_to_rub(
+    df: pd.DataFrame,
+    store: Optional[MarketStore] = None,
+    amount_column: str = "Сумма операции",
+    currency_column: str = "Валюта операции",
+    output_column: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Добавляет сумму в рублях по курсу на дату операции.
+
+    Каждая операция соединяется с последним известным дневным курсом своей валюты
+    не позже даты операции (merge_asof по локальной таблице курсов), суммы в рублях
+    переносятся как есть. Курсы берутся из MarketStore, из сети загружаются только
+    недостающие дни.
+
+    Args:
+        df: Таблица операций
+        store: Хранилище курсов (по умолчанию — data/market.db)
+        amount_column: Колонка суммы
+        currency_column: Колонка валюты этой суммы
+        output_column: Колонка результата (по умолчанию — "<amount_column>, RUB")
+
+    Returns:
+        Копия таблицы с колонками «Курс к RUB» и суммой в рублях.
+        Если курса на дату нет, в обеих колонках NaN.
+    """
+    store = store or MarketStore()
+    output_column = output_column or f"{amount_column}, {BASE_CURRENCY}"
+    dates = _operation_dates(df["Дата операции"])
+    currencies = df[currency_column]
+
+    rates = np.full(len(df), np.nan)
+    rates[(currencies == BASE_CURRENCY).to_numpy()] = 1.0
+
+    foreign = ((currencies != BASE_CURRENCY) & currencies.notna() & dates.notna()).to_numpy()
+    if foreign.any():
+        table = rate_table(store, currencies[foreign], dates[foreign])
+        positions = np.flatnonzero(foreign)
+        operations = pd.DataFrame(
+            {
+                "position": positions,
+                "currency": currencies.to_numpy()[positions],
+                "date": dates.to_numpy().astype("datetime64[ns]")[positions],
+            }
+        ).sort_values("date", kind="stable")
+        joined = pd.merge_asof(operations, table.sort_values("date"), on="date", by="currency", direction="backward")
+        rates[joined["position"].to_numpy()] = joined["rate"].to_numpy()
+
+        missing = int(np.isnan(rates[positions]).sum())
+        if missing:
+            fx_logger.warning(f"Нет курса для {missing} операций")
+
+    result = df.copy()
+    result["Курс к RUB"] = rates
+    result[output_column] = (result[amount_column].to_numpy(dtype=float) * rates).round(2)
+    fx_logger.info(f"В рубли пересчитано операций: {int(foreign.sum())} из {len(df)}")
+    return result
@@ -0,0 +1,93 @@
+import logging
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+indexes_logger = logging.getLogger("indexes")
+
+INDEXED_COLUMNS = ("Категория", "MCC", "Номер карты", "Статус")
+DATE_COLUMN = "Дата операции"
+
+
+class OperationsIndex:
+    """
+    Индексы по таблице операций, строятся один раз при загрузке.
+
+    Для каждой колонки из INDEXED_COLUMNS хранится отображение
+    «значение → отсортированные номера строк» (позиции в таблице),
+    для колонки дат — номера строк, упорядоченные по дате. Выборка по
+    значению стоит O(число совпавших строк), а не O(размер таблицы).
+    """
+
+    def __init__(
+        self,
+        size: int,
+        postings: Dict[str, Dict[Any, np.ndarray]],
+        date_order: Optional[np.ndarray] = None,
+        sorted_dates: Optional[np.ndarray] = None,
+        date_column: str = DATE_COLUMN,
+    ) -> None:
+        self.size = size
+        self.postings = postings
+        self.date_order = date_order
+        self.sorted_dates = sorted_dates
+        self.date_column = date_column
+
+    @classmethod
+    def build(
+        cls, df: pd.DataFrame, columns: Iterable[str] = INDEXED_COLUMNS, date_column: str = DATE_COLUMN
+    ) -> "OperationsIndex":
+        """Строит индексы по колонкам columns и по колонке дат (если она есть и уже приведена к datetime)"""
+        postings: Dict[str, Dict[Any, np.ndarray]] = {}
+        for column in columns:
+            if column not in df.columns:
+                continue
+            codes, uniques = pd.factorize(df[column], use_na_sentinel=True)
+            order = np.argsort(codes, kind="stable")
+            counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+            # Строки с пропусками (код -1) идут первыми, их пропускаем
+            offset = int((codes < 0).sum())
+            bounds = offset + np.concatenate(([0], np.cumsum(counts)))
+            postings[column] = {
+                value: order[start:stop] for value, start, stop in zip(uniques.tolist(), bounds[:-1], bounds[1:])
+            }
+
+        date_order = sorted_dates = None
+        if date_column in df.columns and pd.api.types.is_datetime64_any_dtype(df[date_column]):
+            dates = df[date_column].to_numpy()
+            valid = np.flatnonzero(~pd.isna(dates))
+            date_order = valid[np.argsort(dates[valid], kind="stable")]
+            sorted_dates = dates[date_order]
+
+        indexes_logger.info(f"Построены индексы для {len(df)} строк: {sorted(postings)}")
+        return cls(len(df), postings, date_order, sorted_dates, date_column)
+
+    def has(self, column: str) -> bool:
+        return column in self.postings
+
+    def lookup(self, column: str, value: Any) -> np.ndarray:
+        """Отсортированные номера строк, где column == value"""
+        return self.postings[column].get(value, np.empty(0, dtype=np.intp))
+
+    def date_range(
+        self, start: Optional[pd.Timestamp], end: Optional[pd.Timestamp], end_inclusive: bool = True
+    ) -> np.ndarray:
+        """Отсортированные номера строк с датой в диапазоне"""
+        if self.date_order is None or self.sorted_dates is None:
+            raise ValueError("Индекс по датам не построен")
+        lo = int(np.searchsorted(self.sorted_dates, np.datetime64(start), "left")) if start is not None else 0
+        if end is None:
+            hi = len(self.sorted_dates)
+        else:
+            hi = int(np.searchsorted(self.sorted_dates, np.datetime64(end), "right" if end_inclusive else "left"))
+        return np.sort(self.date_order[lo:hi])
+
+
+def load_indexed_operations(
+    path_file: str, sheet_name: str = "Отчет по операциям"
+) -> Tuple[pd.DataFrame, OperationsIndex]:
+    """Загружает xlsx-файл операций, приводит даты и строит индексы"""
+    df = pd.read_excel(path_file, sheet_name=sheet_name)
+    df[DATE_COLUMN] = pd.to_datetime(df[DATE_COLUMN], format="%d.%m.%Y %H:%M:%S", errors="coerce")
+    return df, OperationsIndex.build(df)
@@ -0,0 +1,374 @@
+import argparse
+import heapq
+import json
+import logging
+import math
+import socket
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from dateutil.relativedelta import relativedelta
+
+from src.amounts import clean_amounts
+from src.cashback import CashbackRules, default_rules
+from src.outliers import OutlierDetector
+from src.serializers import dumps
+from src.utils_views import get_time
+
+live_logger = logging.getLogger("live")
+
+DATE_FORMAT = "%d.%m.%Y %H:%M:%S"
+LIVE_LIMITS = (10, 50, 100)
+# Как часто tail_jsonl проверяет файл на новые строки, с
+POLL_INTERVAL = 0.05
+
+
+def _number(value: Any) -> float:
+    """
+    Сумма операции числом, разобранная так же, как колонка сумм выгрузки (см. clean_amounts).
+
+    Raises:
+        ValueError: сумма отклонена (пустая, не число или бесконечность)
+    """
+    if isinstance(value, (int, float)) and math.isfinite(value):
+        return float(value)
+    numbers, report = clean_amounts([value])
+    if report["rejected"]:
+        raise ValueError(f"сумма {value!r} отклонена: {report['examples'][0]['reason']}")
+    return float(numbers.iloc[0])
+
+
+def _month(moment: datetime) -> str:
+    return moment.strftime("%Y-%m")
+
+
+class LiveDashboard:
+    """
+    Состояние страницы «Главная», которое обновляется по одной операции.
+
+    Хранит за текущий месяц суммы по картам (как get_card) и кучу из top_k
+    крупнейших операций (как get_top_transactions), по месяцам — накопители
+    «Инвесткопилки» для нескольких лимитов, по дням — расходы по категориям
+    за последние category_months месяцев. Необычно крупные расходы текущего месяца
+    отмечает OutlierDetector, статистика которого копится за все время.
+    Операции ожидаются в порядке времени; при переходе на новый месяц данные
+    прошлых месяцев удаляются.
+    """
+
+    def __init__(
+        self,
+        top_k: int = 5,
+        limits: Sequence[int] = LIVE_LIMITS,
+        category_months: int = 3,
+        investment_months: int = 12,
+        rules: Optional[CashbackRules] = None,
+    ) -> None:
+        self.top_k = top_k
+        self.limits = tuple(limits)
+        self.category_months = category_months
+        self.investment_months = investment_months
+        self.rules = rules or default_rules()
+        self.current_month: Optional[str] = None
+        self._oldest_month = ""
+        self.latest: Optional[datetime] = None
+        # Карта → [сумма с округлением, сумма «сумма × процент кэшбэка»]
+        self._cards: Dict[str, List[float]] = {}
+        self._top: List[Tuple[float, int, Dict[str, str]]] = []
+        self._investments: Dict[str, List[float]] = {}
+        self._category_days: Dict[date, Dict[str, float]] = {}
+        self._detector = OutlierDetector()
+        self._outliers: List[dict] = []
+        self._currency: List[dict] = []
+        self._stocks: List[dict] = []
+        self._sequence = 0
+        self.stats = {"events": 0, "rejected": 0, "late": 0, "rollovers": 0}
+        self._lock = threading.Lock()
+
+    # Обновление состояния
+
+    def apply(self, event: Dict[str, Any]) -> bool:
+        """
+        Учитывает одну операцию (словарь с колонками выгрузки).
+
+        Returns:
+            False, если операция отклонена (нет даты или суммы)
+        """
+        try:
+            moment = datetime.strptime(event["Дата операции"], DATE_FORMAT)
+            amount = _number(event.get("Сумма операции"))
+            rounded = event.get("Сумма операции с округлением")
+            rounded = abs(amount) if rounded is None else _number(rounded)
+        except (KeyError, TypeError, ValueError) as e:
+            live_logger.warning(f"Операция отклонена: {e}")
+            with self._lock:
+                self.stats["rejected"] += 1
+            return False
+
+        month = _month(moment)
+        with self._lock:
+            self.stats["events"] += 1
+            if self.current_month is None or month > self.current_month:
+                self._rollover(month, moment)
+            if self.latest is None or moment > self.latest:
+                self.latest = moment
+
+            if month == self.current_month:
+                self._add_card(event, moment, rounded)
+                self._add_top(event, rounded)
+            else:
+                self.stats["late"] += 1
+            if amount < 0:
+                self._add_investment(month, -amount)
+                self._add_category(moment.date(), event.get("Категория"), -amount)
+                self._add_outlier(event, month, -amount)
+        return True
+
+    def _rollover(self, month: str, moment: datetime) -> None:
+        """Новый месяц: обнуляет карты и топ, удаляет устаревшие накопители"""
+        if self.current_month is not None:
+            self.stats["rollovers"] += 1
+            live_logger.info(f"Переход с {self.current_month} на {month}")
+        self.current_month = month
+        self._cards = {}
+        self._top = []
+        self._outliers = []
+
+        self._oldest_month = _month(moment - relativedelta(months=self.investment_months - 1))
+        for key in [key for key in self._investments if key < self._oldest_month]:
+            del self._investments[key]
+        oldest_day = moment.date() - relativedelta(months=self.category_months)
+        for day in [day for day in self._category_days if day < oldest_day]:
+            del self._category_days[day]
+
+    def _add_card(self, event: Dict[str, Any], moment: datetime, rounded: float) -> None:
+        # Как в get_card: копейки отбрасываются у каждой операции, процент — из правил кэшбэка
+        card = event.get("Номер карты")
+        percent, _ = self.rules.percent_for(event.get("MCC"), event.get("Категория"), card, moment.date())
+        totals = self._cards.setdefault(str(card) if card is not None else "nan", [0, 0.0])
+        totals[0] += int(rounded)
+        totals[1] += int(rounded) * percent
+
+    def _add_top(self, event: Dict[str, Any], rounded: float) -> None:
+        # При равных суммах в топе остается более ранняя операция
+        self._sequence += 1
+        entry = (rounded, -self._sequence, event)
+        if len(self._top) < self.top_k:
+            heapq.heappush(self._top, entry)
+        elif entry > self._top[0]:
+            heapq.heapreplace(self._top, entry)
+
+    def _add_investment(self, month: str, expense: float) -> None:
+        if month < self._oldest_month:
+            return
+        totals = self._investments.setdefault(month, [0.0] * len(self.limits))
+        for i, limit in enumerate(self.limits):
+            # Как в round_amount: округление вверх до кратного limit
+            totals[i] += round(((expense + limit - 1) // limit) * limit - expense, 2)
+
+    def _add_category(self, day: date, category: Any, expense: float) -> None:
+        if category is None or (isinstance(category, float) and math.isnan(category)):
+            return
+        if self.latest is not None and day < self.latest.date() - relativedelta(months=self.category_months):
+            return
+        totals = self._category_days.setdefault(day, {})
+        totals[category] = totals.get(category, 0.0) + expense
+
+    def _add_outlier(self, event: Dict[str, Any], month: str, expense: float) -> None:
+        flag = self._detector.check(expense, event.get("Категория"), event.get("Номер карты"))
+        if flag is None or month != self.current_month:
+            return
+        self._outliers.append(
+            {
+                "date": f"{event.get('Дата платежа')}",
+                "amount": f"{expense}",
+                "category": f"{event.get('Категория')}",
+                "description": f"{event.get('Описание')}",
+                "last_digits": str(event.get("Номер карты")).replace("*", ""),
+                "scope": flag["scope"],
+                "z_score": flag["z_score"],
+            }
+        )
+
+    def set_market(self, currency: List[dict], stocks: List[dict]) -> None:
+        """Сохраняет последние курсы валют и цены акций для ответа views"""
+        with self._lock:
+            self._currency, self._stocks = currency, stocks
+
+    # Ответы
+
+    def cards(self) -> List[dict]:
+        """Суммы по картам за текущий месяц в формате get_card"""
+        with self._lock:
+            items = [(card, list(totals)) for card, totals in self._cards.items()]
+        return [
+            {"last_digits": card.replace("*", ""), "total_spent": int(total), "cashback": round(weighted / 100, 2)}
+            for card, (total, weighted) in items
+        ]
+
+    def top_transactions(self) -> List[dict]:
+        """Крупнейшие операции текущего месяца в формате get_top_transactions"""
+        with self._lock:
+            entries = sorted(self._top, reverse=True)
+        return [
+            {
+                "date": f"{event.get('Дата платежа')}",
+                "amount": f"{event.get('Сумма операции с округлением') or amount}",
+                "category": f"{event.get('Категория')}",
+                "description": f"{event.get('Описание')}",
+            }
+            for amount, _, event in entries
+        ]
+
+    def outliers(self) -> List[dict]:
+        """Необычно крупные расходы текущего месяца в формате get_outliers"""
+        with self._lock:
+            return list(self._outliers)
+
+    def investments(self, month: Optional[str] = None) -> Dict[str, Dict[int, float]]:
+        """Суммы «Инвесткопилки» по месяцам и лимитам (или за один месяц)"""
+        with self._lock:
+            items = [(key, list(totals)) for key, totals in self._investments.items() if month in (None, key)]
+        return {key: {limit: round(total, 2) for limit, total in zip(self.limits, totals)} for key, totals in items}
+
+    def category_totals(self, as_of: Optional[date] = None) -> Dict[str, float]:
+        """
+        Расходы по категориям за category_months месяцев до as_of (по умолчанию —
+        день последней операции) по дням включительно, как в spending_by_category
+        """
+        with self._lock:
+            if as_of is None:
+                if self.latest is None:
+                    return {}
+                as_of = self.latest.date()
+            start = as_of - relativedelta(months=self.category_months)
+            totals: Dict[str, float] = {}
+            for day, categories in self._category_days.items():
+                if start <= day <= as_of:
+                    for category, spent in categories.items():
+                        totals[category] = totals.get(category, 0.0) + spent
+        return {category: round(spent, 2) for category, spent in sorted(totals.items())}
+
+    def views_data(self) -> Dict[str, Any]:
+        """Данные страницы «Главная» из текущего состояния, как build_views_data"""
+        return {
+            "greeting": get_time(),
+            "cards": self.cards(),
+            "top_transactions": self.top_transactions(),
+            "outliers": self.outliers(),
+            "currency_rates": self._currency,
+            "stock_prices": self._stocks,
+        }
+
+    def views(self, compact: bool = False) -> str:
+        """JSON-ответ страницы «Главная» без чтения книги, как main_views"""
+        return dumps(self.views_data(), indent=None if compact else 4)
+
+
+# Источники операций
+
+
+def consume(state: LiveDashboard, events: Iterable[Dict[str, Any]]) -> int:
+    """Применяет к состоянию все операции источника, возвращает число принятых"""
+    accepted = 0
+    for event in events:
+        accepted += state.apply(event)
+    return accepted
+
+
+def _parse_lines(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            live_logger.warning(f"Строка пропущена: {e}")
+
+
+def tail_jsonl(
+    path: str, stop: Optional[threading.Event] = None, from_start: bool = True, poll_interval: float = POLL_INTERVAL
+) -> Iterator[Dict[str, Any]]:
+    """
+    Читает операции из JSONL-файла, который продолжает дописываться (как tail -f).
+    Без stop завершается, дойдя до конца файла.
+    """
+
+    def lines() -> Iterator[str]:
+        with open(path, "r", encoding="utf-8") as file:
+            if not from_start:
+                file.seek(0, 2)
+            pending = ""
+            while True:
+                chunk = file.readline()
+                if chunk:
+                    pending += chunk
+                    # Последняя строка может быть дописана не до конца
+                    if pending.endswith("\n"):
+                        yield pending
+                        pending = ""
+                elif stop is None or stop.is_set():
+                    if pending:
+                        yield pending
+                    return
+                else:
+                    time.sleep(poll_interval)
+
+    return _parse_lines(lines())
+
+
+def socket_events(
+    host: str,
+    port: int,
+    stop: Optional[threading.Event] = None,
+    ready: Optional[Callable[[int], None]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Принимает операции построчно (JSON на строку) по TCP. Соединения обслуживаются
+    по очереди; без stop завершается после первого закрытого соединения.
+    ready вызывается с номером порта, когда сервер начал слушать (port=0 — любой свободный).
+    """
+    with socket.create_server((host, port)) as server:
+        server.settimeout(0.2)
+        if ready is not None:
+            ready(server.getsockname()[1])
+        while stop is None or not stop.is_set():
+            try:
+                connection, _ = server.accept()
+            except socket.timeout:
+                continue
+            with connection, connection.makefile("r", encoding="utf-8") as stream:
+                yield from _parse_lines(stream)
+            if stop is None:
+                return
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Живое состояние страницы «Главная» по потоку операций")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--jsonl", help="JSONL-файл, который дописывается (см. src.replay)")
+    source.add_argument("--port", type=int, help="TCP-порт для приема операций")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--print-every", type=int, default=500, help="Печатать ответ views каждые N операций")
+    args = parser.parse_args(argv)
+
+    state = LiveDashboard()
+    stop = threading.Event()
+    events = tail_jsonl(args.jsonl, stop) if args.jsonl else socket_events(args.host, args.port, stop)
+    try:
+        for count, event in enumerate(events, start=1):
+            state.apply(event)
+            if count % args.print_every == 0:
+                start = time.perf_counter()
+                response = state.views(compact=True)
+                elapsed = (time.perf_counter() - start) * 1e6
+                print(f"{state.latest} ({elapsed:.0f} мкс): {response}", flush=True)
+    except KeyboardInterrupt:
+        stop.set()
+    print(json.dumps({**state.stats, "investments": state.investments()}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import logging
+import os
+import sqlite3
+from contextlib import closing
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from src.context import ViewsContext
+from src.utils_views import get_currency_timeseries, get_daily_aggregates
+
+market_store_logger = logging.getLogger("market_store")
+
+file_path_market_db = os.path.join(os.path.dirname(__file__), "../data/market.db")
+# Fixer отдает timeseries не больше чем за 365 дней одним запросом
+MAX_TIMESERIES_DAYS = 365
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_aggs (
+    ticker TEXT NOT NULL,
+    date TEXT NOT NULL,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL NOT NULL,
+    volume REAL,
+    PRIMARY KEY (ticker, date)
+);
+CREATE TABLE IF NOT EXISTS fx_rates (
+    currency TEXT NOT NULL,
+    date TEXT NOT NULL,
+    rate REAL NOT NULL,
+    PRIMARY KEY (currency, date)
+);
+CREATE TABLE IF NOT EXISTS covered_days (
+    ticker TEXT NOT NULL,
+    date TEXT NOT NULL,
+    PRIMARY KEY (ticker, date)
+);
+"""
+
+
+def _days(start: date, end: date) -> list[date]:
+    """Возвращает список дней с start по end включительно"""
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def _windows(days: list[date], max_days: int) -> list[tuple[date, date]]:
+    """
+    Разбивает отсортированные дни на периоды (первый, последний день) не длиннее max_days:
+    каждый период начинается с очередного дня, не попавшего в предыдущий
+    """
+    windows: list[tuple[date, date]] = []
+    for day in days:
+        if windows and (day - windows[-1][0]).days < max_days:
+            windows[-1] = (windows[-1][0], day)
+        else:
+            windows.append((day, day))
+    return windows
+
+
+class MarketStore:
+    """
+    Локальное хранилище дневных агрегатов акций и курсов валют в SQLite.
+
+    Для каждого тикера хранятся дневные бары и отметки о днях, которые уже
+    запрашивались из сети (выходные и праздники баров не имеют, но повторно
+    не запрашиваются). Перед запросом в сеть вычисляются недостающие дни,
+    и для каждого тикера они догружаются одним запросом.
+    Курсы валют к рублю хранятся так же, отметки о днях — под ключом вида «USD/RUB».
+    Адреса, ключи API и часы («сегодня») берутся из ctx (по умолчанию — ViewsContext.from_env()).
+    """
+
+    def __init__(self, db_path: str = file_path_market_db, ctx: Optional[ViewsContext] = None) -> None:
+        self.db_path = db_path
+        self.ctx = ctx
+        with closing(self._connect()) as connection:
+            connection.executescript(_SCHEMA)
+
+    def _today(self) -> date:
+        return (self.ctx or ViewsContext.from_env()).today()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path)
+
+    def missing_dates(self, ticker: str, start: date, end: date) -> list[date]:
+        """Возвращает дни периода, которые еще не запрашивались для тикера"""
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT date FROM covered_days WHERE ticker = ? AND date BETWEEN ? AND ?",
+                (ticker, start.isoformat(), end.isoformat()),
+            ).fetchall()
+        covered = {row[0] for row in rows}
+        return [day for day in _days(start, end) if day.isoformat() not in covered]
+
+    def ensure(self, ticker: str, start: date, end: date) -> bool:
+        """
+        Догружает недостающие дни периода одним запросом.
+
+        После успешного ответа запрошенными отмечаются все дни запроса до вчерашнего
+        включительно, в том числе дни без баров (выходные, праздники); сегодняшний бар
+        еще может измениться, поэтому сегодня не отмечается. При ошибке запроса
+        (requests.HTTPError и другие исключения get_daily_aggregates) в хранилище
+        ничего не записывается.
+
+        Returns:
+            True, если потребовался запрос в сеть
+        """
+        missing = self.missing_dates(ticker, start, end)
+        if not missing:
+            return False
+
+        fetch_start, fetch_end = missing[0], missing[-1]
+        market_store_logger.info(f"Загрузка {ticker} за {fetch_start} — {fetch_end}")
+        bars = get_daily_aggregates(ticker, fetch_start, fetch_end, ctx=self.ctx)
+
+        rows = []
+        for bar in bars:
+            if "t" not in bar:
+                continue
+            bar_date = datetime.fromtimestamp(bar["t"] / 1000, tz=timezone.utc).date()
+            rows.append(
+                (ticker, bar_date.isoformat(), bar.get("o"), bar.get("h"), bar.get("l"), bar["c"], bar.get("v"))
+            )
+
+        covered = _days(fetch_start, min(fetch_end, self._today() - timedelta(days=1)))
+        with closing(self._connect()) as connection, connection:
+            connection.executemany("INSERT OR REPLACE INTO daily_aggs VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            connection.executemany(
+                "INSERT OR IGNORE INTO covered_days VALUES (?, ?)", [(ticker, day.isoformat()) for day in covered]
+            )
+        return True
+
+    def ensure_many(self, tickers: Iterable[str], start: date, end: date) -> int:
+        """Догружает недостающие дни для нескольких тикеров, возвращает число запросов в сеть"""
+        return sum(self.ensure(ticker, start, end) for ticker in tickers)
+
+    def get_range(self, ticker: str, start: date, end: date) -> list[dict]:
+        """Возвращает дневные бары тикера за период (с догрузкой недостающих дней)"""
+        self.ensure(ticker, start, end)
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT date, open, high, low, close, volume FROM daily_aggs "
+                "WHERE ticker = ? AND date BETWEEN ? AND ? ORDER BY date",
+                (ticker, start.isoformat(), end.isoformat()),
+            ).fetchall()
+        return [{"date": row[0], "o": row[1], "h": row[2], "l": row[3], "c": row[4], "v": row[5]} for row in rows]
+
+    def latest_close(self, ticker: str, as_of: Optional[date] = None) -> Optional[float]:
+        """
+        Возвращает последнюю известную цену закрытия на дату as_of (по умолчанию сегодня).
+        Если вчерашний день уже запрашивался, цена берется из хранилища без запроса в сеть;
+        иначе догружается окно «вчера — сегодня», как в get_stocks.
+        """
+        as_of = as_of or self._today()
+        yesterday = as_of - timedelta(days=1)
+        if self.missing_dates(ticker, yesterday, yesterday):
+            self.ensure(ticker, yesterday, as_of)
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT close FROM daily_aggs WHERE ticker = ? AND date <= ? ORDER BY date DESC LIMIT 1",
+                (ticker, as_of.isoformat()),
+            ).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _fx_key(currency: str) -> str:
+        return f"{currency}/RUB"
+
+    def ensure_rates(self, currency: str, start: date, end: date) -> bool:
+        """
+        Догружает недостающие дневные курсы валюты к рублю запросами не длиннее
+        MAX_TIMESERIES_DAYS дней (обычно одним).
+
+        Запрошенными отмечаются только дни, курсы за которые пришли в ответе (кроме
+        сегодняшнего: курс за сегодня еще меняется). При ошибке запроса его дни
+        в хранилище не записываются.
+
+        Returns:
+            True, если потребовался запрос в сеть
+        """
+        key = self._fx_key(currency)
+        missing = self.missing_dates(key, start, end)
+        if not missing:
+            return False
+
+        today = self._today().isoformat()
+        for fetch_start, fetch_end in _windows(missing, MAX_TIMESERIES_DAYS):
+            market_store_logger.info(f"Загрузка курсов {key} за {fetch_start} — {fetch_end}")
+            rates = get_currency_timeseries(currency, fetch_start, fetch_end, ctx=self.ctx)
+            with closing(self._connect()) as connection, connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO fx_rates VALUES (?, ?, ?)",
+                    [(currency, day, rate) for day, rate in rates.items()],
+                )
+                connection.executemany(
+                    "INSERT OR IGNORE INTO covered_days VALUES (?, ?)",
+                    [(key, day) for day in rates if day < today],
+                )
+        return True
+
+    def get_rates(self, currency: str, start: date, end: date) -> list[tuple[str, float]]:
+        """Возвращает пары (дата, курс к рублю) за период по возрастанию даты (с догрузкой недостающих дней)"""
+        self.ensure_rates(currency, start, end)
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT date, rate FROM fx_rates WHERE currency = ? AND date BETWEEN ? AND ? ORDER BY date",
+                (currency, start.isoformat(), end.isoformat()),
+            ).fetchall()
+        return [(row[0], row[1]) for row in rows]
@@ -0,0 +1,268 @@
+import atexit
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, TypeVar
+
+try:
+    import psutil  # type: ignore[import-untyped]
+except ImportError:  # pragma: no cover - RSS читается из /proc, psutil не обязателен
+    psutil = None
+
+memprofile_logger = logging.getLogger("memprofile")
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Переменная окружения: путь к JSON-отчету; если задана, профилирование включается при импорте
+ENV_VARIABLE = "MEMPROFILE"
+# Как часто фоновый поток замеряет RSS, с
+SAMPLE_INTERVAL = 0.005
+MB = 1024 * 1024
+
+
+def read_rss() -> Optional[int]:
+    """Текущий RSS процесса в байтах (psutil или /proc/self/statm), None — если недоступен"""
+    if psutil is not None:
+        return int(psutil.Process().memory_info().rss)
+    try:
+        with open("/proc/self/statm", "r") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _Frame:
+    """Открытый этап: значения на входе и максимумы, накопленные за время этапа"""
+
+    def __init__(self, name: str, traced: int, rss: int) -> None:
+        self.name = name
+        self.start = time.perf_counter()
+        self.traced_start = traced
+        self.traced_peak = traced
+        self.rss_start = rss
+        self.rss_peak = rss
+
+
+class MemoryProfile:
+    """
+    Замер памяти по этапам обработки.
+
+    Для каждого этапа записываются:
+    - allocated — сколько байт, выделенных через Python (tracemalloc), осталось занято после этапа;
+    - peak — наибольший прирост выделенной памяти во время этапа;
+    - rss_peak — наибольший прирост RSS процесса (замеры фонового потока раз в sample_interval).
+
+    Этапы вкладываются: пик вложенного этапа входит в пик внешнего. Замеряются
+    только этапы потока, который начал профилирование; память других потоков
+    попадает в замеры, потому что tracemalloc и RSS общие для процесса.
+    """
+
+    def __init__(self, sample_interval: float = SAMPLE_INTERVAL) -> None:
+        self.sample_interval = sample_interval
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self._stack: List[_Frame] = []
+        self._thread = threading.get_ident()
+        self._started_tracemalloc = False
+        self._rss_max = 0
+        self._rss_available = read_rss() is not None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def start(self) -> "MemoryProfile":
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._rss_max = read_rss() or 0
+        if self._rss_available:
+            self._sampler = threading.Thread(target=self._sample, name="memprofile-rss", daemon=True)
+            self._sampler.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.sample_interval):
+            rss = read_rss() or 0
+            with self._lock:
+                self._rss_max = max(self._rss_max, rss)
+
+    def _rss_now(self) -> int:
+        rss = read_rss() or 0
+        with self._lock:
+            self._rss_max = max(self._rss_max, rss)
+        return rss
+
+    def records(self) -> bool:
+        """Замеряются ли этапы текущего потока"""
+        return threading.get_ident() == self._thread and not self._stop.is_set()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Этап с именем name; внутри другого этапа — «внешний/name», если name не полное имя функции"""
+        if self._stack and "." not in name:
+            name = f"{self._stack[-1].name}/{name}"
+        self._enter(name)
+        try:
+            yield
+        finally:
+            self._exit()
+
+    def _enter(self, name: str) -> None:
+        traced, traced_peak = tracemalloc.get_traced_memory()
+        rss = self._rss_now()
+        if self._stack:
+            # Пики до начала вложенного этапа остаются за внешним, счетчики пиков сбрасываются
+            parent = self._stack[-1]
+            parent.traced_peak = max(parent.traced_peak, traced_peak)
+            with self._lock:
+                parent.rss_peak = max(parent.rss_peak, self._rss_max)
+        tracemalloc.reset_peak()
+        with self._lock:
+            self._rss_max = rss
+        self._stack.append(_Frame(name, traced, rss))
+
+    def _exit(self) -> None:
+        frame = self._stack.pop()
+        traced, traced_peak = tracemalloc.get_traced_memory()
+        self._rss_now()
+        frame.traced_peak = max(frame.traced_peak, traced_peak)
+        with self._lock:
+            frame.rss_peak = max(frame.rss_peak, self._rss_max)
+        if self._stack:
+            parent = self._stack[-1]
+            parent.traced_peak = max(parent.traced_peak, frame.traced_peak)
+            parent.rss_peak = max(parent.rss_peak, frame.rss_peak)
+
+        stats = self.stages.setdefault(
+            frame.name, {"calls": 0, "seconds": 0.0, "allocated": 0, "peak": 0, "rss_peak": 0}
+        )
+        stats["calls"] += 1
+        stats["seconds"] += time.perf_counter() - frame.start
+        stats["allocated"] += traced - frame.traced_start
+        stats["peak"] = max(stats["peak"], frame.traced_peak - frame.traced_start)
+        stats["rss_peak"] = max(stats["rss_peak"], frame.rss_peak - frame.rss_start)
+
+    def report(self) -> Dict[str, Any]:
+        """Отчет: этапы в порядке первого входа, байты и секунды"""
+        return {
+            "rss_available": self._rss_available,
+            "stages": {
+                name: {**stats, "seconds": round(stats["seconds"], 6)} for name, stats in self.stages.items()
+            },
+        }
+
+
+_profile: Optional[MemoryProfile] = None
+
+
+def enable(sample_interval: float = SAMPLE_INTERVAL) -> MemoryProfile:
+    """Включает профилирование памяти для этапов, отмеченных stage и profiled"""
+    global _profile
+    if _profile is None:
+        _profile = MemoryProfile(sample_interval).start()
+    return _profile
+
+
+def disable() -> Optional[MemoryProfile]:
+    """Выключает профилирование и возвращает собранный профиль"""
+    global _profile
+    profile, _profile = _profile, None
+    if profile is not None:
+        profile.stop()
+    return profile
+
+
+@contextmanager
+def profiling(sample_interval: float = SAMPLE_INTERVAL) -> Iterator[MemoryProfile]:
+    """Профилирование на время блока with; профиль доступен и после выхода из блока"""
+    profile = enable(sample_interval)
+    try:
+        yield profile
+    finally:
+        disable()
+
+
+def stage(name: str) -> ContextManager[None]:
+    """Этап для замера; без включенного профилирования ничего не делает"""
+    profile = _profile
+    if profile is None or not profile.records():
+        return nullcontext()
+    return profile.stage(name)
+
+
+def profiled(func: F) -> F:
+    """Декоратор: вызов функции — этап «модуль.функция»"""
+    name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if _profile is None:
+            return func(*args, **kwargs)
+        with stage(name):
+            return func(*args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Таблица отчета для вывода в консоль, значения в МБ"""
+    lines = [f"{'Этап':<60} {'вызовов':>8} {'сек':>9} {'занято':>9} {'пик':>9} {'пик RSS':>9}"]
+    for name, stats in report["stages"].items():
+        rss = f"{stats['rss_peak'] / MB:9.1f}" if report["rss_available"] else f"{'—':>9}"
+        lines.append(
+            f"{name:<60} {stats['calls']:>8} {stats['seconds']:>9.3f} "
+            f"{stats['allocated'] / MB:>9.1f} {stats['peak'] / MB:>9.1f} {rss}"
+        )
+    return "\n".join(lines)
+
+
+def write_report(report: Dict[str, Any], path: str) -> None:
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    memprofile_logger.info(f"Отчет о памяти записан в {path}")
+
+
+def check_ceilings(report: Dict[str, Any], ceilings: Dict[str, float]) -> List[str]:
+    """
+    Сравнивает пики этапов с потолками (МБ) и возвращает список превышений.
+    Потолок задается для пика tracemalloc ("этап") или для пика RSS ("этап:rss").
+    Этап, которого нет в отчете, тоже считается нарушением — иначе потолок молча перестанет проверяться.
+    """
+    violations = []
+    for key, limit in ceilings.items():
+        name, _, metric = key.partition(":")
+        stats = report["stages"].get(name)
+        if stats is None:
+            violations.append(f"{name}: этап не найден в отчете")
+            continue
+        if metric == "rss" and not report["rss_available"]:
+            continue
+        value = stats["rss_peak" if metric == "rss" else "peak"] / MB
+        if value > limit:
+            violations.append(f"{key}: {value:.1f} МБ > {limit} МБ")
+    return violations
+
+
+def _write_on_exit(path: str) -> None:
+    profile = disable()
+    if profile is None:
+        return
+    report = profile.report()
+    write_report(report, path)
+    memprofile_logger.info("\n" + format_report(report))
+
+
+if os.getenv(ENV_VARIABLE):
+    enable()
+    atexit.register(_write_on_exit, os.environ[ENV_VARIABLE])
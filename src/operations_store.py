@@ -0,0 +1,372 @@
+import datetime
+import logging
+import os
+import sqlite3
+from contextlib import closing
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+from src.amounts import clean_amounts
+from src.cashback import CashbackRules, default_rules
+from src.chunks import DEFAULT_CHUNK_SIZE, iter_excel_chunks
+from src.outliers import OutlierDetector
+from src.reports import REPORT_COLUMNS, complete_category_report, report_period
+from src.utils_views import get_card, get_top_transactions
+
+operations_store_logger = logging.getLogger("operations_store")
+
+file_path_operations_db = os.path.join(os.path.dirname(__file__), "../data/operations.db")
+
+DATE_COLUMN = "Дата операции"
+AMOUNT_COLUMN = "Сумма операции"
+CARD_COLUMN = "Номер карты"
+CATEGORY_COLUMN = "Категория"
+ROUNDED_COLUMN = "Сумма операции с округлением"
+# Служебная колонка: «Сумма операции» числом (строковые суммы очищены clean_amounts)
+CLEAN_AMOUNT_COLUMN = "_amount"
+# Формат дат в выгрузке и в базе: текст ISO сравнивается и сортируется так же, как даты
+SOURCE_DATE_FORMAT = "%d.%m.%Y %H:%M:%S"
+SQL_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Сколько строк читается из базы за один шаг при потоковой обработке
+FETCH_SIZE = 10_000
+
+_INDEXES = (
+    'CREATE INDEX operations_date ON operations ("Дата операции")',
+    'CREATE INDEX operations_category_date ON operations ("Категория", "Дата операции")',
+    'CREATE INDEX operations_card_date ON operations ("Номер карты", "Дата операции")',
+)
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sql_date(value: str) -> str:
+    """Дата периода в формате get_date_period («дд.мм.гггг чч:мм:сс») → текст ISO"""
+    return datetime.datetime.strptime(value, SOURCE_DATE_FORMAT).strftime(SQL_DATE_FORMAT)
+
+
+def _common_dtype(current: Optional[np.dtype], new: np.dtype) -> np.dtype:
+    """Тип колонки, в который помещаются значения всех порций (как у таблицы, прочитанной целиком)"""
+    if current is None or current == new:
+        return new
+    numeric = (current.kind in "iuf") and (new.kind in "iuf")
+    return np.result_type(current, new) if numeric else np.dtype(object)
+
+
+class OperationsStore:
+    """
+    Таблица операций в SQLite вместо DataFrame в памяти.
+
+    Операции загружаются порциями, в базе создаются индексы по дате операции,
+    по (категории, дате) и по (карте, дате). Выборка периода, суммы по картам,
+    топ операций, расходы категории за окно и суммы «Инвесткопилки» по месяцам
+    считаются запросами SQL, а в Python попадают только строки результата
+    (или одна колонка расходов, читаемая порциями).
+
+    Результаты совпадают с расчетом через pandas (get_period, get_card,
+    get_top_transactions, category_spending, investment_bank): строки в том же
+    порядке, индекс — номер строки в выгрузке, типы колонок — как у таблицы,
+    прочитанной целиком. Там, где результат зависит от порядка сложения чисел
+    с плавающей точкой, база только отбирает строки, а арифметика выполняется
+    теми же функциями, что и в расчете через pandas.
+    """
+
+    def __init__(self, db_path: str = file_path_operations_db) -> None:
+        self.db_path = db_path
+        with closing(self._connect()) as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS operations_columns "
+                "(position INTEGER NOT NULL, name TEXT PRIMARY KEY, dtype TEXT NOT NULL)"
+            )
+            rows = connection.execute("SELECT name, dtype FROM operations_columns ORDER BY position").fetchall()
+        self._dtypes: Dict[str, np.dtype] = {name: pd.api.types.pandas_dtype(dtype) for name, dtype in rows}
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path)
+
+    @property
+    def columns(self) -> List[str]:
+        """Колонки выгрузки в исходном порядке"""
+        return [name for name in self._dtypes if name != CLEAN_AMOUNT_COLUMN]
+
+    # Загрузка
+
+    @staticmethod
+    def _prepare(frame: pd.DataFrame) -> pd.DataFrame:
+        """Порция с датой операции в datetime и служебной колонкой сумм числом"""
+        dates = frame[DATE_COLUMN]
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            dates = pd.to_datetime(dates, format=SOURCE_DATE_FORMAT, errors="coerce")
+        amounts = frame[AMOUNT_COLUMN]
+        if not pd.api.types.is_numeric_dtype(amounts):
+            amounts, _ = clean_amounts(amounts)
+        return frame.assign(**{DATE_COLUMN: dates, CLEAN_AMOUNT_COLUMN: amounts})
+
+    @staticmethod
+    def _values(series: pd.Series) -> List[Any]:
+        """Значения колонки для SQLite: даты — текст ISO, пропуски — NULL"""
+        if pd.api.types.is_datetime64_any_dtype(series):
+            series = series.dt.strftime(SQL_DATE_FORMAT)
+        values: List[Any] = series.astype(object).where(series.notna(), None).tolist()
+        return values
+
+    def load(self, frames: Iterable[pd.DataFrame]) -> int:
+        """
+        Загружает операции (заменяя прежние) из последовательности порций:
+        в памяти одновременно находится одна порция. Строки нумеруются подряд
+        через все порции, номер строки становится индексом выборок.
+
+        Returns:
+            Число загруженных операций
+        """
+        dtypes: Dict[str, np.dtype] = {}
+        count = 0
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DROP TABLE IF EXISTS operations")
+            for frame in frames:
+                frame = self._prepare(frame)
+                if not dtypes:
+                    definitions = ", ".join(_quote(name) for name in frame.columns)
+                    connection.execute(f"CREATE TABLE operations (id INTEGER PRIMARY KEY, {definitions})")
+                    columns = list(frame.columns)
+                    placeholders = ", ".join("?" * (len(columns) + 1))
+                    insert = f"INSERT INTO operations VALUES ({placeholders})"
+                for name in columns:
+                    dtypes[name] = _common_dtype(dtypes.get(name), frame[name].dtype)
+                values = [self._values(frame[name]) for name in columns]
+                connection.executemany(insert, zip(range(count, count + len(frame)), *values))
+                count += len(frame)
+            if not dtypes:
+                raise ValueError("Нет операций для загрузки")
+
+            for statement in _INDEXES:
+                connection.execute(statement)
+            connection.execute("DELETE FROM operations_columns")
+            connection.executemany(
+                "INSERT INTO operations_columns VALUES (?, ?, ?)",
+                [(position, name, str(dtype)) for position, (name, dtype) in enumerate(dtypes.items())],
+            )
+            connection.execute("ANALYZE")
+        self._dtypes = dtypes
+        operations_store_logger.info(f"В {self.db_path} загружено операций: {count}")
+        return count
+
+    def load_excel(self, path_file: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """Загружает лист «Отчет по операциям» порциями, не читая файл целиком"""
+        return self.load(iter_excel_chunks(path_file, chunk_size=chunk_size))
+
+    # Чтение
+
+    def _frame(
+        self, rows: List[tuple], columns: Sequence[str], sources: Optional[Sequence[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Строки запроса (id и колонки) → таблица с индексом id и типами колонок выгрузки.
+        sources — из каких колонок базы взяты значения (по умолчанию — одноименных).
+        """
+        frame = pd.DataFrame.from_records(rows, columns=["id", *columns])
+        result = pd.DataFrame(index=pd.Index(frame["id"].astype(np.int64).to_numpy()))
+        for name, source in zip(columns, sources or columns):
+            values = frame[name].set_axis(result.index)
+            dtype = self._dtypes[source]
+            if pd.api.types.is_datetime64_any_dtype(dtype):
+                result[name] = pd.to_datetime(values, format=SQL_DATE_FORMAT).astype(dtype)
+            elif dtype == object:
+                result[name] = values.astype(object).where(values.notna(), np.nan)
+            else:
+                result[name] = values.astype(dtype)
+        return result
+
+    def _select(
+        self, columns: Sequence[str], where: str, params: Sequence[Any], order: str = "id", limit: Optional[int] = None
+    ) -> pd.DataFrame:
+        selected = ", ".join(_quote(name) for name in columns)
+        sql = f"SELECT id, {selected} FROM operations WHERE {where} ORDER BY {order}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        with closing(self._connect()) as connection:
+            rows = connection.execute(sql, params).fetchall()
+        return self._frame(rows, columns)
+
+    def explain(self, sql: str, params: Sequence[Any] = ()) -> List[str]:
+        """План выполнения запроса (EXPLAIN QUERY PLAN) — для проверки, что используются индексы"""
+        with closing(self._connect()) as connection:
+            rows = connection.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        return [row[-1] for row in rows]
+
+    # Запросы страницы «Главная»
+
+    def get_period(self, period_date: list) -> pd.DataFrame:
+        """Операции в периоде [начало, конец] по возрастанию даты, как get_path_and_period"""
+        return self._select(
+            self.columns,
+            f"{_quote(DATE_COLUMN)} BETWEEN ? AND ?",
+            [_sql_date(period_date[0]), _sql_date(period_date[1])],
+            order=f"{_quote(DATE_COLUMN)}, id",
+        )
+
+    def get_card(self, period_date: list, rules: Optional[CashbackRules] = None) -> list[dict]:
+        """
+        Суммы по картам за период, как get_card для выборки периода.
+
+        Суммы операций и порядок карт (по первой операции периода) считаются
+        группировкой по (карте, MCC). Процент кэшбэка правил, зависящих только
+        от MCC, применяется к суммам групп: произведения целых сумм на проценты,
+        кратные 0,25, точны, поэтому результат не зависит от порядка сложения.
+        Для акций (категория, карта, даты) и других процентов база отдает
+        нужные колонки периода, а расчет выполняет get_card.
+        """
+        rules = rules or default_rules()
+        start, end = _sql_date(period_date[0]), _sql_date(period_date[1])
+        percents = [rule.percent for rule in rules.rules] + [rules.default_percent]
+        if any(rule.is_promo for rule in rules.rules) or not all((percent * 4).is_integer() for percent in percents):
+            frame = self._select(
+                [CARD_COLUMN, ROUNDED_COLUMN, "MCC", CATEGORY_COLUMN, DATE_COLUMN],
+                f"{_quote(DATE_COLUMN)} BETWEEN ? AND ?",
+                [start, end],
+                order=f"{_quote(DATE_COLUMN)}, id",
+            )
+            return get_card(frame, rules)
+
+        with closing(self._connect()) as connection:
+            groups = connection.execute(
+                f"SELECT {_quote(CARD_COLUMN)}, MCC, SUM(CAST({_quote(ROUNDED_COLUMN)} AS INTEGER)), "
+                f"MIN({_quote(DATE_COLUMN)} || printf('%012d', id)) "
+                f"FROM operations WHERE {_quote(DATE_COLUMN)} BETWEEN ? AND ? GROUP BY {_quote(CARD_COLUMN)}, MCC",
+                (start, end),
+            ).fetchall()
+        if not groups:
+            return []
+        mcc_percent, _ = rules.percents(pd.DataFrame({"MCC": [group[1] for group in groups]}, dtype=object))
+
+        cards: Dict[Any, list] = {}
+        for (card, _, total, first), percent in zip(groups, mcc_percent.tolist()):
+            summary = cards.setdefault(card, [first, 0, 0.0])
+            summary[0] = min(summary[0], first)
+            summary[1] += total or 0
+            summary[2] += (total or 0) * percent
+        unique_cards = []
+        for card, (_, total_spent, cashback) in sorted(cards.items(), key=lambda item: item[1][0]):
+            unique_cards.append(
+                {
+                    "last_digits": (str(card) if card is not None else "nan").replace("*", ""),
+                    "total_spent": int(total_spent),
+                    "cashback": round(float(cashback) / 100, 2),
+                }
+            )
+        return unique_cards
+
+    def get_top_transactions(self, period_date: list, get_top: int) -> list[dict]:
+        """Топ операций периода по сумме с округлением, как get_top_transactions (при равных — раньше по дате)"""
+        top = self._select(
+            ["Дата платежа", "Описание", CATEGORY_COLUMN, ROUNDED_COLUMN],
+            f"{_quote(DATE_COLUMN)} BETWEEN ? AND ?",
+            [_sql_date(period_date[0]), _sql_date(period_date[1])],
+            order=f"{_quote(ROUNDED_COLUMN)} DESC, {_quote(DATE_COLUMN)}, id",
+            limit=get_top,
+        )
+        top_pay: list[dict] = get_top_transactions(top, get_top)
+        return top_pay
+
+    # Отчеты
+
+    def flag_outliers(self, detector: Optional[OutlierDetector] = None) -> Dict[Hashable, Dict[str, Any]]:
+        """
+        Аномально крупные расходы всей истории, как flag_outliers: расходы читаются
+        порциями в порядке даты (операции без даты — в конце)
+        """
+        detector = detector or OutlierDetector()
+        flags = {}
+        with closing(self._connect()) as connection:
+            cursor = connection.execute(
+                f"SELECT id, -{CLEAN_AMOUNT_COLUMN}, {_quote(CATEGORY_COLUMN)}, {_quote(CARD_COLUMN)} "
+                f"FROM operations WHERE {CLEAN_AMOUNT_COLUMN} < 0 "
+                f"ORDER BY {_quote(DATE_COLUMN)} IS NULL, {_quote(DATE_COLUMN)}, id"
+            )
+            while rows := cursor.fetchmany(FETCH_SIZE):
+                for index, expense, category, card in rows:
+                    flag = detector.check(float(expense), category, card)
+                    if flag is not None:
+                        flags[index] = flag
+        return flags
+
+    def category_spending(
+        self,
+        category: str,
+        start: datetime.date,
+        end: datetime.date,
+        outliers: Optional[Dict[Hashable, Any]] = None,
+        rules: Optional[CashbackRules] = None,
+    ) -> pd.DataFrame:
+        """
+        Расходы по категории за период [start, end] (дни целиком), как category_spending:
+        выборка идет по индексу (категория, дата). outliers — аномалии flag_outliers, посчитанные
+        один раз после загрузки; без них они ищутся по всей истории (flag_outliers хранилища).
+        """
+        sources = [CLEAN_AMOUNT_COLUMN if name == AMOUNT_COLUMN else name for name in REPORT_COLUMNS]
+        sql = (
+            f"SELECT id, {', '.join(_quote(name) for name in [*sources, DATE_COLUMN])} FROM operations "
+            f"WHERE {_quote(CATEGORY_COLUMN)} = ? AND {_quote(DATE_COLUMN)} >= ? AND {_quote(DATE_COLUMN)} < ? "
+            f"AND {CLEAN_AMOUNT_COLUMN} < 0 ORDER BY id"
+        )
+        params = (category, f"{start:%Y-%m-%d}", f"{end + datetime.timedelta(days=1):%Y-%m-%d}")
+        with closing(self._connect()) as connection:
+            rows = connection.execute(sql, params).fetchall()
+        resulted = self._frame(rows, [*REPORT_COLUMNS, DATE_COLUMN], [*sources, DATE_COLUMN])
+        if outliers is None:
+            outliers = self.flag_outliers()
+        return complete_category_report(resulted, outliers, rules)
+
+    def spending_by_category(
+        self,
+        category: str,
+        date: Optional[str] = None,
+        outliers: Optional[Dict[Hashable, Any]] = None,
+        rules: Optional[CashbackRules] = None,
+    ) -> pd.DataFrame:
+        """Расходы по категории за 3 месяца до даты date (по умолчанию — сегодня), как spending_by_category"""
+        start, end = report_period(date)
+        return self.category_spending(category, start, end, outliers, rules)
+
+    def round_ups(self, limit: int, month: Optional[str] = None) -> Dict[str, float]:
+        """
+        Суммы для копилки по месяцам, как stream_round_ups (и investment_bank для одного месяца).
+        Выборка месяца идет по индексу даты, расходы читаются порциями в порядке выгрузки
+        и прибавляются к суммам месяцев по одному (np.add.at), поэтому порядок сложения тот же.
+        """
+        where, params = f"{_quote(DATE_COLUMN)} IS NOT NULL", []
+        if month is not None:
+            start = datetime.datetime.strptime(month, "%Y-%m")
+            where = f"{_quote(DATE_COLUMN)} >= ? AND {_quote(DATE_COLUMN)} < ?"
+            params = [f"{start:%Y-%m-%d}", f"{start + relativedelta(months=1):%Y-%m-%d}"]
+
+        with closing(self._connect()) as connection:
+            if month is not None:
+                months = [month]
+            else:
+                months = [
+                    row[0]
+                    for row in connection.execute(
+                        f"SELECT DISTINCT substr({_quote(DATE_COLUMN)}, 1, 7) FROM operations WHERE {where} ORDER BY 1"
+                    )
+                ]
+            codes = {key: code for code, key in enumerate(months)}
+            totals = np.zeros(len(months))
+            cursor = connection.execute(
+                f"SELECT substr({_quote(DATE_COLUMN)}, 1, 7), -{CLEAN_AMOUNT_COLUMN} FROM operations "
+                f"WHERE {where} AND {CLEAN_AMOUNT_COLUMN} < 0 ORDER BY id",
+                params,
+            )
+            while rows := cursor.fetchmany(FETCH_SIZE):
+                expenses = np.array([row[1] for row in rows], dtype=float)
+                finite = np.isfinite(expenses)
+                month_codes = np.array([codes[row[0]] for row in rows], dtype=np.intp)[finite]
+                expenses = expenses[finite]
+                # Округление как в round_amount
+                differences = np.round(((expenses + limit - 1) // limit) * limit - expenses, 2)
+                np.add.at(totals, month_codes, differences)
+        return {key: round(float(total), 2) for key, total in zip(months, totals.tolist())}
@@ -0,0 +1,181 @@
+import logging
+import math
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.amounts import clean_amounts
+
+outliers_logger = logging.getLogger("outliers")
+
+OUTLIER_COLUMN = "Аномалия"
+Z_THRESHOLD = 3.0
+QUANTILE = 0.99
+# Сколько расходов в группе нужно, прежде чем в ней начнут отмечаться аномалии
+MIN_COUNT = 20
+
+
+class RunningStats:
+    """Среднее и дисперсия за один проход (алгоритм Уэлфорда)"""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def zscore(self, value: float) -> float:
+        std = self.std
+        return (value - self.mean) / std if std > 0 else 0.0
+
+
+class P2Quantile:
+    """
+    Приближенный квантиль за один проход без хранения значений (алгоритм P² Джейна и Хламтача):
+    пять маркеров, средний из которых сходится к квантилю p.
+    """
+
+    def __init__(self, p: float = QUANTILE) -> None:
+        self.p = p
+        self._heights: List[float] = []
+        self._positions = [0, 1, 2, 3, 4]
+        self._desired = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]
+        self._increments = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def update(self, value: float) -> None:
+        heights = self._heights
+        if len(heights) < 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = next(i for i in range(4) if value < heights[i + 1])
+
+        positions = self._positions
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        # Сдвигаем средние маркеры к желаемым позициям
+        for i in range(1, 4):
+            offset = self._desired[i] - positions[i]
+            if (offset >= 1 and positions[i + 1] - positions[i] > 1) or (
+                offset <= -1 and positions[i - 1] - positions[i] < -1
+            ):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    slope = (heights[i + step] - heights[i]) / (positions[i + step] - positions[i])
+                    height = heights[i] + step * slope
+                heights[i] = height
+                positions[i] += step
+
+    def _parabolic(self, i: int, step: int) -> float:
+        q, n = self._heights, self._positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    @property
+    def value(self) -> float:
+        if not self._heights:
+            return math.nan
+        if len(self._heights) < 5:
+            return float(np.quantile(self._heights, self.p))
+        return self._heights[2]
+
+
+class OutlierDetector:
+    """
+    Отмечает необычно крупные расходы по статистике своей категории и своей карты.
+
+    Для каждой группы хранятся только счетчики: среднее и дисперсия (Уэлфорд)
+    и приближенный квантиль (P²). Операция сравнивается со статистикой
+    предыдущих операций группы и только потом добавляется в нее, поэтому
+    отметки ставятся за один проход в момент поступления операции.
+    Аномалия — расход выше квантиля quantile и с z-оценкой больше z_threshold
+    хотя бы в одной из групп, где накопилось не меньше min_count расходов.
+    """
+
+    def __init__(
+        self, z_threshold: float = Z_THRESHOLD, quantile: float = QUANTILE, min_count: int = MIN_COUNT
+    ) -> None:
+        self.z_threshold = z_threshold
+        self.quantile = quantile
+        self.min_count = min_count
+        self._groups: Dict[Tuple[str, Hashable], Tuple[RunningStats, P2Quantile]] = {}
+
+    def check(self, expense: float, category: Any = None, card: Any = None) -> Optional[Dict[str, Any]]:
+        """
+        Проверяет расход (положительное число) и добавляет его в статистику групп.
+
+        Returns:
+            None или описание аномалии: группа ("category"/"card"), z-оценка и квантиль группы
+        """
+        flag: Optional[Dict[str, Any]] = None
+        for scope, key in (("category", category), ("card", card)):
+            if key is None or (isinstance(key, float) and math.isnan(key)):
+                continue
+            stats, quantile = self._groups.setdefault((scope, key), (RunningStats(), P2Quantile(self.quantile)))
+            if stats.count >= self.min_count:
+                zscore = stats.zscore(expense)
+                if zscore > self.z_threshold and expense > quantile.value:
+                    if flag is None or zscore > flag["z_score"]:
+                        flag = {"scope": scope, "z_score": round(zscore, 1), "quantile": round(quantile.value, 2)}
+            stats.update(expense)
+            quantile.update(expense)
+        return flag
+
+
+def flag_outliers(
+    operations: pd.DataFrame, detector: Optional[OutlierDetector] = None
+) -> Dict[Hashable, Dict[str, Any]]:
+    """
+    Проходит по расходам таблицы в порядке времени и отмечает аномалии.
+
+    Args:
+        operations: Таблица с колонками «Дата операции» (datetime), «Сумма операции»,
+            «Категория», «Номер карты»
+        detector: Детектор с уже накопленной статистикой (по умолчанию — новый)
+
+    Returns:
+        Словарь {индекс строки: описание аномалии} для отмеченных операций
+    """
+    detector = detector or OutlierDetector()
+    amounts = operations["Сумма операции"]
+    if not pd.api.types.is_numeric_dtype(amounts):
+        amounts, _ = clean_amounts(amounts)
+    expenses = operations.assign(**{"Сумма операции": amounts})[amounts < 0]
+    expenses = expenses.sort_values("Дата операции", kind="stable")
+    flags = {}
+    rows = zip(
+        expenses.index,
+        (-expenses["Сумма операции"].astype(float)).tolist(),
+        expenses["Категория"].tolist(),
+        expenses["Номер карты"].tolist(),
+    )
+    for index, expense, category, card in rows:
+        flag = detector.check(expense, category, card)
+        if flag is not None:
+            flags[index] = flag
+    outliers_logger.info(f"Аномалий: {len(flags)} из {len(expenses)} расходов")
+    return flags
@@ -0,0 +1,322 @@
+import datetime
+import logging
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.indexes import OperationsIndex
+
+query_logger = logging.getLogger("query")
+
+DateLike = Union[str, datetime.date, datetime.datetime, pd.Timestamp]
+
+DATE_COLUMN = "Дата операции"
+AMOUNT_COLUMN = "Сумма операции"
+
+
+class OperationsQuery:
+    """
+    Ленивый запрос к таблице операций.
+
+    Методы только накапливают условия и возвращают новый запрос, вычисление
+    выполняется в collect(): диапазон дат по возможности сужается бинарным
+    поиском по отсортированной колонке или индексу, остальные условия
+    объединяются в одну булеву маску, и строки с нужными колонками
+    выбираются из исходной таблицы за одно копирование.
+
+    Если передан OperationsIndex или набор строк через rows(), условия
+    равенства по индексированным колонкам и диапазон дат берутся из
+    индекса, а остальные условия проверяются только на найденных строках.
+    """
+
+    def __init__(self, df: pd.DataFrame, index: Optional[OperationsIndex] = None) -> None:
+        self._df = df
+        self._index = index if index is not None and index.size == len(df) else None
+        self._date_range: Optional[Tuple[str, Optional[pd.Timestamp], Optional[pd.Timestamp], bool]] = None
+        self._predicates: List[Tuple[str, str, Any]] = []
+        self._derived: List[Tuple[str, Callable[[pd.DataFrame], Any]]] = []
+        self._columns: Optional[List[str]] = None
+        self._order: Optional[Tuple[str, bool]] = None
+        self._limit: Optional[int] = None
+        self._rows: Optional[np.ndarray] = None
+
+    def _clone(self) -> "OperationsQuery":
+        clone = OperationsQuery(self._df, self._index)
+        clone._date_range = self._date_range
+        clone._predicates = list(self._predicates)
+        clone._derived = list(self._derived)
+        clone._columns = self._columns
+        clone._order = self._order
+        clone._limit = self._limit
+        clone._rows = self._rows
+        return clone
+
+    # Фильтры
+
+    def between(
+        self,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+        column: str = DATE_COLUMN,
+        whole_days: bool = False,
+    ) -> "OperationsQuery":
+        """
+        Операции в диапазоне дат [start, end] включительно.
+        При whole_days=True сравниваются только даты (конечный день входит целиком).
+        """
+        clone = self._clone()
+        start_ts = pd.Timestamp(start) if start is not None else None
+        end_ts = pd.Timestamp(end) if end is not None else None
+        if whole_days:
+            # Конец диапазона — начало следующего дня, не включительно
+            start_ts = start_ts.normalize() if start_ts is not None else None
+            end_ts = end_ts.normalize() + datetime.timedelta(days=1) if end_ts is not None else None
+        clone._date_range = (column, start_ts, end_ts, not whole_days)
+        return clone
+
+    def where(self, column: str, op: str, value: Any) -> "OperationsQuery":
+        """Произвольное условие: op — одно из ==, !=, <, <=, >, >=, in, notna"""
+        clone = self._clone()
+        clone._predicates.append((column, op, value))
+        return clone
+
+    def card(self, card_number: str) -> "OperationsQuery":
+        return self.where("Номер карты", "==", card_number)
+
+    def category(self, category: str) -> "OperationsQuery":
+        return self.where("Категория", "==", category)
+
+    def mcc(self, mcc: Any) -> "OperationsQuery":
+        return self.where("MCC", "==", mcc)
+
+    def status(self, status: str) -> "OperationsQuery":
+        return self.where("Статус", "==", status)
+
+    def expenses(self, column: str = AMOUNT_COLUMN) -> "OperationsQuery":
+        """Только расходы (отрицательные суммы)"""
+        return self.where(column, "<", 0)
+
+    def income(self, column: str = AMOUNT_COLUMN) -> "OperationsQuery":
+        """Только поступления (положительные суммы)"""
+        return self.where(column, ">", 0)
+
+    def rows(self, positions: np.ndarray) -> "OperationsQuery":
+        """Ограничивает запрос заданными номерами строк (например, найденными полнотекстовым поиском)"""
+        clone = self._clone()
+        rows = np.unique(np.asarray(positions, dtype=np.intp))
+        clone._rows = rows if clone._rows is None else np.intersect1d(clone._rows, rows, assume_unique=True)
+        return clone
+
+    # Проекция, сортировка, вычисляемые колонки
+
+    def select(self, columns: Sequence[str]) -> "OperationsQuery":
+        clone = self._clone()
+        clone._columns = list(columns)
+        return clone
+
+    def derive(self, name: str, func: Callable[[pd.DataFrame], Any]) -> "OperationsQuery":
+        """Добавляет вычисляемую колонку; func получает уже отфильтрованную таблицу"""
+        clone = self._clone()
+        clone._derived.append((name, func))
+        return clone
+
+    def order_by(self, column: str, ascending: bool = True) -> "OperationsQuery":
+        """Устойчивая сортировка: строки с равными значениями остаются в порядке таблицы"""
+        clone = self._clone()
+        clone._order = (column, ascending)
+        return clone
+
+    def limit(self, count: int) -> "OperationsQuery":
+        clone = self._clone()
+        clone._limit = count
+        return clone
+
+    def top_k(self, column: str, k: int) -> "OperationsQuery":
+        """k операций с наибольшим значением column"""
+        return self.order_by(column, ascending=False).limit(k)
+
+    # Выполнение
+
+    def _date_bounds(self) -> Tuple[int, int, Optional[np.ndarray]]:
+        """
+        Возвращает границы отрезка строк [lo, hi) и маску по датам.
+        Если колонка дат (или индекс) отсортирована, маска не нужна.
+        """
+        n = len(self._df)
+        if self._date_range is None:
+            return 0, n, None
+
+        column, start, end, end_inclusive = self._date_range
+        index = self._df.index
+        if isinstance(index, pd.DatetimeIndex) and index.name == column and index.is_monotonic_increasing:
+            values = index
+        else:
+            values = self._df[column]
+            if not values.is_monotonic_increasing or values.hasnans:
+                series = values
+                mask = np.ones(n, dtype=bool)
+                if start is not None:
+                    mask &= (series >= start).to_numpy()
+                if end is not None:
+                    mask &= (series <= end if end_inclusive else series < end).to_numpy()
+                return 0, n, mask
+
+        lo = int(values.searchsorted(start, side="left")) if start is not None else 0
+        hi = int(values.searchsorted(end, side="right" if end_inclusive else "left")) if end is not None else n
+        query_logger.debug(f"Диапазон дат сужен по сортировке до строк [{lo}, {hi})")
+        return lo, max(lo, hi), None
+
+    @staticmethod
+    def _evaluate(values: np.ndarray, op: str, value: Any) -> np.ndarray:
+        if op == "==":
+            return np.asarray(values == value, dtype=bool)
+        if op == "!=":
+            return np.asarray(values != value, dtype=bool)
+        if op == "<":
+            return np.asarray(values < value, dtype=bool)
+        if op == "<=":
+            return np.asarray(values <= value, dtype=bool)
+        if op == ">":
+            return np.asarray(values > value, dtype=bool)
+        if op == ">=":
+            return np.asarray(values >= value, dtype=bool)
+        if op == "in":
+            return np.asarray(pd.Series(values).isin(list(value)).to_numpy(), dtype=bool)
+        if op == "notna":
+            return np.asarray(pd.notna(values), dtype=bool)
+        raise ValueError(f"Неизвестная операция сравнения: {op}")
+
+    def _indexed_positions(self) -> Optional[np.ndarray]:
+        """
+        Выборка по спискам строк: из заданных через rows() строк, из индекса
+        (по условию равенства или по диапазону дат) берется самый короткий
+        список, остальные условия проверяются только на этих строках.
+        None — ни одного списка строк нет.
+        """
+        index = self._index
+        # (условие, которое список уже учитывает; строки; учтен ли диапазон дат)
+        candidates: List[Tuple[Optional[Tuple[str, str, Any]], np.ndarray, bool]] = []
+        if self._rows is not None:
+            candidates.append((None, self._rows, False))
+        if index is not None:
+            for predicate in self._predicates:
+                if predicate[1] == "==" and index.has(predicate[0]):
+                    candidates.append((predicate, index.lookup(predicate[0], predicate[2]), False))
+            if (
+                not candidates
+                and self._date_range is not None
+                and index.date_order is not None
+                and self._date_range[0] == index.date_column
+            ):
+                _, start, end, end_inclusive = self._date_range
+                candidates.append((None, index.date_range(start, end, end_inclusive), True))
+        if not candidates:
+            return None
+
+        used, rows, date_done = min(candidates, key=lambda candidate: len(candidate[1]))
+        if self._rows is not None and rows is not self._rows:
+            rows = np.intersect1d(rows, self._rows, assume_unique=True)
+        query_logger.debug(f"Выборка по спискам строк: {len(rows)} кандидатов из {len(self._df)}")
+
+        mask = np.ones(len(rows), dtype=bool)
+        if not date_done and self._date_range is not None:
+            column, start, end, end_inclusive = self._date_range
+            dates = pd.Series(self._df[column].to_numpy()[rows])
+            if start is not None:
+                mask &= (dates >= start).to_numpy()
+            if end is not None:
+                mask &= (dates <= end if end_inclusive else dates < end).to_numpy()
+
+        for predicate in self._predicates:
+            if predicate is used or not mask.any():
+                continue
+            column, op, value = predicate
+            selected = np.flatnonzero(mask)
+            mask[selected] = self._evaluate(self._df[column].to_numpy()[rows[selected]], op, value)
+
+        return rows[mask]
+
+    def positions(self) -> np.ndarray:
+        """Номера строк (позиции) исходной таблицы, удовлетворяющих всем условиям"""
+        indexed = self._indexed_positions()
+        if indexed is not None:
+            return indexed
+
+        lo, hi, mask = self._date_bounds()
+        if mask is None:
+            mask = np.ones(hi - lo, dtype=bool)
+        else:
+            mask = mask[lo:hi]
+
+        for column, op, value in self._predicates:
+            if not mask.any():
+                break
+            column_values = self._df[column].to_numpy()[lo:hi]
+            # Сравниваем только строки, прошедшие предыдущие условия
+            selected = np.flatnonzero(mask)
+            mask[selected] = self._evaluate(column_values[selected], op, value)
+
+        return lo + np.flatnonzero(mask)
+
+    def collect(self) -> pd.DataFrame:
+        """
+        Выполняет запрос и возвращает новую таблицу: выбранные колонки
+        (по умолчанию все) и вычисляемые колонки в порядке добавления
+        """
+        positions = self.positions()
+        columns = self._columns if self._columns is not None else list(self._df.columns)
+        order_in_source = self._order is not None and self._order[0] in self._df.columns
+
+        if order_in_source and self._order is not None:
+            column, ascending = self._order
+            order_values = pd.Series(self._df[column].to_numpy()[positions])
+            ordered = order_values.sort_values(ascending=ascending, kind="stable")
+            if self._limit is not None:
+                ordered = ordered.head(self._limit)
+            positions = positions[ordered.index.to_numpy()]
+        elif self._order is None and self._limit is not None:
+            positions = positions[: self._limit]
+
+        column_positions = self._df.columns.get_indexer(columns)
+        if (column_positions < 0).any():
+            missing = [c for c, i in zip(columns, column_positions) if i < 0]
+            raise KeyError(f"Нет колонок: {missing}")
+        # Берем только нужные строки каждой нужной колонки: df.iloc[rows, cols] сначала копирует колонки целиком
+        result = pd.DataFrame(
+            {column: self._df[column].array.take(positions) for column in columns},
+            index=self._df.index.take(positions),
+        )
+
+        for name, func in self._derived:
+            result[name] = func(result)
+
+        if self._order is not None and not order_in_source:
+            column, ascending = self._order
+            result = result.sort_values(by=column, ascending=ascending, kind="stable")
+            if self._limit is not None:
+                result = result.head(self._limit)
+
+        return result
+
+    def group_by(self, column: str) -> "GroupedQuery":
+        return GroupedQuery(self, column)
+
+
+class GroupedQuery:
+    """Группировка результата запроса с агрегатами в порядке первого появления ключа"""
+
+    def __init__(self, query: OperationsQuery, column: str) -> None:
+        self._query = query
+        self._column = column
+
+    def aggregate(self, **aggregations: Tuple[str, Union[str, Callable]]) -> pd.DataFrame:
+        """
+        Пример: group_by("Категория").aggregate(total=("Сумма операции", "sum"))
+        """
+        frame = self._query.collect()
+        if frame.empty:
+            return pd.DataFrame(columns=[self._column, *aggregations])
+        grouped = frame.groupby(self._column, sort=False, dropna=False)
+        result: pd.DataFrame = grouped.agg(**aggregations).reset_index()
+        return result
@@ -0,0 +1,105 @@
+import argparse
+import logging
+import os
+import socket
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import pandas as pd
+
+from src.serializers import dataframe_records, dumps
+
+replay_logger = logging.getLogger("replay")
+
+file_path_operations = os.path.join(os.path.dirname(__file__), "../data/operations.xlsx")
+DATE_FORMAT = "%d.%m.%Y %H:%M:%S"
+
+
+def operations_in_time_order(path_file: str = file_path_operations) -> Iterator[Dict[str, Any]]:
+    """Операции из выгрузки в порядке времени (в файле они идут от новых к старым)"""
+    df = pd.read_excel(path_file, sheet_name="Отчет по операциям")
+    moments = pd.to_datetime(df["Дата операции"], format=DATE_FORMAT, errors="coerce")
+    order = moments.sort_values(kind="stable").index
+    return dataframe_records(df.loc[order])
+
+
+def replay(
+    events: Iterator[Dict[str, Any]],
+    emit: Callable[[Dict[str, Any]], None],
+    speed: float = 3600.0,
+    max_sleep: float = 1.0,
+    sleep: Callable[[float], None] = time.sleep,
+) -> int:
+    """
+    Передает операции в emit с сохранением интервалов между ними, ускоренных в speed раз.
+    Паузы длиннее max_sleep секунд (ночи, выходные) сокращаются до max_sleep.
+    speed=0 — без пауз.
+
+    Returns:
+        Число переданных операций
+    """
+    previous: Optional[datetime] = None
+    count = 0
+    for event in events:
+        try:
+            moment: Optional[datetime] = datetime.strptime(event["Дата операции"], DATE_FORMAT)
+        except (KeyError, TypeError, ValueError):
+            moment = None
+        if speed > 0 and moment is not None and previous is not None and moment > previous:
+            sleep(min((moment - previous).total_seconds() / speed, max_sleep))
+        previous = moment or previous
+        emit(event)
+        count += 1
+    replay_logger.info(f"Передано операций: {count}")
+    return count
+
+
+class JsonlWriter:
+    """Дописывает операции в JSONL-файл, сбрасывая буфер после каждой строки (для tail_jsonl)"""
+
+    def __init__(self, path: str) -> None:
+        self.file = open(path, "a", encoding="utf-8")
+
+    def __call__(self, event: Dict[str, Any]) -> None:
+        self.file.write(dumps(event) + "\n")
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class SocketWriter:
+    """Отправляет операции построчно по TCP (для socket_events)"""
+
+    def __init__(self, host: str, port: int) -> None:
+        self.connection = socket.create_connection((host, port))
+
+    def __call__(self, event: Dict[str, Any]) -> None:
+        self.connection.sendall((dumps(event) + "\n").encode("utf-8"))
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Воспроизведение data/operations.xlsx как потока операций")
+    parser.add_argument("--input", default=file_path_operations, help="Выгрузка операций xlsx")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--output", help="JSONL-файл, в который дописываются операции")
+    target.add_argument("--port", type=int, help="TCP-порт приемника (python -m src.live --port)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--speed", type=float, default=3600.0, help="Ускорение времени (0 — без пауз)")
+    parser.add_argument("--max-sleep", type=float, default=1.0, help="Наибольшая пауза между операциями, с")
+    args = parser.parse_args()
+
+    writer = JsonlWriter(args.output) if args.output else SocketWriter(args.host, args.port)
+    try:
+        count = replay(operations_in_time_order(args.input), writer, args.speed, args.max_sleep)
+    finally:
+        writer.close()
+    print(f"Передано операций: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,22 @@
 import datetime
 import logging
 import os
-from typing import Optional
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 import numpy as np
 import pandas as pd  # type: ignore[import-untyped]
 import xlsxwriter  # type: ignore[import-untyped]
 from dateutil.relativedelta import relativedelta
 
+from src.amounts import clean_amounts
+from src.cashback import CashbackRules, default_rules
+from src.indexes import OperationsIndex
+from src.memprofile import profiled, stage
+from src.outliers import OUTLIER_COLUMN, flag_outliers
+from src.query import OperationsQuery
+
 file_path_param_r = os.path.join(os.path.dirname(__file__), "../data/operations.xlsx")
+file_path_result = os.path.join(os.path.dirname(__file__), "../data/result.xlsx")
 logger = logging.getLogger("reports")
 log = os.path.join(os.path.dirname(__file__), "..", "logs", "reports.log")
 file_handler = logging.FileHandler(
@@ -21,6 +29,24 @@ file_handler.setFormatter(file_formatter)
 logger.addHandler(file_handler)
 logger.setLevel(logging.INFO)
 
+# Колонки отчета spending_by_category
+REPORT_COLUMNS = [
+    "Дата платежа",
+    "Номер карты",
+    "Статус",
+    "Сумма операции",
+    "Кэшбэк",
+    "MCC",
+    "Категория",
+    "Описание",
+    "Округление на инвесткопилку",
+    "Бонусы (включая кэшбэк)",
+]
+# Колонки результата: колонки выгрузки и отметка аномально крупного расхода
+OUTPUT_COLUMNS = [*REPORT_COLUMNS, OUTLIER_COLUMN]
+# Колонки, по которым flag_outliers ищет аномалии
+OUTLIER_HISTORY_COLUMNS = ("Дата операции", "Сумма операции", "Категория", "Номер карты")
+
 
 def save_to_file(filename):  # type:ignore[no-untyped-def]
     """записывает в файл результат из spending_by_category"""
@@ -61,24 +87,35 @@ def save_to_file(filename):  # type:ignore[no-untyped-def]
     return decorator  # type: ignore[return-value]
 
 
-@save_to_file(
-    filename=os.path.join(os.path.dirname(__file__), "../data/result.xlsx")
-)  # type: ignore[func-returns-value]
-def spending_by_category(transactions: pd.DataFrame, category: str, date: Optional[str] = None) -> pd.DataFrame:
-    """Возвращает расходы по выбранной категории за 3 последних месяца от заданного/текущего"""
+@profiled
+def fill_cashback_and_bonuses(
+    resulted: pd.DataFrame, rules: Optional[CashbackRules] = None, dates: Optional[pd.Series] = None
+) -> pd.DataFrame:
+    """
+    Дополняет колонки «Кэшбэк» и «Бонусы (включая кэшбэк)» расчетными значениями (на месте).
+    Процент берется из правил кэшбэка (по умолчанию — cashback_rules.json) по MCC, категории,
+    карте и дате операции (dates, по умолчанию — колонка «Дата операции»).
+    """
+    percent, bonus_percent = (rules or default_rules()).percents(resulted, dates)
+    amount = abs(resulted["Сумма операции"])
 
-    # Конвертируем дату операции
-    transactions["Дата операции"] = pd.to_datetime(
-        transactions["Дата операции"], format="%d.%m.%Y %H:%M:%S", errors="coerce"
-    )
+    # Расчет кэшбэка (процент правила от суммы операции, если не указан)
+    resulted["Кэшбэк"] = resulted["Кэшбэк"].fillna(round(amount * percent / 100, 2))
 
-    # Удаляем строки с некорректными датами
-    transactions = transactions.dropna(subset=["Дата операции"])
+    # Расчет бонусов
+    resulted["Бонусы (включая кэшбэк)"] = np.where(
+        resulted["Бонусы (включая кэшбэк)"].isna(),
+        round(amount * bonus_percent / 100, 2),
+        round(
+            resulted["Бонусы (включая кэшбэк)"] + amount * bonus_percent / 100,
+            2,
+        ),
+    )
+    return resulted
 
-    logger.info("фильтрация дат и очистка категорий от пустых значений")
 
-    # Удаляем пустые категории
-    filtered_data = transactions.dropna(subset=["Категория"])
+def report_period(date: Optional[str] = None) -> Tuple[datetime.date, datetime.date]:
+    """Период отчета: 3 месяца до заданной (или текущей) даты, границы по дням включительно"""
 
     logger.info("получение точки начала периода")
 
@@ -95,53 +132,204 @@ def spending_by_category(transactions: pd.DataFrame, category: str, date: Option
 
     # Вычисляем дату 3 месяца назад
     three_months_ago = specific_date - relativedelta(months=3)
-
-    # Фильтруем по периоду (последние 3 месяца)
-    filtered_data_start = filtered_data[
-        (filtered_data["Дата операции"].dt.date >= three_months_ago)
-        & (filtered_data["Дата операции"].dt.date <= specific_date)
-    ]
+    return three_months_ago, specific_date
+
+
+@profiled
+def category_spending(
+    transactions: pd.DataFrame,
+    category: str,
+    start: datetime.date,
+    end: datetime.date,
+    index: Optional[OperationsIndex] = None,
+    outliers: Optional[Dict[Hashable, Any]] = None,
+    rules: Optional[CashbackRules] = None,
+) -> pd.DataFrame:
+    """
+    Расходы по категории за период [start, end] с рассчитанными кэшбэком и бонусами.
+    Каждая строка результата зависит только от своей операции, поэтому таблицу
+    можно обрабатывать и целиком, и порциями.
+    Колонка «Аномалия» отмечает операции из outliers — результат flag_outliers по всей
+    истории. Без outliers flag_outliers считается здесь по transactions, поэтому при
+    обработке порциями аномалии нужно передавать явно (см. iter_spending_by_category).
+    Кэшбэк и бонусы считаются по правилам rules (по умолчанию — cashback_rules.json).
+    """
 
     logger.info("подбор необходимых данных")
 
-    # Фильтруем по категории и отрицательным суммам
-    filter_result = filtered_data_start[
-        (filtered_data_start["Сумма операции"] < 0) & (filtered_data_start["Категория"] == category)
-    ].copy()
-
-    # Выбираем нужные колонки
-    resulted = filter_result[
-        [
-            "Дата платежа",
-            "Номер карты",
-            "Статус",
-            "Сумма операции",
-            "Кэшбэк",
-            "MCC",
-            "Категория",
-            "Описание",
-            "Округление на инвесткопилку",
-            "Бонусы (включая кэшбэк)",
-        ]
-    ].copy()
+    # Суммы из выгрузок бывают строками ("1 234,50 ₽") — приводим колонку к числам целиком
+    if not pd.api.types.is_numeric_dtype(transactions["Сумма операции"]):
+        with stage("clean_amounts"):
+            amounts, rejections = clean_amounts(transactions["Сумма операции"])
+        if rejections["rejected"]:
+            logger.warning(f"Операции с некорректной суммой не попадут в отчет: {rejections}")
+        transactions = transactions.assign(**{"Сумма операции": amounts})
+
+    # Выбранный период и категория, только расходы. Строки с некорректными датами
+    # и пустыми категориями отбрасываются теми же условиями, без промежуточных копий
+    with stage("filter"):
+        resulted = (
+            OperationsQuery(transactions, index)
+            .between(start, end, whole_days=True)
+            .expenses()
+            .category(category)
+            .select([*REPORT_COLUMNS, "Дата операции"])
+            .collect()
+        )
+    if outliers is None:
+        with stage("flag_outliers"):
+            outliers = flag_outliers(transactions)
+    return complete_category_report(resulted, outliers, rules)
+
+
+def complete_category_report(
+    resulted: pd.DataFrame, outliers: Dict[Hashable, Any], rules: Optional[CashbackRules] = None
+) -> pd.DataFrame:
+    """
+    Дополняет выборку расходов категории (колонки REPORT_COLUMNS и «Дата операции»)
+    до строк отчета: номера карт без «*», кэшбэк и бонусы, нули вместо пропусков
+    и колонка «Аномалия» для строк из outliers.
+    """
+    # Дата операции нужна только правилам кэшбэка с периодом действия
+    dates = resulted.pop("Дата операции")
 
     # Обработка номеров карт
     resulted["Номер карты"] = resulted["Номер карты"].apply(lambda x: x.replace("*", "") if isinstance(x, str) else x)
 
-    # Расчет кэшбэка (1% от суммы операции, если не указан)
-    resulted["Кэшбэк"] = resulted["Кэшбэк"].fillna(round(abs(resulted["Сумма операции"]) / 100, 2))
-
-    # Расчет бонусов
-    resulted["Бонусы (включая кэшбэк)"] = np.where(
-        resulted["Бонусы (включая кэшбэк)"].isna(),
-        round(abs(resulted["Сумма операции"]) / 100, 2),
-        round(
-            resulted["Бонусы (включая кэшбэк)"] + abs(resulted["Сумма операции"]) / 100,
-            2,
-        ),
-    )
+    fill_cashback_and_bonuses(resulted, rules, dates)
 
     # Замена бесконечностей и NaN на 0
     resulted = pd.DataFrame(resulted.replace([np.inf, -np.inf], np.nan).fillna(0))
+    resulted[OUTLIER_COLUMN] = resulted.index.isin(list(outliers))
 
     return resulted
+
+
+@save_to_file(
+    filename=os.path.join(os.path.dirname(__file__), "../data/result.xlsx")
+)  # type: ignore[func-returns-value]
+@profiled
+def spending_by_category(
+    transactions: pd.DataFrame,
+    category: str,
+    date: Optional[str] = None,
+    index: Optional[OperationsIndex] = None,
+    outliers: Optional[Dict[Hashable, Any]] = None,
+) -> pd.DataFrame:
+    """
+    Возвращает расходы по выбранной категории за 3 последних месяца от заданного/текущего.
+    С индексом OperationsIndex выборка стоит пропорционально числу операций категории.
+    outliers — аномалии flag_outliers для колонки «Аномалия», если они уже посчитаны;
+    по умолчанию они считаются по всей таблице transactions (см. category_spending).
+    """
+
+    # Конвертируем дату операции
+    with stage("to_datetime"):
+        transactions["Дата операции"] = pd.to_datetime(
+            transactions["Дата операции"], format="%d.%m.%Y %H:%M:%S", errors="coerce"
+        )
+
+    three_months_ago, specific_date = report_period(date)
+    return category_spending(transactions, category, three_months_ago, specific_date, index, outliers)
+
+
+class ExcelRowSink:
+    """
+    Построчная запись отчета в xlsx в том же виде, что и save_to_file.
+    Книга открывается в режиме constant_memory: в памяти держится только текущая строка.
+    """
+
+    def __init__(self, filename: str, columns: Sequence[str] = OUTPUT_COLUMNS) -> None:
+        self.filename = filename
+        self.rows = 0
+        self.workbook = xlsxwriter.Workbook(filename, {"constant_memory": True})
+        self.worksheet = self.workbook.add_worksheet()
+        for col_num, col_name in enumerate(columns):
+            self.worksheet.set_column(col_num, col_num, 50)
+            self.worksheet.write(0, col_num, col_name)
+
+    def __call__(self, part: pd.DataFrame) -> None:
+        for row_data in part.values:
+            self.rows += 1
+            self.worksheet.write_row(self.rows, 0, row_data)
+
+    def close(self) -> None:
+        self.workbook.close()
+        logger.info(f"Сформирован файл {self.filename}: {self.rows} строк")
+
+    def __enter__(self) -> "ExcelRowSink":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def iter_spending_by_category(
+    chunks: Iterable[pd.DataFrame],
+    category: str,
+    date: Optional[str] = None,
+    outliers: Optional[Dict[Hashable, Any]] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Порционный режим spending_by_category: фильтр периода и категории, кэшбэк и бонусы
+    считаются для каждой порции отдельно. Склеенные порции совпадают с результатом
+    spending_by_category для всей таблицы.
+
+    С outliers (аномалии flag_outliers по всей истории) порции отдаются сразу и в памяти
+    находится одна порция таблицы. Без них аномалии, как и в spending_by_category,
+    ищутся по всей истории в порядке времени: от каждой порции остаются только колонки
+    OUTLIER_HISTORY_COLUMNS, а строки отчета отдаются после последней порции.
+    """
+    three_months_ago, specific_date = report_period(date)
+    history: List[pd.DataFrame] = []
+    parts: List[pd.DataFrame] = []
+    for chunk in chunks:
+        chunk["Дата операции"] = pd.to_datetime(chunk["Дата операции"], format="%d.%m.%Y %H:%M:%S", errors="coerce")
+        part = category_spending(chunk, category, three_months_ago, specific_date, outliers=outliers or {})
+        if outliers is None:
+            history.append(chunk[list(OUTLIER_HISTORY_COLUMNS)])
+            parts.append(part)
+        elif not part.empty:
+            yield part
+
+    if outliers is None:
+        flags = flag_outliers(pd.concat(history)) if history else {}
+        for part in parts:
+            if not part.empty:
+                part[OUTLIER_COLUMN] = part.index.isin(list(flags))
+                yield part
+
+
+def spending_by_category_chunked(
+    chunks: Iterable[pd.DataFrame],
+    category: str,
+    date: Optional[str] = None,
+    sink: Optional[Callable[[pd.DataFrame], None]] = None,
+    outliers: Optional[Dict[Hashable, Any]] = None,
+) -> int:
+    """
+    Записывает расходы по категории порциями, не собирая таблицу целиком.
+
+    Args:
+        chunks: Порции таблицы операций (например, iter_excel_chunks или pd.read_csv с chunksize)
+        category: Категория
+        date: Дата отчета (по умолчанию — сегодня)
+        sink: Получатель порций результата (по умолчанию — файл data/result.xlsx)
+        outliers: Аномалии flag_outliers по всей истории (по умолчанию ищутся по всем порциям,
+            см. iter_spending_by_category)
+
+    Returns:
+        Число записанных строк
+    """
+    excel_sink = ExcelRowSink(file_path_result) if sink is None else None
+    write = sink or excel_sink
+    written = 0
+    try:
+        for part in iter_spending_by_category(chunks, category, date, outliers):
+            write(part)  # type: ignore[misc]
+            written += len(part)
+    finally:
+        if excel_sink is not None:
+            excel_sink.close()
+    logger.info(f"Порционный отчет по категории {category}: {written} строк")
+    return written
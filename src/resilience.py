@@ -0,0 +1,179 @@
+import logging
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+resilience_logger = logging.getLogger("resilience")
+
+# Общий бюджет времени на один запрос страницы «Главная», секунды
+DEFAULT_BUDGET = 10.0
+# Предельное время одного HTTP-запроса, секунды
+PER_CALL_TIMEOUT = 3.0
+
+
+class DeadlineExceeded(Exception):
+    """Бюджет времени запроса исчерпан"""
+
+
+class CircuitOpenError(Exception):
+    """Хост временно отключен автоматическим выключателем"""
+
+
+class Deadline:
+    """Общий бюджет времени, отсчитываемый от момента создания"""
+
+    def __init__(self, budget: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.clock = clock
+        self.expires_at = clock() + budget
+
+    def remaining(self) -> float:
+        """Оставшееся время в секундах (не меньше нуля)"""
+        return max(0.0, self.expires_at - self.clock())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+class CircuitBreaker:
+    """
+    Автоматический выключатель по хостам.
+
+    После failure_threshold неудачных запросов подряд (запрос с повторами — одна ошибка)
+    хост считается недоступным и запросы к нему сразу отклоняются. Через reset_timeout
+    секунд пропускается один пробный запрос: успех замыкает цепь, ошибка снова размыкает ее.
+    """
+
+    def __init__(
+        self, failure_threshold: int = 3, reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, host: str) -> bool:
+        """Можно ли сейчас обращаться к хосту"""
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            if opened_at is None:
+                return True
+            if self.clock() - opened_at >= self.reset_timeout:
+                # Полуоткрытое состояние: пропускаем пробный запрос и ждем его результата
+                self._opened_at[host] = self.clock()
+                return True
+            return False
+
+    def record_success(self, host: str) -> None:
+        with self._lock:
+            self._failures.pop(host, None)
+            self._opened_at.pop(host, None)
+
+    def record_failure(self, host: str) -> None:
+        with self._lock:
+            self._failures[host] = self._failures.get(host, 0) + 1
+            if self._failures[host] >= self.failure_threshold:
+                if host not in self._opened_at:
+                    resilience_logger.warning(f"Хост {host} отключен после {self._failures[host]} ошибок")
+                self._opened_at[host] = self.clock()
+
+    def is_open(self, host: str) -> bool:
+        with self._lock:
+            return host in self._opened_at
+
+
+class LastKnownCache:
+    """Последние успешно полученные значения для деградации ответа"""
+
+    def __init__(self) -> None:
+        self._values: Dict[Any, Tuple[Any, datetime]] = {}
+        self._lock = threading.Lock()
+
+    def put(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._values[key] = (value, datetime.now())
+
+    def get(self, key: Any) -> Optional[Tuple[Any, datetime]]:
+        with self._lock:
+            return self._values.get(key)
+
+
+circuit_breaker = CircuitBreaker()
+last_known = LastKnownCache()
+
+
+def resilient_get(
+    url: str,
+    deadline: Deadline,
+    breaker: CircuitBreaker = circuit_breaker,
+    retries: int = 2,
+    backoff: float = 0.2,
+    per_call_timeout: float = PER_CALL_TIMEOUT,
+    session: Any = requests,
+    **kwargs: Any,
+) -> requests.Response:
+    """
+    GET-запрос с учетом бюджета времени, повторами и автоматическим выключателем.
+
+    Args:
+        url: Адрес запроса
+        deadline: Общий бюджет времени запроса страницы
+        breaker: Автоматический выключатель по хостам
+        retries: Число повторов после первой неудачной попытки
+        backoff: Базовая задержка между повторами (экспоненциальная, со случайным разбросом)
+        per_call_timeout: Предельное время одной попытки
+        session: HTTP-клиент с методом get (модуль requests или requests.Session)
+        **kwargs: Прочие аргументы requests.get
+
+    Returns:
+        Успешный ответ сервера
+
+    Raises:
+        CircuitOpenError: хост отключен выключателем
+        DeadlineExceeded: бюджет исчерпан до получения ответа
+        requests.RequestException: все попытки завершились ошибкой
+    """
+    host = urlparse(url).netloc
+    last_error: Optional[Exception] = None
+
+    for attempt in range(retries + 1):
+        if not breaker.allow(host):
+            if last_error is not None:
+                # Пробный запрос полуоткрытого выключателя не удался: цепь снова разомкнута
+                breaker.record_failure(host)
+            raise CircuitOpenError(host)
+        remaining = deadline.remaining()
+        if remaining <= 0:
+            break
+
+        try:
+            response: requests.Response = session.get(url, timeout=min(per_call_timeout, remaining), **kwargs)
+            response.raise_for_status()
+            breaker.record_success(host)
+            return response
+        except requests.RequestException as e:
+            status = e.response.status_code if e.response is not None else None
+            if status is not None and status < 500 and status != 429:
+                # Ошибка в самом запросе, а не на сервере: повтор не поможет
+                raise
+            last_error = e
+            resilience_logger.warning(f"Попытка {attempt + 1} запроса к {host} не удалась: {e}")
+
+        if attempt < retries:
+            delay = random.uniform(0, backoff * 2**attempt)
+            if delay >= deadline.remaining():
+                break
+            time.sleep(delay)
+
+    # Повторы исчерпаны: весь запрос считается одной ошибкой хоста
+    if last_error is not None:
+        breaker.record_failure(host)
+    if deadline.expired() or last_error is None:
+        raise DeadlineExceeded(url)
+    raise last_error
@@ -0,0 +1,93 @@
+import logging
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+from src.query import DateLike, OperationsQuery
+from src.reports import fill_cashback_and_bonuses
+
+rolling_logger = logging.getLogger("rolling")
+
+# Показатель → колонка с построчным значением
+MEASURES = {"spent": "Расход", "cashback": "Кэшбэк", "bonuses": "Бонусы (включая кэшбэк)"}
+
+
+def window_starts(anchors: pd.DatetimeIndex, months: int) -> np.ndarray:
+    """
+    Первый день окна для каждой даты привязки: anchor - months месяцев по календарю
+    (relativedelta: 31 мая - 3 месяца = 28/29 февраля). Начала окон не убывают.
+    """
+    starts = [anchor - relativedelta(months=months) for anchor in anchors.date]
+    return np.array(starts, dtype="datetime64[D]")
+
+
+def rolling_category_spending(
+    transactions: pd.DataFrame,
+    months: int = 3,
+    start: Optional[DateLike] = None,
+    end: Optional[DateLike] = None,
+    categories: Optional[Sequence[str]] = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Расходы, кэшбэк и бонусы по категориям за скользящее окно в months месяцев
+    для каждого дня периода — как spending_by_category для каждой даты, но за один проход.
+
+    Args:
+        transactions: Таблица операций (даты строкой "%d.%m.%Y %H:%M:%S" или datetime)
+        months: Длина окна в месяцах
+        start: Первая дата привязки (по умолчанию — первая дата операций)
+        end: Последняя дата привязки (по умолчанию — последняя дата операций)
+        categories: Категории для колонок (по умолчанию — все встреченные)
+
+    Returns:
+        Словарь {"spent", "cashback", "bonuses"} → DataFrame «дата × категория»,
+        где значение — сумма за окно [дата - months месяцев, дата] по дням включительно
+    """
+    dates = transactions["Дата операции"]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, format="%d.%m.%Y %H:%M:%S", errors="coerce")
+    operations = transactions.assign(**{"Дата операции": dates})
+
+    query = OperationsQuery(operations).where("Дата операции", "notna", None).where("Категория", "notna", None)
+    if categories is not None:
+        query = query.where("Категория", "in", categories)
+    columns = ["Дата операции", "Категория", "Сумма операции", "Кэшбэк", "Бонусы (включая кэшбэк)"]
+    # MCC и номер карты нужны правилам кэшбэка
+    rule_columns = [column for column in ("MCC", "Номер карты") if column in operations.columns]
+    frame = query.expenses().select(columns + rule_columns).collect()
+    for column in columns[2:]:
+        frame[column] = pd.to_numeric(frame[column], errors="coerce")
+    frame = fill_cashback_and_bonuses(frame)
+    frame["Расход"] = frame["Сумма операции"].abs()
+    frame = frame.replace([np.inf, -np.inf], np.nan)
+
+    if start is None and end is None and frame.empty:
+        return {name: pd.DataFrame() for name in MEASURES}
+
+    first_anchor = pd.Timestamp(start).normalize() if start is not None else frame["Дата операции"].min().normalize()
+    last_anchor = pd.Timestamp(end).normalize() if end is not None else frame["Дата операции"].max().normalize()
+    anchors = pd.date_range(first_anchor, last_anchor, freq="D")
+    starts = window_starts(anchors, months)
+
+    # Календарь от начала самого раннего окна до последней даты привязки
+    calendar_start = np.datetime64(starts.min() if len(starts) else first_anchor.date(), "D")
+    calendar = pd.date_range(pd.Timestamp(calendar_start), last_anchor, freq="D")
+    category_columns = list(categories) if categories is not None else list(pd.unique(frame["Категория"]))
+
+    day = frame["Дата операции"].dt.normalize()
+    left = (starts - calendar_start).astype(int)
+    right = (anchors.values.astype("datetime64[D]") - calendar_start).astype(int) + 1
+
+    result = {}
+    for name, column in MEASURES.items():
+        daily = frame[column].fillna(0).groupby([day, frame["Категория"]]).sum().unstack(fill_value=0)
+        daily = daily.reindex(index=calendar, columns=category_columns, fill_value=0)
+        # cumulative[i] — сумма за дни календаря до i-го (не включая), окно — разность двух строк
+        cumulative = np.vstack([np.zeros((1, len(category_columns))), np.cumsum(daily.to_numpy(dtype=float), axis=0)])
+        window = cumulative[right] - cumulative[left]
+        result[name] = pd.DataFrame(np.round(window, 2), index=anchors, columns=category_columns)
+
+    rolling_logger.info(f"Скользящие суммы за {months} мес.: {len(anchors)} дат × {len(category_columns)} категорий")
+    return result
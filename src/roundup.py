@@ -0,0 +1,103 @@
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.amounts import clean_amounts
+from src.utils import validate_limit
+
+roundup_logger = logging.getLogger("roundup")
+
+DEFAULT_LIMITS = (10, 50, 100, 500, 1000)
+# Сколько ячеек «транзакция × лимит» считается за один шаг
+CHUNK_CELLS = 1 << 22
+
+
+def _month_codes(dates: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """
+    Номер месяца 'YYYY-MM' для каждой операции и список месяцев по возрастанию.
+    Месяц — начало строки даты, как в filter_transactions_by_month; операции без даты получают -1.
+    Строки форматируются только для различных дат, а не для каждой операции.
+    """
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        date_codes, unique_dates = pd.factorize(dates.to_numpy().astype("datetime64[M]"))
+        labels = pd.Series(pd.DatetimeIndex(unique_dates).strftime("%Y-%m"))
+    else:
+        date_codes, unique_dates = pd.factorize(dates)
+        labels = pd.Series(unique_dates, dtype="string").str[:7]
+    labels = labels.where(labels != "")
+
+    label_codes, months = pd.factorize(labels, sort=True)
+    codes = np.append(label_codes, -1)[date_codes]
+    return codes, pd.Index(months)
+
+
+def _expense_amounts(amounts: pd.Series) -> np.ndarray:
+    """Суммы операций числами (см. clean_amounts), нечисловые дают NaN"""
+    if not pd.api.types.is_numeric_dtype(amounts):
+        amounts, _ = clean_amounts(amounts)
+    values: np.ndarray = amounts.to_numpy(dtype=float, na_value=np.nan)
+    return values
+
+
+def simulate_round_ups(
+    transactions: Union[pd.DataFrame, List[Dict[str, Any]]],
+    limits: Sequence[int] = DEFAULT_LIMITS,
+    months: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """
+    Сколько отложила бы «Инвесткопилка» за каждый месяц при каждом из лимитов округления.
+
+    Округление считается сразу для всего вектора лимитов (транзакции × лимиты)
+    по той же формуле, что и round_amount, поэтому каждая ячейка совпадает
+    с результатом investment_bank для этого месяца и лимита.
+
+    Args:
+        transactions: Таблица или список транзакций (дата 'YYYY-MM-DD', сумма операции)
+        limits: Лимиты округления (10, 50, 100 и т.д.)
+        months: Месяцы 'YYYY-MM' для строк таблицы (по умолчанию — все месяцы с расходами)
+
+    Returns:
+        DataFrame «месяц × лимит» с суммами для копилки
+    """
+    if len(limits) == 0:
+        raise ValueError("Не задан ни один лимит округления")
+    # Лимиты могут прийти и массивом numpy: строки и дроби не приводятся к целым молча
+    limit_values = np.asarray(limits)
+    if limit_values.ndim != 1 or not np.issubdtype(limit_values.dtype, np.integer):
+        raise ValueError(f"Лимиты должны быть целыми числами, получено: {limits}")
+    limits = np.asarray(limit_values, dtype=np.int64).tolist()
+    for limit in limits:
+        if not validate_limit(limit):
+            raise ValueError(f"Неверный лимит: {limit}. Лимит должен быть положительным и кратным 10")
+
+    if not isinstance(transactions, pd.DataFrame):
+        transactions = pd.DataFrame(list(transactions), columns=["Дата операции", "Сумма операции"])
+    codes, month_labels = _month_codes(transactions["Дата операции"])
+    amounts = _expense_amounts(transactions["Сумма операции"])
+    # В копилку идут только расходы (отрицательные суммы) с датой
+    expense = (codes >= 0) & (amounts < 0)
+    codes, amounts = codes[expense], np.abs(amounts[expense])
+    limit_row = np.asarray(limits, dtype=float)[np.newaxis, :]
+
+    totals = np.zeros((len(month_labels), len(limits)))
+    step = max(1, CHUNK_CELLS // len(limits))
+    for chunk_start in range(0, len(amounts), step):
+        chunk = slice(chunk_start, chunk_start + step)
+        amount_column = amounts[chunk, np.newaxis]
+        chunk_codes = codes[chunk]
+        # Округляем вверх до ближайшего кратного limit сразу для всех лимитов
+        rounded_up = ((amount_column + limit_row - 1) // limit_row) * limit_row
+        differences = np.round(rounded_up - amount_column, 2)
+        for column in range(len(limits)):
+            totals[:, column] += np.bincount(chunk_codes, weights=differences[:, column], minlength=len(month_labels))
+
+    result = pd.DataFrame(np.round(totals, 2), index=pd.Index(month_labels, name="month"), columns=list(limits))
+    result.columns.name = "limit"
+    if months is not None:
+        result = result.reindex(list(months), fill_value=0.0)
+        result.index.name = "month"
+
+    roundup_logger.info(f"Симуляция копилки: {len(amounts)} расходов, {len(result)} мес. × {len(limits)} лимитов")
+    return result
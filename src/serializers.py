@@ -0,0 +1,129 @@
+import datetime
+import json
+import logging
+import math
+from decimal import Decimal
+from types import ModuleType
+from typing import Any, Dict, Hashable, Iterable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+orjson: Optional[ModuleType]
+try:
+    import orjson  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - ускоренный сериализатор не обязателен
+    orjson = None
+
+serializers_logger = logging.getLogger("serializers")
+
+
+def to_builtin(obj: Any) -> Any:
+    """
+    Приводит значения numpy/pandas и даты к встроенным типам JSON.
+    Используется как обработчик default, для неизвестных типов выбрасывает TypeError.
+    """
+    if obj is pd.NaT:
+        return None
+    if isinstance(obj, np.bool_):
+        return bool(obj)
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        value = float(obj)
+        return value if math.isfinite(value) else None
+    if isinstance(obj, (pd.Timestamp, datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, np.datetime64):
+        return to_builtin(pd.Timestamp(obj))
+    if isinstance(obj, np.ndarray):
+        return _normalize(obj.tolist())
+    if isinstance(obj, Decimal):
+        value = float(obj)
+        return value if math.isfinite(value) else None
+    raise TypeError(f"Тип {type(obj).__name__} не сериализуется в JSON")
+
+
+def _key(key: Hashable) -> str:
+    """Ключ словаря в JSON так же, как в orjson с OPT_NON_STR_KEYS"""
+    if isinstance(key, (np.generic, pd.Timestamp)):
+        key = to_builtin(key)
+    if isinstance(key, str):
+        return key
+    if key is None:
+        return "null"
+    if isinstance(key, bool):
+        return "true" if key else "false"
+    if isinstance(key, int):
+        return str(key)
+    if isinstance(key, float):
+        return repr(key) if math.isfinite(key) else "null"
+    if isinstance(key, (datetime.date, datetime.time)):
+        return key.isoformat()
+    raise TypeError(f"Ключ типа {type(key).__name__} не сериализуется в JSON")
+
+
+def _normalize(obj: Any) -> Any:
+    """
+    Готовит данные для json.dumps так, чтобы результат совпадал с orjson:
+    NaN и бесконечности становятся null, ключи словарей — строками (см. _key)
+    """
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {_key(key): _normalize(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_normalize(value) for value in obj]
+    return obj
+
+
+def dumps(data: Any, indent: Optional[int] = None) -> str:
+    """
+    Сериализует данные в JSON-строку.
+
+    Args:
+        data: Данные для сериализации
+        indent: Отступ для читаемого вывода; None — компактный быстрый режим
+            (через orjson, если он установлен)
+
+    Returns:
+        JSON-строка (кириллица не экранируется). Оба способа записывают NaN
+        и бесконечности как null, а ключи-числа, даты и None — строками.
+    """
+    if indent is None and orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        try:
+            result: str = orjson.dumps(data, default=to_builtin, option=option).decode("utf-8")
+            return result
+        except orjson.JSONEncodeError:
+            # Например, ключи numpy или Timestamp: их приводит к строкам _normalize
+            pass
+    separators = (",", ":") if indent is None else None
+    return json.dumps(_normalize(data), ensure_ascii=False, indent=indent, separators=separators, default=to_builtin)
+
+
+def dataframe_records(df: pd.DataFrame) -> Iterator[Dict[str, Any]]:
+    """
+    Построчно выдает записи DataFrame без построения общего списка.
+    Пропуски (NaN, NaT) заменяются на None.
+    """
+    columns = [str(column) for column in df.columns]
+    for row in df.itertuples(index=False, name=None):
+        yield {
+            column: None if (isinstance(value, float) and math.isnan(value)) or value is pd.NaT else value
+            for column, value in zip(columns, row)
+        }
+
+
+def iter_ndjson(records: Iterable[Any]) -> Iterator[str]:
+    """Выдает записи в формате NDJSON — по одной компактной JSON-строке с переводом строки"""
+    count = 0
+    for record in records:
+        count += 1
+        yield dumps(record) + "\n"
+    serializers_logger.debug(f"Сериализовано записей NDJSON: {count}")
+
+
+def iter_dataframe_ndjson(df: pd.DataFrame) -> Iterator[str]:
+    """Выдает строки DataFrame в формате NDJSON"""
+    return iter_ndjson(dataframe_records(df))
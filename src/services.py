@@ -1,13 +1,40 @@
 import json
 import logging
-from typing import Any, Dict, List
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional
 
+import numpy as np
+
+from src.amounts import clean_amounts
 from src.utils import (calculate_investment_for_transactions, filter_transactions_by_month,
                        prepare_investment_response, validate_limit, validate_month_format)
 
+if TYPE_CHECKING:
+    from src.operations_store import OperationsStore
+
 # Настройка основного логгера для services.py
 logger = logging.getLogger(__name__)
 
+# Сколько транзакций потока обрабатывается за один шаг
+STREAM_BATCH_SIZE = 4096
+
+
+def _validation_error(month: Optional[str], limit: int) -> Optional[str]:
+    """JSON-ответ с ошибкой для неверного месяца или лимита; None, если параметры корректны"""
+    if month is not None and not validate_month_format(month):
+        logger.error(f"Неверный формат месяца: {month}")
+        return json.dumps(
+            {"error": f"Неверный формат месяца: {month}. Ожидается 'YYYY-MM'", "status": "error"}, ensure_ascii=False
+        )
+
+    if not validate_limit(limit):
+        logger.error(f"Неверный лимит: {limit}")
+        return json.dumps(
+            {"error": f"Неверный лимит: {limit}. Лимит должен быть положительным и кратным 10", "status": "error"},
+            ensure_ascii=False,
+        )
+    return None
+
 
 def investment_bank(month: str, transactions: List[Dict[str, Any]], limit: int) -> str:
     """
@@ -24,18 +51,9 @@ def investment_bank(month: str, transactions: List[Dict[str, Any]], limit: int)
     logger.info(f"Запуск функции investment_bank для месяца: {month}, лимит: {limit}")
 
     # Валидация входных данных
-    if not validate_month_format(month):
-        logger.error(f"Неверный формат месяца: {month}")
-        return json.dumps(
-            {"error": f"Неверный формат месяца: {month}. Ожидается 'YYYY-MM'", "status": "error"}, ensure_ascii=False
-        )
-
-    if not validate_limit(limit):
-        logger.error(f"Неверный лимит: {limit}")
-        return json.dumps(
-            {"error": f"Неверный лимит: {limit}. Лимит должен быть положительным и кратным 10", "status": "error"},
-            ensure_ascii=False,
-        )
+    error = _validation_error(month, limit)
+    if error is not None:
+        return error
 
     # Фильтрация транзакций по месяцу
     filtered_transactions = filter_transactions_by_month(transactions, month)
@@ -53,6 +71,109 @@ def investment_bank(month: str, transactions: List[Dict[str, Any]], limit: int)
     return prepare_investment_response(month, total_investment, limit)
 
 
+def stream_round_ups(
+    transactions: Iterable[Dict[str, Any]], limit: int, month: Optional[str] = None
+) -> Dict[str, float]:
+    """
+    Суммы для копилки по месяцам из потока транзакций (список, генератор, строки файла).
+
+    Транзакции читаются порциями по STREAM_BATCH_SIZE, суммы каждой порции очищаются
+    clean_amounts, а разница округления добавляется к накопителю своего месяца
+    в порядке поступления — так же, как в calculate_investment_for_transactions.
+    В памяти одновременно находится одна порция и по числу на месяц.
+
+    Args:
+        transactions: Транзакции с ключами "Дата операции" ('YYYY-MM-DD') и "Сумма операции"
+        limit: Шаг округления
+        month: Учитывать только этот месяц 'YYYY-MM' (по умолчанию — все)
+
+    Returns:
+        Словарь {месяц: сумма} по месяцам, в которых были транзакции
+    """
+    totals: Dict[str, float] = {month: 0.0} if month is not None else {}
+    iterator = iter(transactions)
+    seen = skipped = 0
+    while batch := list(islice(iterator, STREAM_BATCH_SIZE)):
+        seen += len(batch)
+        dates = [transaction.get("Дата операции", "") for transaction in batch]
+        # Месяц — начало строки даты, как в filter_transactions_by_month ("" — даты нет)
+        keys: List[str] = [date[:7] if isinstance(date, str) else "" for date in dates]
+        selected = [i for i, key in enumerate(keys) if key and (month is None or key == month)]
+        if month is None:
+            for i in selected:
+                totals.setdefault(keys[i], 0.0)
+        if not selected:
+            continue
+
+        amounts, rejections = clean_amounts([batch[i].get("Сумма операции", 0) for i in selected])
+        skipped += rejections["rejected"]
+        values = amounts.to_numpy(dtype=float)
+        expense = values < 0
+        expenses = -values[expense]
+        # Округление как в round_amount
+        differences = np.round(((expenses + limit - 1) // limit) * limit - expenses, 2)
+        for i, difference in zip(np.asarray(selected)[expense].tolist(), differences.tolist()):
+            totals[keys[i]] += difference
+
+    logger.info(f"Поток транзакций: {seen} получено, {skipped} с некорректной суммой, {len(totals)} мес.")
+    return {key: round(total, 2) for key, total in sorted(totals.items())}
+
+
+def investment_bank_stream(month: str, transactions: Iterable[Dict[str, Any]], limit: int) -> str:
+    """
+    Потоковый вариант investment_bank: принимает любой итерируемый источник транзакций
+    и не хранит их в памяти.
+
+    Returns:
+        JSON-строка с результатом расчета, как у investment_bank
+    """
+    logger.info(f"Запуск функции investment_bank_stream для месяца: {month}, лимит: {limit}")
+
+    error = _validation_error(month, limit)
+    if error is not None:
+        return error
+
+    total_investment = stream_round_ups(transactions, limit, month)[month]
+    logger.info(f"Расчет завершен. Сумма для копилки: {total_investment} ₽")
+    return prepare_investment_response(month, total_investment, limit)
+
+
+def investment_bank_stream_by_month(transactions: Iterable[Dict[str, Any]], limit: int) -> Dict[str, str]:
+    """
+    Потоковый расчет копилки сразу по всем месяцам потока за один проход.
+
+    Returns:
+        Словарь {месяц 'YYYY-MM': JSON-ответ как у investment_bank}
+
+    Raises:
+        ValueError: Если лимит некорректен
+    """
+    if _validation_error(None, limit) is not None:
+        raise ValueError(f"Неверный лимит: {limit}. Лимит должен быть положительным и кратным 10")
+
+    totals = stream_round_ups(transactions, limit)
+    return {month: prepare_investment_response(month, total, limit) for month, total in totals.items()}
+
+
+def investment_bank_store(month: str, store: "OperationsStore", limit: int) -> str:
+    """
+    Вариант investment_bank для операций в SQLite: выборка месяца выполняется
+    запросом по индексу даты, в память читаются только суммы расходов месяца.
+
+    Returns:
+        JSON-строка с результатом расчета, как у investment_bank
+    """
+    logger.info(f"Запуск функции investment_bank_store для месяца: {month}, лимит: {limit}")
+
+    error = _validation_error(month, limit)
+    if error is not None:
+        return error
+
+    total_investment = store.round_ups(limit, month)[month]
+    logger.info(f"Расчет завершен. Сумма для копилки: {total_investment} ₽")
+    return prepare_investment_response(month, total_investment, limit)
+
+
 def main_services_example():
     """
     Пример использования функции investment_bank
@@ -0,0 +1,338 @@
+import argparse
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from src.context import ViewsContext
+
+stub_logger = logging.getLogger("stub_server")
+
+# Курсы к рублю и цены акций, вокруг которых строятся ответы
+BASE_RATES = {"USD": 90.0, "EUR": 98.0, "CNY": 12.5, "TRY": 2.8, "GBP": 114.0}
+BASE_PRICES = {"AAPL": 175.0, "AMZN": 180.0, "GOOGL": 150.0, "MSFT": 410.0, "TSLA": 190.0}
+LATENCY_KINDS = ("fixed", "uniform", "lognormal")
+
+_AGGS_PATH = re.compile(r"^/v2/aggs/ticker/(?P<ticker>[^/]+)/range/1/day/(?P<start>[\d-]+)/(?P<end>[\d-]+)$")
+
+
+class FaultProfile:
+    """
+    Поведение заглушки: распределение задержки ответа и доли сбоев.
+
+    Задержка: "fixed" (params: секунды), "uniform" (от, до) или "lognormal"
+    (медиана, sigma) — последняя дает длинный хвост медленных ответов.
+    Доля error_rate запросов получает 500, доля rate_limit_rate — 429 с Retry-After.
+    """
+
+    def __init__(
+        self,
+        latency: str = "fixed",
+        latency_params: Sequence[float] = (0.0,),
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: int = 1,
+        seed: Optional[int] = None,
+    ) -> None:
+        if latency not in LATENCY_KINDS:
+            raise ValueError(f"Неизвестное распределение задержки: {latency}")
+        if error_rate + rate_limit_rate > 1:
+            raise ValueError("Сумма долей сбоев не может превышать 1")
+        self.latency = latency
+        self.latency_params = tuple(latency_params)
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+        """Задержка очередного ответа в секундах"""
+        with self._lock:
+            if self.latency == "uniform":
+                return self._random.uniform(*self.latency_params)
+            if self.latency == "lognormal":
+                median, sigma = self.latency_params
+                return self._random.lognormvariate(math.log(median), sigma)
+            return self.latency_params[0]
+
+    def fault(self) -> Optional[int]:
+        """Код ошибки для очередного ответа (500 или 429) или None"""
+        with self._lock:
+            roll = self._random.random()
+        if roll < self.error_rate:
+            return 500
+        if roll < self.error_rate + self.rate_limit_rate:
+            return 429
+        return None
+
+
+def _daily_value(base: float, day: date, amplitude: float = 0.02) -> float:
+    """Детерминированное значение на день: колебание вокруг base на ±amplitude"""
+    return round(base * (1 + amplitude * math.sin(day.toordinal() / 7)), 4)
+
+
+def _days(start: date, end: date) -> Iterator[date]:
+    for i in range((end - start).days + 1):
+        yield start + timedelta(days=i)
+
+
+def fixer_convert(query: Dict[str, str]) -> Dict[str, Any]:
+    """Ответ /fixer/convert: курс валюты from к валюте to на сегодня"""
+    source, target = query.get("from", "USD"), query.get("to", "RUB")
+    amount = float(query.get("amount", 1))
+    today = date.today()
+    # Курс через рубль: from → RUB → to
+    rate = _daily_value(BASE_RATES.get(source, 50.0), today)
+    if target != "RUB":
+        rate = round(rate / _daily_value(BASE_RATES.get(target, 50.0), today), 6)
+    return {
+        "success": True,
+        "query": {"from": source, "to": target, "amount": amount},
+        "info": {"timestamp": int(time.time()), "rate": rate},
+        "date": today.isoformat(),
+        "result": round(rate * amount, 6),
+    }
+
+
+def fixer_timeseries(query: Dict[str, str]) -> Dict[str, Any]:
+    """Ответ /fixer/timeseries: дневные курсы base к symbols за период"""
+    start, end = date.fromisoformat(query["start_date"]), date.fromisoformat(query["end_date"])
+    base = query.get("base", "USD")
+    symbols = query.get("symbols", "RUB").split(",")
+    rates = {
+        day.isoformat(): {symbol: _daily_value(BASE_RATES.get(base, 50.0), day) for symbol in symbols}
+        for day in _days(start, end)
+    }
+    return {
+        "success": True,
+        "timeseries": True,
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "base": base,
+        "rates": rates,
+    }
+
+
+def stock_aggregates(ticker: str, start: date, end: date) -> Dict[str, Any]:
+    """Ответ /v2/aggs/ticker/.../range/1/day/...: дневные бары по рабочим дням периода"""
+    results = []
+    for day in _days(start, end):
+        if day.weekday() >= 5:
+            continue
+        close = _daily_value(BASE_PRICES.get(ticker, 100.0), day, amplitude=0.05)
+        timestamp = datetime(day.year, day.month, day.day, 4, tzinfo=timezone.utc).timestamp() * 1000
+        results.append(
+            {
+                "v": 50_000_000,
+                "vw": close,
+                "o": round(close * 0.995, 4),
+                "c": close,
+                "h": round(close * 1.01, 4),
+                "l": round(close * 0.99, 4),
+                "t": int(timestamp),
+                "n": 500_000,
+            }
+        )
+    return {
+        "ticker": ticker,
+        "queryCount": len(results),
+        "resultsCount": len(results),
+        "adjusted": True,
+        "results": results,
+        "status": "OK",
+        "request_id": f"stub-{ticker}-{start}-{end}",
+        "count": len(results),
+    }
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 с Content-Length: клиент может переиспользовать соединение
+    protocol_version = "HTTP/1.1"
+    server: "_StubHTTPServer"
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.stub.record_connection()
+
+    def log_message(self, format: str, *args: Any) -> None:
+        stub_logger.debug(format % args)
+
+    def do_GET(self) -> None:
+        stub = self.server.stub
+        stub.enter()
+        try:
+            self._handle(stub)
+        finally:
+            stub.leave()
+
+    def _handle(self, stub: "StubMarketServer") -> None:
+        parsed = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        match = _AGGS_PATH.match(parsed.path)
+        if parsed.path == "/fixer/convert":
+            route, profile = "convert", stub.fixer_profile
+        elif parsed.path == "/fixer/timeseries":
+            route, profile = "timeseries", stub.fixer_profile
+        elif match:
+            route, profile = "aggs", stub.stocks_profile
+        else:
+            stub.record(parsed.path, 404)
+            self._send(404, {"error": "not found"})
+            return
+
+        time.sleep(profile.delay())
+        status = profile.fault()
+        stub.record(route, status or 200)
+        if status == 429:
+            self._send(429, {"error": "rate limit exceeded"}, {"Retry-After": str(profile.retry_after)})
+        elif status == 500:
+            self._send(500, {"error": "internal server error"})
+        elif route == "convert":
+            self._send(200, fixer_convert(query))
+        elif route == "timeseries":
+            self._send(200, fixer_timeseries(query))
+        else:
+            start, end = date.fromisoformat(match["start"]), date.fromisoformat(match["end"])  # type: ignore[index]
+            self._send(200, stock_aggregates(match["ticker"], start, end))  # type: ignore[index]
+
+    def _send(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    stub: "StubMarketServer"
+
+
+class StubMarketServer:
+    """
+    Локальная заглушка API Fixer и дневных агрегатов акций.
+
+    Отдает ответы в формате настоящих API, задерживает и портит их согласно
+    FaultProfile и считает запросы, коды ответов, соединения и пиковое число
+    одновременно обрабатываемых запросов. Запускается в фоновом потоке:
+
+        with StubMarketServer(FaultProfile("lognormal", (0.05, 0.5))) as stub:
+            get_currency("user_settings.json", ctx=stub_context(stub))
+    """
+
+    def __init__(
+        self,
+        fixer_profile: Optional[FaultProfile] = None,
+        stocks_profile: Optional[FaultProfile] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.fixer_profile = fixer_profile or FaultProfile()
+        self.stocks_profile = stocks_profile or self.fixer_profile
+        self._address = (host, port)
+        self._httpd: Optional[_StubHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def base_url(self) -> str:
+        if self._httpd is None:
+            raise RuntimeError("Заглушка не запущена")
+        host, port = self._httpd.socket.getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubMarketServer":
+        self._httpd = _StubHTTPServer(self._address, _StubHandler)
+        self._httpd.stub = self
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="stub-server", daemon=True)
+        self._thread.start()
+        stub_logger.info(f"Заглушка API запущена на {self.base_url}")
+        return self
+
+    def stop(self) -> None:
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self) -> "StubMarketServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.requests: Dict[Tuple[str, int], int] = {}
+            self.connections = 0
+            self.in_flight = 0
+            self.max_in_flight = 0
+
+    def record_connection(self) -> None:
+        with self._lock:
+            self.connections += 1
+
+    def enter(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def leave(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def record(self, route: str, status: int) -> None:
+        with self._lock:
+            self.requests[(route, status)] = self.requests.get((route, status), 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики: запросы по маршрутам и кодам, соединения, пик одновременных запросов"""
+        with self._lock:
+            by_route: Dict[str, Dict[str, int]] = {}
+            for (route, status), count in self.requests.items():
+                by_route.setdefault(route, {})[str(status)] = count
+            return {
+                "requests": sum(self.requests.values()),
+                "by_route": by_route,
+                "connections": self.connections,
+                "max_in_flight": self.max_in_flight,
+            }
+
+
+def stub_context(stub: StubMarketServer, **overrides: Any) -> ViewsContext:
+    """Контекст запросов, в котором адреса API указывают на заглушку"""
+    return ViewsContext.from_env(fixer_base_url=stub.base_url, stocks_base_url=stub.base_url, **overrides)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Локальная заглушка API курсов валют и акций")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--latency", choices=LATENCY_KINDS, default="fixed", help="Распределение задержки")
+    parser.add_argument("--latency-params", type=float, nargs="+", default=[0.0], help="Параметры задержки")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Доля ответов 429")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    profile = FaultProfile(args.latency, args.latency_params, args.error_rate, args.rate_limit_rate, seed=args.seed)
+    server = StubMarketServer(profile, host=args.host, port=args.port).start()
+    print(f"FIXER_BASE_URL={server.base_url}\nSTOCKS_BASE_URL={server.base_url}")
+    try:
+        while True:
+            time.sleep(60)
+            print(json.dumps(server.stats(), ensure_ascii=False))
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,126 @@
+import bisect
+import logging
+import re
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.query import DateLike, OperationsQuery
+
+text_index_logger = logging.getLogger("text_index")
+
+DESCRIPTION_COLUMN = "Описание"
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: object) -> List[str]:
+    """
+    Разбивает описание на слова: регистр не учитывается, «ё» приравнивается к «е».
+    Пустые значения и не строки дают пустой список.
+    """
+    if not isinstance(text, str):
+        return []
+    return _TOKEN_RE.findall(text.casefold().replace("ё", "е"))
+
+
+class DescriptionIndex:
+    """
+    Инвертированный индекс по колонке «Описание»: слово → номера строк.
+
+    Индекс пополняется порциями вместе с таблицей (add), поиск поддерживает
+    префиксы: «магн» находит «Магнит» и «Магнолия».
+    """
+
+    def __init__(self) -> None:
+        self.postings: Dict[str, List[int]] = {}
+        self.size = 0
+        self._vocabulary: List[str] = []
+        self._vocabulary_dirty = False
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, column: str = DESCRIPTION_COLUMN) -> "DescriptionIndex":
+        index = cls()
+        index.add(df[column])
+        return index
+
+    def add(self, descriptions: Iterable[object]) -> None:
+        """Добавляет описания следующих по порядку строк таблицы"""
+        start = self.size
+        for description in descriptions:
+            for token in set(tokenize(description)):
+                rows = self.postings.get(token)
+                if rows is None:
+                    self.postings[token] = [self.size]
+                    self._vocabulary_dirty = True
+                else:
+                    rows.append(self.size)
+            self.size += 1
+        text_index_logger.debug(f"В индекс описаний добавлено строк: {self.size - start}, слов: {len(self.postings)}")
+
+    def _words_with_prefix(self, prefix: str) -> List[str]:
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self.postings)
+            self._vocabulary_dirty = False
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        words = []
+        for word in self._vocabulary[start:]:
+            if not word.startswith(prefix):
+                break
+            words.append(word)
+        return words
+
+    def search(self, query: str, prefix: bool = True) -> np.ndarray:
+        """
+        Номера строк, описание которых содержит все слова запроса.
+        При prefix=True каждое слово запроса может быть началом слова описания.
+        """
+        result: Optional[np.ndarray] = None
+        for token in tokenize(query):
+            words = self._words_with_prefix(token) if prefix else ([token] if token in self.postings else [])
+            if not words:
+                return np.empty(0, dtype=np.intp)
+            rows = np.unique(np.concatenate([np.asarray(self.postings[word], dtype=np.intp) for word in words]))
+            result = rows if result is None else np.intersect1d(result, rows, assume_unique=True)
+        return result if result is not None else np.empty(0, dtype=np.intp)
+
+
+def search_merchants(
+    df: pd.DataFrame,
+    index: DescriptionIndex,
+    query: str,
+    start: Optional[DateLike] = None,
+    end: Optional[DateLike] = None,
+    prefix: bool = True,
+) -> pd.DataFrame:
+    """
+    Операции у продавцов, чье описание совпадает с запросом, за период [start, end] (по дням включительно).
+
+    Args:
+        df: Таблица операций с приведенной к datetime колонкой «Дата операции»
+        index: Индекс описаний, построенный по этой же таблице
+        query: Название продавца или его начало, например «магн»
+        start: Начало периода
+        end: Конец периода
+        prefix: Искать слова по началу
+
+    Returns:
+        Найденные операции в исходном порядке строк
+    """
+    rows = index.search(query, prefix=prefix)
+    text_index_logger.info(f"По запросу «{query}» найдено операций: {len(rows)}")
+    search_query = OperationsQuery(df).rows(rows)
+    if start is not None or end is not None:
+        search_query = search_query.between(start, end, whole_days=True)
+    return search_query.collect()
+
+
+def merchant_totals(operations: pd.DataFrame) -> pd.DataFrame:
+    """Итоги по продавцам: число операций и сумма, по убыванию числа операций"""
+    totals = (
+        operations.groupby(DESCRIPTION_COLUMN, sort=False)["Сумма операции"]
+        .agg(count="size", total="sum")
+        .reset_index()
+        .sort_values(by="count", ascending=False, kind="stable")
+    )
+    return totals.reset_index(drop=True)
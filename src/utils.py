@@ -1,8 +1,13 @@
 import datetime
-import json
 import logging
 from typing import Any, Dict, List
 
+import numpy as np
+
+from src.amounts import clean_amounts
+from src.memprofile import profiled
+from src.serializers import dumps
+
 # Настройка логгеров для различных компонентов
 validate_month_format_logger = logging.getLogger("validate_month_format")
 validate_limit_logger = logging.getLogger("validate_limit")
@@ -56,6 +61,7 @@ def validate_limit(limit: int) -> bool:
     return True
 
 
+@profiled
 def filter_transactions_by_month(transactions: List[Dict[str, Any]], target_month: str) -> List[Dict[str, Any]]:
     """
     Фильтрует транзакции, оставляя только те, которые относятся к целевому месяцу.
@@ -114,6 +120,7 @@ def round_amount(amount: float, limit: int) -> float:
     return round(difference, 2)
 
 
+@profiled
 def calculate_investment_for_transactions(transactions: List[Dict[str, Any]], limit: int) -> float:
     """
     Рассчитывает общую сумму для инвесткопилки из списка транзакций.Args:
@@ -123,35 +130,21 @@ def calculate_investment_for_transactions(transactions: List[Dict[str, Any]], li
     Returns:
         Общая сумма для копилки
     """
-    total = 0.0
-
-    for i, transaction in enumerate(transactions):
-        try:
-            amount = transaction.get("Сумма операции", 0)
-
-            # Преобразуем сумму к числу
-            if isinstance(amount, str):
-                # Очищаем строку от пробелов и символов валюты
-                clean_amount = amount.replace(" ", "").replace("₽", "").replace("RUB", "")
-                try:
-                    amount_float = float(clean_amount)
-                except ValueError:
-                    calculate_investment_logger.warning(f"Транзакция {i}: не удалось преобразовать сумму '{amount}'")
-                    continue
-            else:
-                amount_float = float(amount)
-
-            # Учитываем только расходы (отрицательные суммы)
-            if amount_float < 0:
-                investment = round_amount(abs(amount_float), limit)
-                total += investment
-                calculate_investment_logger.debug(
-                    f"Транзакция {i}: расход {abs(amount_float)} ₽, " f"в копилку: {investment} ₽"
-                )
-
-        except Exception as e:
-            calculate_investment_logger.error(f"Ошибка в транзакции {i}: {e}")
-            continue
+    # Элементы, не являющиеся словарями, пропускаются (их сумма — пропуск в отчете clean_amounts)
+    skipped = [i for i, transaction in enumerate(transactions) if not isinstance(transaction, dict)]
+    if skipped:
+        calculate_investment_logger.error(f"Пропущены транзакции, не являющиеся словарями: {skipped}")
+
+    # Все суммы приводятся к числам одним векторным проходом, нечисловые отклоняются с отчетом
+    raw_amounts = [t.get("Сумма операции", 0) if isinstance(t, dict) else None for t in transactions]
+    amounts, rejections = clean_amounts(raw_amounts)
+    if rejections["rejected"]:
+        calculate_investment_logger.warning(f"Пропущены транзакции с некорректной суммой: {rejections}")
+
+    # Учитываем только расходы (отрицательные суммы); округление как в round_amount
+    expenses = -amounts.to_numpy(dtype=float)[amounts.to_numpy() < 0]
+    differences = np.round(((expenses + limit - 1) // limit) * limit - expenses, 2)
+    total: float = sum(differences.tolist())
 
     total = round(total, 2)
     calculate_investment_logger.info(f"Общая сумма для копилки: {total} ₽")
@@ -181,7 +174,7 @@ def prepare_investment_response(month: str, total_investment: float, limit: int)
 
     prepare_response_logger.debug(f"Подготовлен ответ: {response_data}")
 
-    return json.dumps(response_data, ensure_ascii=False, indent=2, default=str)
+    return dumps(response_data, indent=2)
 
 
 def calculate_example_investment() -> Dict[str, Any]:
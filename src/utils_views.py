@@ -1,24 +1,35 @@
 import json
 import logging
 import os
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Iterable, Optional, TypeVar
 
 import pandas as pd
 import requests
-from dotenv import load_dotenv
 from pandas import DataFrame
 
-load_dotenv()
+from src.cashback import CashbackRules, default_rules
+from src.context import ViewsContext
+from src.memprofile import profiled, stage
+from src.outliers import flag_outliers
+from src.query import OperationsQuery
+from src.resilience import Deadline, LastKnownCache, last_known, resilient_get
 
-API_KEY = os.getenv("API_KEY")
-API_KEY_STOCKS = os.getenv("API_KEY_STOCKS")
-os.chdir("C:/Users/20vik/myproject/Course_project")
+if TYPE_CHECKING:
+    from src.market_store import MarketStore
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Наибольшее число одновременных сетевых запросов _fetch_all
+MAX_FETCH_WORKERS = 8
 
 # Основная конфигурация logging
 logging.basicConfig(
     level=logging.DEBUG,
     format="%(asctime)s - %(filename)s - %(levelname)s - %(message)s",
-    filename="../logs/views.log",
+    filename=os.path.join(os.path.dirname(__file__), "../logs/views.log"),
     encoding="utf-8",  # Запись логов в файл
     filemode="w",
 )  # Перезапись файла при каждом запуске
@@ -29,24 +40,18 @@ get_date_period_logger = logging.getLogger("get_date_period")
 get_path_and_period_logger = logging.getLogger("get_path_and_period")
 get_card_logger = logging.getLogger("get_card")
 get_top_transactions_logger = logging.getLogger("get_top_transactions")
+get_outliers_logger = logging.getLogger("get_outliers")
 get_currency_logger = logging.getLogger("get_currency")
 get_stocks_logger = logging.getLogger("get_stocks")
+fallback_logger = logging.getLogger("fallback")
 
 
-# Работа с датой:
-now = datetime.now()
-# Сегодня
-today = datetime.today().date()
-# Вчера
-yesterday = today - timedelta(days=1)
-
-
-def get_time():
+def get_time(now: Optional[datetime] = None):
     """
     Функция, возвращающая «Доброе утро» / «Добрый день» / «Добрый вечер» /
-    «Доброй ночи» в зависимости от текущего времени.
+    «Доброй ночи» в зависимости от времени now (по умолчанию — текущего).
     """
-    date_hour = datetime.now().hour
+    date_hour = (now or datetime.now()).hour
     if 5 <= date_hour < 12:
         return "Доброе утро"
     elif 12 <= date_hour < 18:
@@ -64,120 +69,312 @@ def get_date_period(date_time: str, date_format: str = "%Y-%m-%d %H:%M:%S") -> l
     return [start_month.strftime("%d.%m.%Y %H:%M:%S"), dt.strftime("%d.%m.%Y %H:%M:%S")]
 
 
-def get_path_and_period(path_file: str, period_date: list) -> DataFrame:
-    """Функция принимает путь к xlsx-файлу и список дат, возвращает таблицу в заданном периоде."""
-    df = pd.read_excel(path_file, sheet_name="Отчет по операциям")
-    df["Дата операции"] = pd.to_datetime(df["Дата операции"], dayfirst=True)
+@profiled
+def load_operations(path_file: str) -> DataFrame:
+    """Функция читает xlsx-файл операций и приводит дату операции к datetime"""
+    with stage("read_excel"):
+        df = pd.read_excel(path_file, sheet_name="Отчет по операциям")
+    with stage("to_datetime"):
+        df["Дата операции"] = pd.to_datetime(df["Дата операции"], dayfirst=True)
+    return df
+
+
+@profiled
+def get_period(df: DataFrame, period_date: list) -> DataFrame:
+    """Функция принимает таблицу операций и список дат, возвращает операции в заданном периоде по времени."""
     start_date = datetime.strptime(period_date[0], "%d.%m.%Y %H:%M:%S")
     last_date = datetime.strptime(period_date[1], "%d.%m.%Y %H:%M:%S")
+    return OperationsQuery(df).between(start_date, last_date).order_by("Дата операции").collect()
+
 
-    filtered_df = df[(df["Дата операции"] >= start_date) & (df["Дата операции"] <= last_date)]
-    sorted_df = filtered_df.sort_values(by="Дата операции", ascending=True)
-    return sorted_df
+@profiled
+def get_path_and_period(path_file: str, period_date: list) -> DataFrame:
+    """Функция принимает путь к xlsx-файлу и список дат, возвращает таблицу в заданном периоде."""
+    return get_period(load_operations(path_file), period_date)
 
 
-def get_card(sorted_df: DataFrame) -> list[dict]:
+@profiled
+def get_card(sorted_df: DataFrame, rules: Optional[CashbackRules] = None) -> list[dict]:
     """
     Функция принимает DataFrame и возвращает список уникальных карт
-    с суммарными показателями по операциям и кэшбэку
-    """
-    card_sorted = sorted_df[["Номер карты", "Сумма операции", "Кэшбэк", "Сумма операции с округлением"]]
-
-    # Создаем словарь для агрегации данных по номерам карт
-    card_dict = {}
-
-    for index, row in card_sorted.iterrows():
-        card_number = row["Номер карты"]
-        last_digits = str(card_number).replace("*", "")
-
-        # Получаем сумму операции с округлением (используем для расчета кэшбэка)
-        total_spent = int(row["Сумма операции с округлением"])
-
-        # Если карта уже встречалась, суммируем значения
-        if card_number in card_dict:
-            card_dict[card_number]["total_spent"] += total_spent
-            # Кэшбэк пересчитываем заново от общей суммы
-            card_dict[card_number]["cashback"] = card_dict[card_number]["total_spent"] / 100
-        else:
-            # Если карта новая, создаем запись
-            card_dict[card_number] = {
-                "last_digits": last_digits,
-                "total_spent": total_spent,
-                "cashback": total_spent / 100,
-            }
+    с суммарными показателями по операциям и кэшбэку.
+    Процент кэшбэка каждой операции берется из правил (по умолчанию — cashback_rules.json).
+    """
+    percent, _ = (rules or default_rules()).percents(sorted_df)
+    # Сумма операции с округлением (используем для расчета кэшбэка) отбрасывает копейки у каждой операции
+    totals = (
+        OperationsQuery(sorted_df.assign(**{"Процент кэшбэка": percent}))
+        .select(["Номер карты", "Сумма операции с округлением", "Процент кэшбэка"])
+        .derive("total_spent", lambda df: df["Сумма операции с округлением"].astype(int))
+        .derive("cashback", lambda df: df["total_spent"] * df["Процент кэшбэка"])
+        .group_by("Номер карты")
+        .aggregate(total_spent=("total_spent", "sum"), cashback=("cashback", "sum"))
+    )
 
-    # Преобразуем словарь в список уникальных карт
-    unique_cards = list(card_dict.values())
+    unique_cards = []
+    for card_number, total_spent, cashback in totals.itertuples(index=False, name=None):
+        unique_cards.append(
+            {
+                "last_digits": str(card_number).replace("*", ""),
+                "total_spent": int(total_spent),
+                "cashback": round(float(cashback) / 100, 2),
+            }
+        )
 
     return unique_cards
 
 
+@profiled
 def get_top_transactions(sorted_df: DataFrame, get_top: int):
     """
     Функция принимает DataFrame и возвращает топ транзакций по сумме платежа
     """
+    top_transactions = (
+        OperationsQuery(sorted_df)
+        .select(["Дата платежа", "Описание", "Категория", "Сумма операции с округлением"])
+        .top_k("Сумма операции с округлением", get_top)
+        .collect()
+    )
     top_pay = []
-    sorted_pay_df = sorted_df.sort_values(by="Сумма операции с округлением", ascending=False)
-    top_transactions = sorted_pay_df.head(get_top)
-    top_transactions_sorted = top_transactions[
-        ["Дата платежа", "Описание", "Категория", "Сумма операции с округлением"]
-    ]
-    for index, row in top_transactions_sorted.iterrows():
+    for date_pay, description, category, amount in top_transactions.itertuples(index=False, name=None):
         transaction = {
-            "date": f"{row["Дата платежа"]}",
-            "amount": f"{row["Сумма операции с округлением"]}",
-            "category": f"{row["Категория"]}",
-            "description": f"{row["Описание"]}",
+            "date": f"{date_pay}",
+            "amount": f"{amount}",
+            "category": f"{category}",
+            "description": f"{description}",
         }
         top_pay.append(transaction)
     return top_pay
 
 
-def get_currency(pathfile: str) -> list[dict]:
+@profiled
+def get_outliers(
+    sorted_df: DataFrame, history: Optional[DataFrame] = None, flags: Optional[Dict[Hashable, Dict[str, Any]]] = None
+) -> list[dict]:
     """
-    Функция для получения курса валют
+    Функция возвращает необычно крупные расходы из sorted_df.
+    Расход сравнивается со статистикой предыдущих расходов своей категории и карты
+    из history (вся выгрузка; по умолчанию — только sorted_df).
+    flags — уже посчитанный flag_outliers по всей выгрузке (тогда history не нужна).
+    """
+    if flags is None:
+        flags = flag_outliers(sorted_df if history is None else history)
+    selected = sorted_df.loc[sorted_df.index.isin(list(flags))]
+    rows = zip(
+        selected.index,
+        selected["Дата платежа"].tolist(),
+        selected["Сумма операции"].tolist(),
+        selected["Категория"].tolist(),
+        selected["Описание"].tolist(),
+        selected["Номер карты"].tolist(),
+    )
+    outliers = []
+    for index, date_pay, amount, category, description, card in rows:
+        flag = flags[index]
+        outliers.append(
+            {
+                "date": f"{date_pay}",
+                "amount": f"{abs(amount)}",
+                "category": f"{category}",
+                "description": f"{description}",
+                "last_digits": str(card).replace("*", ""),
+                "scope": flag["scope"],
+                "z_score": flag["z_score"],
+            }
+        )
+    get_outliers_logger.info(f"Аномальных расходов за период: {len(outliers)}")
+    return outliers
+
+
+def load_user_settings(pathfile: str) -> dict:
+    """
+    Функция для чтения пользовательских настроек (валюты и акции)
     """
     with open(pathfile, "r", encoding="utf-8") as file:
-        data = json.load(file)
-        currency = data["user_currencies"]
-        currency_course = []
-        for i in currency:
-            url = f"https://api.apilayer.com/fixer/convert?to={"RUB"}&from={i}&amount={1}"
-            payload = {}
-            headers = {"apikey": API_KEY}
-            response = requests.get(url, headers=headers, data=payload)
-            result = round(response.json()["result"], 2)
-            course = {"currency": i, "rate": result}
+        data: dict = json.load(file)
+    return data
+
+
+def _http_get(
+    url: str, deadline: Optional[Deadline] = None, ctx: Optional[ViewsContext] = None, **kwargs: Any
+) -> requests.Response:
+    """
+    Выполняет GET-запрос HTTP-клиентом контекста; при переданном бюджете времени —
+    с таймаутами, повторами и автоматическим выключателем контекста
+    """
+    ctx = ctx or ViewsContext.from_env()
+    if deadline is None:
+        response: requests.Response = ctx.http.get(url, **kwargs)
+        return response
+    return resilient_get(url, deadline, ctx.breaker, session=ctx.http, **kwargs)
+
+
+def _fetch_all(fetch: Callable[[T], R], items: Iterable[T]) -> list[R]:
+    """
+    Выполняет сетевые запросы по всем элементам одновременно (по потоку на элемент,
+    не больше MAX_FETCH_WORKERS), порядок результатов совпадает с порядком элементов
+    """
+    items = list(items)
+    if len(items) < 2:
+        return [fetch(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(len(items), MAX_FETCH_WORKERS)) as executor:
+        return list(executor.map(fetch, items))
+
+
+def get_currency_rate(currency: str, deadline: Optional[Deadline] = None, ctx: Optional[ViewsContext] = None) -> float:
+    """
+    Функция для получения курса одной валюты к рублю
+    """
+    ctx = ctx or ViewsContext.from_env()
+    url = f"{ctx.fixer_base_url}/fixer/convert?to={"RUB"}&from={currency}&amount={1}"
+    payload: dict = {}
+    headers = {"apikey": ctx.api_key}
+    response = _http_get(url, deadline, ctx, headers=headers, data=payload)
+    rate: float = round(response.json()["result"], 2)
+    return rate
+
+
+def get_currency_timeseries(
+    currency: str, start: date, end: date, ctx: Optional[ViewsContext] = None
+) -> dict[str, float]:
+    """
+    Функция для получения дневных курсов одной валюты к рублю за период одним запросом.
+    При ответе с ошибкой (не 200 или success: false) вызывает requests.HTTPError.
+    """
+    ctx = ctx or ViewsContext.from_env()
+    url = (
+        f"{ctx.fixer_base_url}/fixer/timeseries?start_date={start}&end_date={end}"
+        f"&base={currency}&symbols={"RUB"}"
+    )
+    headers = {"apikey": ctx.api_key}
+    response = _http_get(url, None, ctx, headers=headers)
+    response.raise_for_status()
+    payload = response.json()
+    if payload.get("success") is False:
+        raise requests.HTTPError(f"Ошибка Fixer для {currency}: {payload.get('error', payload)}", response=response)
+    rates: dict = payload.get("rates", {})
+    return {day: values["RUB"] for day, values in rates.items() if "RUB" in values}
+
+
+def get_currency(pathfile: str, ctx: Optional[ViewsContext] = None) -> list[dict]:
+    """
+    Функция для получения курса валют
+    """
+    ctx = ctx or ViewsContext.from_env()
+    currency = load_user_settings(pathfile)["user_currencies"]
+    rates = _fetch_all(lambda i: get_currency_rate(i, ctx=ctx), currency)
+    currency_course = [{"currency": i, "rate": rate} for i, rate in zip(currency, rates)]
+    return currency_course
+
+
+def get_daily_aggregates(stock: str, start: date, end: date, ctx: Optional[ViewsContext] = None) -> list[dict]:
+    """
+    Функция для получения дневных агрегатов (o, h, l, c, v, t) акции за период.
+    При ответе с ошибкой вызывает requests.HTTPError.
+    """
+    ctx = ctx or ViewsContext.from_env()
+    url = (
+        f"{ctx.stocks_base_url}/v2/aggs/ticker/{stock}"
+        f"/range/1/day/{start}/{end}?adjusted=true&sort=asc&limit=50000&apiKey={ctx.api_key_stocks}"
+    )
+    r = _http_get(url, None, ctx)
+    # Ответ с ошибкой (429, 5xx, status: ERROR) — исключение, а не пустой список баров
+    r.raise_for_status()
+    payload = r.json()
+    if payload.get("status") not in (None, "OK", "DELAYED"):
+        raise requests.HTTPError(f"Ошибка API акций для {stock}: {payload.get('error', payload)}", response=r)
+    results: list[dict] = payload.get("results", [])
+    return results
+
+
+def get_stock_price(stock: str, deadline: Optional[Deadline] = None, ctx: Optional[ViewsContext] = None) -> float:
+    """
+    Функция для получения последней цены закрытия одной акции (за вчера и сегодня по часам контекста)
+    """
+    ctx = ctx or ViewsContext.from_env()
+    today = ctx.today()
+    yesterday = today - timedelta(days=1)
+    url = (
+        f"{ctx.stocks_base_url}/v2/aggs/ticker/{stock}"
+        f"/range/1/day/{yesterday}/{today}?adjusted=true&sort=asc&limit=120&apiKey={ctx.api_key_stocks}"
+    )
+    r = _http_get(url, deadline, ctx)
+    result = r.json()["results"]
+    price_stock: float = result[-1]["c"]
+    return price_stock
+
+
+def get_stocks(
+    filepath: str, store: Optional["MarketStore"] = None, ctx: Optional[ViewsContext] = None
+) -> list[dict]:
+    """
+    Функция для получения стоимости акций.
+    Если передано локальное хранилище, цена берется из него, а из сети догружаются только недостающие дни.
+    """
+    ctx = ctx or ViewsContext.from_env()
+    user_stocks = load_user_settings(filepath)["user_stocks"]
+    if store is not None:
+        # Хранилище догружает и записывает недостающие дни, поэтому опрашивается последовательно
+        prices = [store.latest_close(stock, ctx.today()) for stock in user_stocks]
+    else:
+        prices = _fetch_all(lambda stock: get_stock_price(stock, ctx=ctx), user_stocks)
+    stocks_course = [{"stock": stock, "price": price} for stock, price in zip(user_stocks, prices)]
+    return stocks_course
+
+
+def _with_fallback(key: tuple, fetch: Callable[[], Any], cache: LastKnownCache = last_known) -> Optional[dict]:
+    """
+    Получает значение через fetch; при ошибке возвращает последнее известное
+    значение из cache с отметкой устаревания или None, если его нет
+    """
+    try:
+        value = fetch()
+    except Exception as e:
+        cached = cache.get(key)
+        if cached is None:
+            fallback_logger.error(f"Нет данных для {key}: {e}")
+            return None
+        fallback_logger.warning(f"Для {key} используется сохраненное значение: {e}")
+        return {"value": cached[0], "stale": True, "as_of": cached[1].strftime("%Y-%m-%d %H:%M:%S")}
+    cache.put(key, value)
+    return {"value": value}
+
+
+def get_currency_with_fallback(pathfile: str, deadline: Deadline, ctx: Optional[ViewsContext] = None) -> list[dict]:
+    """
+    Функция для получения курса валют в пределах бюджета времени.
+    Недоступные курсы заменяются сохраненными (с отметкой stale) или пропускаются.
+    """
+    ctx = ctx or ViewsContext.from_env()
+    currency = load_user_settings(pathfile)["user_currencies"]
+
+    def fetch(i: str) -> Optional[dict]:
+        return _with_fallback(("currency", i), lambda: get_currency_rate(i, deadline, ctx), ctx.last_known)
+
+    results = _fetch_all(fetch, currency)
+    currency_course = []
+    for i, result in zip(currency, results):
+        if result is not None:
+            course = {"currency": i, "rate": result.pop("value"), **result}
             currency_course.append(course)
     return currency_course
 
 
-now = datetime.now()
-today = datetime.today().date()
-yesterday = today - timedelta(days=1)
-
-
-def get_stocks(filepath: str) -> list[dict]:
-    """
-    Функция для получения стоимости акций
-    """
-    with open(filepath, "r", encoding="utf-8") as file:
-        data = json.load(file)
-        user_stocks = data["user_stocks"]
-        stocks_course = []
-        for stock in user_stocks:
-            url = (
-                f"https://api.massive.com/v2/aggs/ticker/{stock}"
-                f"/range/1/day/{yesterday}/{today}?adjusted=true&sort=asc&limit=120&apiKey={API_KEY_STOCKS}"
-            )
-            r = requests.get(url)
-            data = r.json()
-            result = data["results"]
-            price = []
-            for i in result:
-                price.append(i)
-            for i in price:
-                price_stock = i["c"]
-            course = {"stock": stock, "price": price_stock}
+def get_stocks_with_fallback(filepath: str, deadline: Deadline, ctx: Optional[ViewsContext] = None) -> list[dict]:
+    """
+    Функция для получения стоимости акций в пределах бюджета времени.
+    Недоступные цены заменяются сохраненными (с отметкой stale) или пропускаются.
+    """
+    ctx = ctx or ViewsContext.from_env()
+    user_stocks = load_user_settings(filepath)["user_stocks"]
+
+    def fetch(stock: str) -> Optional[dict]:
+        return _with_fallback(("stock", stock), lambda: get_stock_price(stock, deadline, ctx), ctx.last_known)
+
+    results = _fetch_all(fetch, user_stocks)
+    stocks_course = []
+    for stock, result in zip(user_stocks, results):
+        if result is not None:
+            course = {"stock": stock, "price": result.pop("value"), **result}
             stocks_course.append(course)
     return stocks_course
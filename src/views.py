@@ -1,39 +1,125 @@
-import json
-import os
-from typing import Any, Dict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Hashable, Optional, Tuple
 
-from utils_views import (get_card, get_currency, get_date_period, get_path_and_period, get_stocks, get_time,
-                         get_top_transactions)
+from pandas import DataFrame
 
-os.chdir("C:/Users/20vik/myproject/Course_project")
+from src.context import ViewsContext
+from src.outliers import flag_outliers
+from src.resilience import DEFAULT_BUDGET, Deadline
+from src.serializers import dumps
+from src.utils_views import (get_card, get_currency, get_currency_with_fallback, get_date_period, get_outliers,
+                             get_period, get_stocks, get_stocks_with_fallback, get_time, get_top_transactions,
+                             load_operations)
 
 
-def main_views(date_time: str) -> Dict[str, Any]:
+def build_data_sections(
+    sorted_df: DataFrame,
+    history: Optional[DataFrame] = None,
+    now: Optional[datetime] = None,
+    flags: Optional[Dict[Hashable, Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
     """
-    Функция, принимающая на вход строку с датой и временем в формате
-    YYYY-MM-DD HH:MM:SS и возвращающую JSON-ответ.
+    Функция собирает разделы страницы «Главная», которые считаются по таблице операций.
+    history — вся выгрузка, по которой считается статистика для раздела outliers,
+    now — время запроса для приветствия (по умолчанию — текущее),
+    flags — уже посчитанный по всей выгрузке flag_outliers (тогда history не нужна).
     """
-    # Работа с данными
-    time_period = get_date_period(date_time)
-    sorted_df = get_path_and_period("../data/operations.xlsx", time_period)
-
     # Приветствие
-    greeting = get_time()
+    greeting = get_time(now)
     # Информация по карте
     cards = get_card(sorted_df)
     # Топ транзакций
     top_transactions = get_top_transactions(sorted_df, 5)
-    # Курс валют
-    currency = get_currency("../user_settings.json")
-    # Стоимость акций
-    stocks = get_stocks("../user_settings.json")
-    data = {
+    # Необычно крупные расходы
+    outliers = get_outliers(sorted_df, history, flags)
+    return {
         "greeting": greeting,
         "cards": cards,
         "top_transactions": top_transactions,
-        "currency_rates": currency,
-        "stock_prices": stocks,
+        "outliers": outliers,
     }
 
-    json_data = json.dumps(data, ensure_ascii=False, indent=4)
+
+def build_views_data(
+    sorted_df: DataFrame,
+    currency: list[dict],
+    stocks: list[dict],
+    history: Optional[DataFrame] = None,
+    flags: Optional[Dict[Hashable, Dict[str, Any]]] = None,
+    now: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    Функция собирает данные для страницы «Главная» из отфильтрованной таблицы
+    и уже полученных курсов валют и стоимости акций (now — время для приветствия,
+    см. build_data_sections).
+    """
+    sections = build_data_sections(sorted_df, history, now, flags)
+    return {**sections, "currency_rates": currency, "stock_prices": stocks}
+
+
+def start_market_fetches(
+    executor: ThreadPoolExecutor, ctx: ViewsContext, deadline: Optional[Deadline]
+) -> Tuple["Future[list[dict]]", "Future[list[dict]]"]:
+    """
+    Запускает в фоне получение курсов валют и стоимости акций, чтобы сетевые
+    запросы шли одновременно с чтением и обработкой таблицы операций.
+    """
+    if deadline is not None:
+        return (
+            executor.submit(get_currency_with_fallback, ctx.settings_path, deadline, ctx),
+            executor.submit(get_stocks_with_fallback, ctx.settings_path, deadline, ctx),
+        )
+    return (
+        executor.submit(get_currency, ctx.settings_path, ctx=ctx),
+        executor.submit(get_stocks, ctx.settings_path, ctx=ctx),
+    )
+
+
+def load_context_operations(ctx: ViewsContext) -> Tuple[DataFrame, Dict[Hashable, Dict[str, Any]]]:
+    """
+    Таблица операций контекста и ее аномалии (flag_outliers по всей выгрузке):
+    из кэша контекста, если он задан (аномалии считаются один раз на версию файла),
+    иначе чтением файла.
+    """
+    if ctx.operations_cache is not None:
+        operations = ctx.operations_cache.get(ctx.operations_path, load_operations)
+        return operations, ctx.operations_cache.outliers(ctx.operations_path, load_operations)
+    operations = load_operations(ctx.operations_path)
+    return operations, flag_outliers(operations)
+
+
+def main_views(
+    date_time: str,
+    budget: Optional[float] = DEFAULT_BUDGET,
+    compact: bool = False,
+    ctx: Optional[ViewsContext] = None,
+) -> str:
+    """
+    Функция, принимающая на вход строку с датой и временем в формате
+    YYYY-MM-DD HH:MM:SS и возвращающую JSON-ответ.
+    Внешние запросы укладываются в общий бюджет budget секунд; при нехватке времени
+    или сбоях курсы и цены берутся из последних известных значений с отметкой stale.
+    С budget=None запросы выполняются без ограничений.
+    compact=True возвращает компактный JSON без отступов.
+    Курсы и цены запрашиваются в фоне, пока читается и обрабатывается таблица,
+    поэтому время ответа — максимум из времени расчета и сетевых запросов, а не их сумма.
+    Пути, ключи API, часы и кэши берутся из ctx (по умолчанию — ViewsContext.from_env());
+    глобального состояния функция не меняет, поэтому ее можно вызывать из нескольких потоков.
+    """
+    ctx = ctx or ViewsContext.from_env()
+    deadline = Deadline(budget) if budget is not None else None
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        # Курс валют и стоимость акций
+        currency_future, stocks_future = start_market_fetches(executor, ctx, deadline)
+        # Работа с данными
+        time_period = get_date_period(date_time)
+        operations, flags = load_context_operations(ctx)
+        sorted_df = get_period(operations, time_period)
+        data = build_data_sections(sorted_df, now=ctx.clock(), flags=flags)
+        # Ожидание сетевых запросов — только после расчета
+        data["currency_rates"] = currency_future.result()
+        data["stock_prices"] = stocks_future.result()
+
+    json_data = dumps(data, indent=None if compact else 4)
     return json_data
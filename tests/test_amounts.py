@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.amounts import REJECTION_EXAMPLES, clean_amounts
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("-1712 ₽", -1712.0),
+        ("850 RUB", 850.0),
+        (" 1 234 ", 1234.0),
+        ("1 234,50", 1234.5),
+        ("1 234,50", 1234.5),
+        ("-1 234,5 руб.", -1234.5),
+        ("12,5", 12.5),
+        ("1,234.50", 1234.5),
+        ("1.234,50", 1234.5),
+        ("1,234,567", 1234567.0),
+        ("1.234.567", 1234567.0),
+        ("1'000", 1000.0),
+        ("−100", -100.0),
+        (-3, -3.0),
+        (2.5, 2.5),
+    ],
+)
+def test_clean_amounts_formats(value, expected):
+    """Строки с разделителями разрядов, десятичной запятой и валютой приводятся к числу"""
+    clean, report = clean_amounts([value])
+
+    assert clean.tolist() == [expected]
+    assert report["rejected"] == 0
+
+
+def test_clean_amounts_rejection_report():
+    """Некорректные суммы получают NaN и попадают в отчет с причиной"""
+    clean, report = clean_amounts(["-1712", "не число", "", None, "inf", 100])
+
+    assert clean.iloc[[0, 5]].tolist() == [-1712.0, 100.0]
+    assert clean.iloc[1:5].isna().all()
+    assert report["total"] == 6
+    assert report["rejected"] == 4
+    assert report["by_reason"] == {"empty": 2, "not_a_number": 1, "not_finite": 1}
+    assert [example["index"] for example in report["examples"]] == [1, 2, 3, 4]
+    assert report["examples"][0] == {"index": 1, "value": "не число", "reason": "not_a_number"}
+
+
+def test_clean_amounts_examples_are_limited():
+    _, report = clean_amounts(["x"] * (REJECTION_EXAMPLES + 3))
+
+    assert report["rejected"] == REJECTION_EXAMPLES + 3
+    assert len(report["examples"]) == REJECTION_EXAMPLES
+
+
+def test_clean_amounts_keeps_index_and_dtypes():
+    """Индекс колонки сохраняется, целочисленная колонка остается int64"""
+    integers = pd.Series([-100, 200], index=[10, 20], name="Сумма операции")
+    strings = pd.Series(["-100,5", "200"], index=[10, 20], name="Сумма операции")
+
+    assert clean_amounts(integers)[0].dtype == np.int64
+    clean, _ = clean_amounts(strings)
+    assert clean.dtype == np.float64
+    assert clean.index.tolist() == [10, 20]
+    assert clean.name == "Сумма операции"
+
+
+def test_clean_amounts_repeated_strings():
+    """Повторяющиеся строки разбираются один раз, результат — для каждой строки"""
+    clean, _ = clean_amounts(["1 000,5 ₽", "20", "1 000,5 ₽"] * 1000)
+
+    assert clean.tolist() == [1000.5, 20.0, 1000.5] * 1000
@@ -0,0 +1,161 @@
+import json
+import threading
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+import requests
+
+from src.batch import prefetch_market_data, read_manifest, run_batch, run_job
+from src.resilience import Deadline
+
+
+@pytest.fixture
+def batch_files(tmp_path):
+    """Создает файл операций, настройки и манифест из двух заданий"""
+    operations = tmp_path / "operations.xlsx"
+    pd.DataFrame(
+        {
+            "Дата операции": ["10.03.2024 12:00:00", "12.03.2024 09:30:00", "05.04.2024 10:00:00"],
+            "Дата платежа": ["11.03.2024", "13.03.2024", "02.04.2024"],
+            "Номер карты": ["*7197", "*7197", "*5091"],
+            "Сумма операции": [-160.89, -64.0, -118.12],
+            "Кэшбэк": [None, None, None],
+            "Категория": ["Супермаркеты", "Супермаркеты", "Аптеки"],
+            "Описание": ["Колхоз", "Магнит", "Аптека"],
+            "Сумма операции с округлением": [160.89, 64.0, 118.12],
+        }
+    ).to_excel(operations, sheet_name="Отчет по операциям", index=False)
+
+    settings = tmp_path / "user_settings.json"
+    settings.write_text(json.dumps({"user_currencies": ["USD", "EUR"], "user_stocks": ["AAPL"]}), encoding="utf-8")
+
+    manifest = tmp_path / "manifest.jsonl"
+    jobs = [
+        {"operations": str(operations), "settings": str(settings), "date_time": "2024-03-20 15:00:00"},
+        {"operations": str(operations), "settings": str(settings), "date_time": "2024-04-20 15:00:00"},
+    ]
+    manifest.write_text("\n".join(json.dumps(job) for job in jobs) + "\n", encoding="utf-8")
+    return tmp_path, manifest
+
+
+def test_read_manifest(batch_files):
+    """Манифест читается построчно"""
+    _, manifest = batch_files
+    jobs = read_manifest(str(manifest))
+
+    assert len(jobs) == 2
+    assert jobs[0]["date_time"] == "2024-03-20 15:00:00"
+
+
+def test_read_manifest_missing_fields(tmp_path):
+    """Задание без обязательных полей приводит к ошибке"""
+    manifest = tmp_path / "manifest.jsonl"
+    manifest.write_text('{"operations": "a.xlsx"}\n', encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        read_manifest(str(manifest))
+
+
+def test_prefetch_market_data_once_per_symbol(batch_files):
+    """Рыночные данные загружаются один раз на каждую валюту и акцию"""
+    _, manifest = batch_files
+    jobs = read_manifest(str(manifest))
+
+    with patch("src.batch.get_currency_rate", return_value=90.0) as mock_rate:
+        with patch("src.batch.get_stock_price", return_value=175.5) as mock_price:
+            market = prefetch_market_data(jobs)
+
+    assert mock_rate.call_count == 2
+    assert mock_price.call_count == 1
+    assert market == {"currencies": {"USD": 90.0, "EUR": 90.0}, "stocks": {"AAPL": 175.5}}
+
+
+def test_prefetch_market_data_concurrent_with_deadline(batch_files):
+    """Все запросы идут одновременно в общем бюджете времени; ошибка одного не мешает остальным"""
+    _, manifest = batch_files
+    jobs = read_manifest(str(manifest))
+    # Барьер пропускает запросы, только когда все три выполняются одновременно
+    barrier = threading.Barrier(3, timeout=5)
+    deadlines = []
+
+    def rate(currency, deadline, ctx):
+        barrier.wait()
+        deadlines.append(deadline)
+        if currency == "EUR":
+            raise requests.Timeout("медленный сервис")
+        return 90.0
+
+    def price(stock, deadline, ctx):
+        barrier.wait()
+        deadlines.append(deadline)
+        return 175.5
+
+    with patch("src.batch.get_currency_rate", side_effect=rate), patch("src.batch.get_stock_price", side_effect=price):
+        market = prefetch_market_data(jobs, budget=5)
+
+    assert market == {"currencies": {"USD": 90.0, "EUR": None}, "stocks": {"AAPL": 175.5}}
+    assert len(deadlines) == 3
+    assert all(isinstance(deadline, Deadline) and deadline is deadlines[0] for deadline in deadlines)
+
+
+def test_run_job(batch_files):
+    """Задание формирует данные страницы «Главная» из общих рыночных данных"""
+    _, manifest = batch_files
+    job = read_manifest(str(manifest))[0]
+    market = {"currencies": {"USD": 90.0, "EUR": 100.0}, "stocks": {"AAPL": 175.5}}
+
+    record = run_job(job, market)
+
+    assert "error" not in record
+    assert record["elapsed"] >= 0
+    assert record["result"]["cards"] == [{"last_digits": "7197", "total_spent": 224, "cashback": 2.24}]
+    assert record["result"]["currency_rates"] == [
+        {"currency": "USD", "rate": 90.0},
+        {"currency": "EUR", "rate": 100.0},
+    ]
+    assert record["result"]["stock_prices"] == [{"stock": "AAPL", "price": 175.5}]
+
+
+@pytest.mark.parametrize(
+    "date_time, greeting", [("2024-03-20 08:00:00", "Доброе утро"), ("2024-03-20 19:00:00", "Добрый вечер")]
+)
+def test_run_job_greeting_uses_job_time(batch_files, date_time, greeting):
+    """Приветствие строится по времени задания, а не по текущему"""
+    _, manifest = batch_files
+    job = {**read_manifest(str(manifest))[0], "date_time": date_time}
+
+    record = run_job(job, {"currencies": {}, "stocks": {}})
+
+    assert record["result"]["greeting"] == greeting
+
+
+def test_run_job_error(tmp_path):
+    """Ошибка в задании не прерывает пакет, а попадает в результат"""
+    job = {"operations": str(tmp_path / "missing.xlsx"), "settings": str(tmp_path / "missing.json"), "date_time": ""}
+
+    record = run_job(job, {"currencies": {}, "stocks": {}})
+
+    assert "error" in record
+    assert "result" not in record
+
+
+def test_run_batch(batch_files):
+    """Пакет пишет по строке JSONL на задание и возвращает сводку"""
+    tmp_path, manifest = batch_files
+    output = tmp_path / "result.jsonl"
+
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"result": 90.0, "results": [{"c": 175.5}]}
+
+    with patch("requests.get", return_value=mock_response) as mock_get:
+        summary = run_batch(str(manifest), str(output), max_workers=2)
+
+    lines = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert mock_get.call_count == 3
+    assert len(lines) == 2
+    assert [line["date_time"] for line in lines] == ["2024-03-20 15:00:00", "2024-04-20 15:00:00"]
+    assert lines[1]["result"]["cards"][0]["last_digits"] == "5091"
+    assert summary["jobs"] == 2
+    assert summary["failed"] == 0
+    assert summary["jobs_per_second"] > 0
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.card_shards import (card_partials, card_shard_numbers, card_statistics, get_card_partitioned,
+                             merge_card_partials, partition_by_card)
+from src.cashback import CashbackRule, CashbackRules
+from src.utils_views import get_card, get_top_transactions
+
+
+@pytest.fixture
+def operations():
+    """Операции по 40 картам (и без карты) с повторяющимися суммами"""
+    rng = np.random.default_rng(7)
+    rows = 2000
+    cards = pd.Series(rng.choice([f"*{number:04d}" for number in range(40)] + [""], size=rows))
+    return pd.DataFrame(
+        {
+            "Дата операции": pd.Timestamp("2024-01-01") + pd.to_timedelta(np.arange(rows) * 3600, unit="s"),
+            "Дата платежа": "02.01.2024",
+            "Номер карты": cards.mask(cards == "", np.nan),
+            "Сумма операции с округлением": rng.integers(1, 30, rows) * 100.5,
+            "MCC": rng.choice([5411.0, 5812.0, np.nan], size=rows),
+            "Категория": rng.choice(["Супермаркеты", "Рестораны", "Такси"], size=rows),
+            "Описание": rng.choice(["Магнит", "Колхоз", "Яндекс Такси"], size=rows),
+        }
+    )
+
+
+def test_partition_keeps_cards_together(operations):
+    """Все операции карты попадают в одну часть, строки частей идут в исходном порядке"""
+    parts = partition_by_card(operations, 4)
+
+    positions = np.concatenate([part_positions for _, part_positions in parts])
+    assert sorted(positions.tolist()) == list(range(len(operations)))
+    for shard, part_positions in parts:
+        assert (np.diff(part_positions) > 0).all()
+        pd.testing.assert_frame_equal(shard, operations.iloc[part_positions])
+    cards_by_part = [set(shard["Номер карты"].astype(str)) for shard, _ in parts]
+    assert sum(len(cards) for cards in cards_by_part) == len(set.union(*cards_by_part))
+
+
+def test_shard_numbers_are_stable(operations):
+    """Номер части зависит только от номера карты"""
+    numbers = card_shard_numbers(operations["Номер карты"], 8)
+    reversed_numbers = card_shard_numbers(operations["Номер карты"][::-1], 8)
+
+    assert numbers.tolist() == reversed_numbers[::-1].tolist()
+    assert set(numbers.tolist()) <= set(range(8))
+
+
+@pytest.mark.parametrize("shards, max_workers", [(1, 1), (5, 1), (3, 2)])
+def test_get_card_partitioned_matches_get_card(operations, shards, max_workers):
+    """Результат совпадает с get_card при любом числе частей и процессов"""
+    assert get_card_partitioned(operations, shards, max_workers) == get_card(operations)
+
+
+def test_get_card_partitioned_with_rules(operations):
+    """Правила кэшбэка с акциями применяются так же, как в get_card"""
+    rules = CashbackRules(
+        [
+            CashbackRule(3.3, mcc=[5411]),
+            CashbackRule(7, categories=["Такси"], start=pd.Timestamp("2024-01-20").date()),
+        ]
+    )
+
+    assert get_card_partitioned(operations, 4, 1, rules) == get_card(operations, rules)
+
+
+def test_card_statistics_counts_and_top(operations):
+    """Число операций и топ операций каждой карты"""
+    statistics = card_statistics(operations, shards=4, max_workers=1, top=3)
+
+    for card in statistics[:5]:
+        card_rows = operations[operations["Номер карты"] == f"*{card['last_digits']}"]
+        assert card["operations"] == len(card_rows)
+        assert card["top_transactions"] == get_top_transactions(card_rows, 3)
+
+
+def test_merge_does_not_depend_on_order(operations):
+    """Объединение частичных показателей не зависит от порядка частей"""
+    rules = CashbackRules()
+    partials = [card_partials(shard, positions, rules) for shard, positions in partition_by_card(operations, 6)]
+
+    merged = merge_card_partials(partials)
+    merged_reversed = merge_card_partials(partials[::-1])
+
+    pd.testing.assert_frame_equal(merged["totals"], merged_reversed["totals"])
+    pd.testing.assert_frame_equal(merged["top"].sort_index(), merged_reversed["top"].sort_index())
+
+
+def test_card_statistics_empty():
+    """Пустая таблица — пустой список"""
+    empty = pd.DataFrame(columns=["Номер карты", "Сумма операции с округлением"])
+
+    assert card_statistics(empty, max_workers=1) == []
+
+
+def test_card_statistics_without_description(operations):
+    """Без колонки «Описание» топ строится из остальных колонок"""
+    statistics = card_statistics(operations.drop(columns="Описание"), shards=3, max_workers=1, top=2)
+    expected = card_statistics(operations, shards=3, max_workers=1, top=2)
+
+    for card, full in zip(statistics, expected):
+        assert card["top_transactions"] == [
+            {key: value for key, value in transaction.items() if key != "description"}
+            for transaction in full["top_transactions"]
+        ]
+
+
+def test_card_statistics_requires_card_and_amount(operations):
+    """Без номера карты или суммы с округлением — понятная ошибка"""
+    with pytest.raises(ValueError, match="Номер карты"):
+        card_statistics(operations.drop(columns="Номер карты"), max_workers=1)
@@ -0,0 +1,131 @@
+import datetime
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.cashback import CashbackRule, CashbackRules, load_cashback_rules
+from src.reports import category_spending
+from src.utils_views import get_card
+
+RULES = {
+    "default_percent": 1,
+    "rules": [
+        {"name": "Акция в супермаркетах", "percent": 10, "mcc": [5411], "start": "2024-02-01", "end": "2024-02-29"},
+        {"percent": 5, "mcc": [5411, 5499]},
+        {"percent": 3, "category": ["Рестораны"], "card": ["*2222"], "bonus_percent": 2},
+        {"percent": 7, "start": "2024-03-10"},
+        {"percent": 0, "mcc": [6011]},
+    ],
+}
+
+
+@pytest.fixture
+def rules():
+    return CashbackRules.from_dict(RULES)
+
+
+def _random_operations(size, seed=0):
+    generator = np.random.default_rng(seed)
+    mcc = generator.choice([5411, 5499, 5812, 6011, np.nan], size)
+    return pd.DataFrame(
+        {
+            "Дата операции": pd.Timestamp("2024-01-01") + pd.to_timedelta(generator.integers(0, 120, size), "D"),
+            "MCC": mcc,
+            "Категория": generator.choice(["Супермаркеты", "Рестораны", None], size),
+            "Номер карты": generator.choice(["*1111", "*2222", None], size),
+            "Сумма операции": -generator.integers(1, 5000, size).astype(float),
+        }
+    )
+
+
+def test_vectorized_matches_rule_by_rule(rules):
+    """Векторный расчет совпадает с проверкой правил по одной операции"""
+    operations = _random_operations(2000)
+
+    percent, bonus_percent = rules.percents(operations)
+
+    expected = [
+        rules.percent_for(mcc, category, card, moment.date())
+        for moment, mcc, category, card in zip(
+            operations["Дата операции"], operations["MCC"], operations["Категория"], operations["Номер карты"]
+        )
+    ]
+    assert percent.tolist() == [row[0] for row in expected]
+    assert bonus_percent.tolist() == [row[1] for row in expected]
+
+
+@pytest.mark.parametrize(
+    "day, mcc, category, card, expected",
+    [
+        ("2024-02-15", 5411, "Супермаркеты", "*1111", 10.0),
+        ("2024-03-01", 5411, "Супермаркеты", "*1111", 5.0),
+        ("2024-02-15", 5812, "Рестораны", "*2222", 3.0),
+        ("2024-02-15", 5812, "Рестораны", "*1111", 1.0),
+        ("2024-03-10", 5812, "Рестораны", "*1111", 7.0),
+        ("2024-03-10", 6011, None, "*1111", 7.0),
+        ("2024-01-10", 6011, None, "*1111", 0.0),
+    ],
+)
+def test_first_matching_rule_wins(rules, day, mcc, category, card, expected):
+    operations = pd.DataFrame(
+        {"Дата операции": [pd.Timestamp(day)], "MCC": [mcc], "Категория": [category], "Номер карты": [card]}
+    )
+
+    assert rules.percents(operations)[0].tolist() == [expected]
+
+
+def test_missing_columns_use_default():
+    """Без колонок MCC и даты правила с условиями по ним не срабатывают"""
+    rules = CashbackRules([CashbackRule(5, mcc=[5411]), CashbackRule(7, start=datetime.date(2024, 1, 1))], 2)
+
+    percent, _ = rules.percents(pd.DataFrame({"Сумма операции": [-100.0, -50.0]}))
+
+    assert percent.tolist() == [2.0, 2.0]
+
+
+def test_load_cashback_rules(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(RULES), encoding="utf-8")
+
+    rules = load_cashback_rules(str(path))
+
+    assert [rule.percent for rule in rules.rules] == [10.0, 5.0, 3.0, 7.0, 0.0]
+    assert rules.rules[0].end == datetime.date(2024, 2, 29)
+    assert load_cashback_rules(str(tmp_path / "нет.json")).rules == []
+
+
+def test_get_card_uses_rules(rules):
+    operations = pd.DataFrame(
+        {
+            "Дата операции": pd.to_datetime(["2024-02-10", "2024-02-11", "2024-01-05"]),
+            "Номер карты": ["*1111", "*1111", "*2222"],
+            "MCC": [5411, 5812, 5812],
+            "Категория": ["Супермаркеты", "Рестораны", "Рестораны"],
+            "Сумма операции с округлением": [1000.5, 200.0, 300.0],
+        }
+    )
+
+    cards = get_card(operations, rules)
+
+    assert cards == [
+        {"last_digits": "1111", "total_spent": 1200, "cashback": 102.0},
+        {"last_digits": "2222", "total_spent": 300, "cashback": 9.0},
+    ]
+
+
+def test_category_spending_uses_rules(sample_transactions, rules):
+    """Указанный в выгрузке кэшбэк сохраняется, пустой считается по правилам"""
+    transactions = sample_transactions.assign(
+        **{"Дата операции": pd.to_datetime(sample_transactions["Дата операции"], dayfirst=True), "MCC": 5411}
+    )
+    default = category_spending(transactions, "Супермаркеты", datetime.date(2023, 12, 1), datetime.date(2024, 4, 30))
+
+    result = category_spending(
+        transactions, "Супермаркеты", datetime.date(2023, 12, 1), datetime.date(2024, 4, 30), rules=rules
+    )
+
+    given = transactions.loc[result.index, "Кэшбэк"].notna().to_numpy()
+    assert (result["Кэшбэк"][given] == default["Кэшбэк"][given]).all()
+    assert (result["Кэшбэк"][~given] > default["Кэшбэк"][~given]).all()
@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+
+from src.category_report import SUMMARY_SHEET, build_category_report, sheet_names
+from src.reports import spending_by_category
+
+
+def test_sheet_names():
+    """Запрещенные символы заменяются, длинные и повторяющиеся названия различаются"""
+    long_name = "Очень длинное название категории расходов"
+
+    names = sheet_names(["Дом/ремонт", long_name, long_name.upper(), "итоги"])
+
+    assert names[0] == "Дом_ремонт"
+    assert names[1] == long_name[:31]
+    assert names[2] == long_name.upper()[:27] + " (2)"
+    assert names[3] == "итоги (2)"
+    assert all(len(name) <= 31 for name in names)
+
+
+def test_build_category_report(sample_transactions, tmp_path):
+    """Каждая категория на своем листе, первым листом — итоги"""
+    path = str(tmp_path / "report.xlsx")
+
+    report = build_category_report(sample_transactions, path, date="2024-04-15", max_workers=2)
+
+    sheets = pd.read_excel(path, sheet_name=None)
+    assert list(sheets) == [SUMMARY_SHEET, "Рестораны", "Супермаркеты"]
+    assert report["categories"] == 2
+    assert report["rows"] == len(sheets["Рестораны"]) + len(sheets["Супермаркеты"])
+
+    expected = spending_by_category(sample_transactions.copy(), "Рестораны", "2024-04-15")
+    assert len(sheets["Рестораны"]) == len(expected)
+    assert list(sheets["Рестораны"]["Сумма операции"]) == list(expected["Сумма операции"])
+
+    summary = sheets[SUMMARY_SHEET].set_index("Категория")
+    assert summary.loc["Рестораны", "Операций"] == len(expected)
+    assert summary.loc["Рестораны", "Сумма расходов"] == pytest.approx(expected["Сумма операции"].abs().sum())
+    assert summary.loc["Рестораны", "Кэшбэк"] == pytest.approx(expected["Кэшбэк"].sum())
+
+
+def test_build_category_report_selected(sample_transactions, tmp_path):
+    """Можно выбрать категории, в том числе без операций"""
+    path = str(tmp_path / "report.xlsx")
+
+    report = build_category_report(sample_transactions, path, ["Аптеки"], "2024-04-15", max_workers=1)
+
+    sheets = pd.read_excel(path, sheet_name=None)
+    assert list(sheets) == [SUMMARY_SHEET, "Аптеки"]
+    assert sheets["Аптеки"].empty
+    assert report["rows"] == 0
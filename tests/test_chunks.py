@@ -0,0 +1,31 @@
+import pandas as pd
+
+from src.chunks import iter_csv_chunks, iter_excel_chunks
+
+
+def test_excel_chunks_match_read_excel(sample_transactions, tmp_path):
+    """Порции листа совпадают с pd.read_excel, индексы идут подряд"""
+    path = tmp_path / "operations.xlsx"
+    sample_transactions.to_excel(path, sheet_name="Отчет по операциям", index=False)
+
+    chunks = list(iter_excel_chunks(str(path), chunk_size=3))
+
+    assert [len(chunk) for chunk in chunks] == [3, 3, 2]
+    pd.testing.assert_frame_equal(pd.concat(chunks), pd.read_excel(path, sheet_name="Отчет по операциям"))
+
+
+def test_excel_chunks_empty_sheet(tmp_path):
+    path = tmp_path / "empty.xlsx"
+    pd.DataFrame().to_excel(path, sheet_name="Отчет по операциям", index=False)
+
+    assert list(iter_excel_chunks(str(path))) == []
+
+
+def test_csv_chunks(sample_transactions, tmp_path):
+    path = tmp_path / "operations.csv"
+    sample_transactions.to_csv(path, index=False)
+
+    chunks = list(iter_csv_chunks(str(path), chunk_size=5))
+
+    assert [len(chunk) for chunk in chunks] == [5, 3]
+    assert list(chunks[1].index) == [5, 6, 7]
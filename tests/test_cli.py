@@ -0,0 +1,153 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from src.cli import load_context, main, profile_summary, read_queries, run_query
+from src.outliers import flag_outliers
+from src.reports import spending_by_category
+
+
+@pytest.fixture
+def operations(sample_transactions):
+    """Операции с колонкой «Сумма операции с округлением», как в выгрузке банка"""
+    df = sample_transactions.copy()
+    df["Сумма операции с округлением"] = df["Сумма операции"].abs()
+    return df
+
+
+@pytest.fixture
+def settings_path(tmp_path):
+    """Настройки без валют и акций, чтобы не обращаться к сети"""
+    path = tmp_path / "user_settings.json"
+    path.write_text(json.dumps({"user_currencies": [], "user_stocks": []}), encoding="utf-8")
+    return str(path)
+
+
+def _write_queries(path, queries):
+    path.write_text("\n".join(json.dumps(query, ensure_ascii=False) for query in queries) + "\n\n", encoding="utf-8")
+    return str(path)
+
+
+def test_read_queries(tmp_path):
+    queries = [
+        {"type": "views", "date_time": "2024-03-20 12:00:00"},
+        {"type": "invest", "month": "2024-03", "limit": 50},
+    ]
+
+    assert read_queries(_write_queries(tmp_path / "q.jsonl", queries)) == queries
+
+
+@pytest.mark.parametrize(
+    "query",
+    [{"type": "unknown"}, {"date_time": "2024-03-20 12:00:00"}, {"type": "invest", "month": "2024-03"}],
+)
+def test_read_queries_invalid(tmp_path, query):
+    """Неизвестный тип и недостающие поля — ошибка с номером строки"""
+    with pytest.raises(ValueError, match="Строка 1"):
+        read_queries(_write_queries(tmp_path / "q.jsonl", [query]))
+
+
+def test_run_query_types(operations, settings_path):
+    """Все типы запросов выполняются над общими данными"""
+    queries = [
+        {"type": "views", "date_time": "2024-03-20 12:00:00"},
+        {"type": "report", "category": "Рестораны", "date": "2024-04-15"},
+        {"type": "invest", "month": "2024-03", "limit": 50},
+    ]
+    context = load_context(operations, queries, settings_path)
+
+    views, report, invest = [run_query(query, context) for query in queries]
+
+    # Период с 01.03 12:00 по 20.03 12:00: операция 01.03 в 09:00 в него не входит
+    assert [card["last_digits"] for card in views["result"]["cards"]] == ["12345678"]
+    assert views["result"]["currency_rates"] == []
+    expected = spending_by_category(operations.copy(), "Рестораны", "2024-04-15")
+    assert [row["Сумма операции"] for row in report["result"]] == list(expected["Сумма операции"])
+    assert invest["result"]["total_investment"] == 50.0
+    assert all(record["elapsed"] >= 0 for record in (views, report, invest))
+
+
+def test_load_context_flags_outliers_once(operations, settings_path):
+    """Аномалии считаются один раз при загрузке и только если они нужны запросам"""
+    queries = [
+        {"type": "views", "date_time": "2024-03-20 12:00:00"},
+        {"type": "report", "category": "Рестораны", "date": "2024-04-15"},
+    ]
+    invest = [{"type": "invest", "month": "2024-03", "limit": 50}]
+
+    with patch("src.cli.flag_outliers", wraps=flag_outliers) as flag:
+        context = load_context(operations, queries, settings_path)
+        for query in queries * 2:
+            assert "error" not in run_query(query, context)
+        assert flag.call_count == 1
+        assert load_context(operations, invest, settings_path)["outliers"] == {}
+        assert flag.call_count == 1
+    assert context["outliers"] == flag_outliers(context["operations"])
+
+
+def test_load_context_without_budget(operations, settings_path):
+    """С budget=None курсы и цены запрашиваются без бюджета времени"""
+    queries = [{"type": "views", "date_time": "2024-03-20 12:00:00"}]
+
+    with (
+        patch("src.cli.get_currency", return_value=[{"currency": "USD", "rate": 90.0}]) as get_currency,
+        patch("src.cli.get_stocks", return_value=[]) as get_stocks,
+    ):
+        context = load_context(operations, queries, settings_path, budget=None)
+
+    get_currency.assert_called_once_with(settings_path)
+    get_stocks.assert_called_once_with(settings_path)
+    assert context["currency"] == [{"currency": "USD", "rate": 90.0}]
+
+
+def test_run_query_error(operations, settings_path):
+    """Ошибка в запросе не прерывает пакет"""
+    query = {"type": "views", "date_time": "не дата"}
+    record = run_query(query, load_context(operations, [query], settings_path))
+
+    assert "error" in record
+    assert "result" not in record
+
+
+def test_profile_summary():
+    timings = [
+        {"type": "report", "elapsed": 0.5, "failed": False},
+        {"type": "report", "elapsed": 1.5, "failed": True},
+        {"type": "invest", "elapsed": 0.1, "failed": False},
+    ]
+
+    summary = profile_summary(timings)
+
+    assert summary["report"] == {"count": 2, "failed": 1, "total": 2.0, "max": 1.5, "mean": 1.0}
+    assert summary["invest"]["count"] == 1
+
+
+def test_main_writes_results_in_order(operations, settings_path, tmp_path, capsys):
+    """Результаты пишутся в порядке запросов, --profile выводит сводку"""
+    operations_path = tmp_path / "operations.xlsx"
+    operations.to_excel(operations_path, sheet_name="Отчет по операциям", index=False)
+    queries = [{"type": "invest", "month": month, "limit": 10} for month in ["2024-01", "2024-02", "2024-03"]]
+    queries.append({"type": "report", "category": "Супермаркеты", "date": "2024-04-15"})
+    output_path = tmp_path / "out.jsonl"
+
+    summary = main(
+        [
+            _write_queries(tmp_path / "q.jsonl", queries),
+            str(output_path),
+            "--operations",
+            str(operations_path),
+            "--settings",
+            settings_path,
+            "--workers",
+            "3",
+            "--profile",
+        ]
+    )
+
+    records = [json.loads(line) for line in output_path.read_text(encoding="utf-8").splitlines()]
+    assert [record["query"] for record in records] == queries
+    assert summary["queries"] == 4
+    assert summary["failed"] == 0
+    assert set(summary["profile"]) == {"invest", "report"}
+    assert json.loads(capsys.readouterr().err)["queries"] == 4
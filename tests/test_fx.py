@@ -0,0 +1,100 @@
+from datetime import date
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.fx import convert_to_rub
+from src.market_store import MarketStore
+
+RATES = {
+    "USD": {"2024-02-28": 90.0, "2024-03-01": 91.0, "2024-03-04": 92.0},
+    "EUR": {"2024-03-01": 99.0},
+}
+
+
+def fake_timeseries(currency, start, end, ctx=None):
+    """Курсы из RATES в пределах запрошенного периода"""
+    return {day: rate for day, rate in RATES[currency].items() if start <= date.fromisoformat(day) <= end}
+
+
+def full_timeseries(currency, start, end, ctx=None):
+    """Как Fixer: курс за каждый день периода — последний известный из RATES (до первого — первый)"""
+    known = sorted(RATES[currency].items())
+    days = pd.date_range(start, end, freq="D").strftime("%Y-%m-%d")
+    return {day: next((rate for known_day, rate in reversed(known) if known_day <= day), known[0][1]) for day in days}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MarketStore(str(tmp_path / "market.db"))
+
+
+@pytest.fixture
+def operations():
+    return pd.DataFrame(
+        {
+            "Дата операции": [
+                "01.03.2024 12:00:00",
+                "02.03.2024 10:00:00",
+                "03.03.2024 23:59:59",
+                "04.03.2024 00:00:00",
+                "01.03.2024 09:00:00",
+                "05.03.2024 12:00:00",
+            ],
+            "Сумма операции": [-10.0, -10.0, -10.0, -10.0, -2.0, -500.0],
+            "Валюта операции": ["USD", "USD", "USD", "USD", "EUR", "RUB"],
+        }
+    )
+
+
+def test_convert_uses_last_known_rate(store, operations):
+    """Операция получает последний курс не позже своей даты"""
+    with patch("src.market_store.get_currency_timeseries", side_effect=fake_timeseries):
+        result = convert_to_rub(operations, store)
+
+    assert list(result["Курс к RUB"]) == [91.0, 91.0, 91.0, 92.0, 99.0, 1.0]
+    assert list(result["Сумма операции, RUB"]) == [-910.0, -910.0, -910.0, -920.0, -198.0, -500.0]
+    assert "Курс к RUB" not in operations.columns
+
+
+def test_convert_fetches_missing_dates_once(store, operations):
+    """Курсы загружаются одним запросом на валюту, повторный пересчет не обращается к сети"""
+    with patch("src.market_store.get_currency_timeseries", side_effect=full_timeseries) as mock_fetch:
+        convert_to_rub(operations, store)
+        assert sorted(call.args[0] for call in mock_fetch.call_args_list) == ["EUR", "USD"]
+        convert_to_rub(operations, store)
+
+    assert mock_fetch.call_count == 2
+
+
+def test_convert_without_rate(store):
+    """Без курса на дату сумма в рублях не заполняется"""
+    df = pd.DataFrame(
+        {
+            "Дата операции": pd.to_datetime(["2024-02-01 10:00:00", "2024-03-01 10:00:00"]),
+            "Сумма платежа": [-5.0, -5.0],
+            "Валюта платежа": ["EUR", None],
+        }
+    )
+
+    with patch("src.market_store.get_currency_timeseries", side_effect=fake_timeseries):
+        result = convert_to_rub(df, store, "Сумма платежа", "Валюта платежа")
+
+    assert result["Курс к RUB"].isna().all()
+    assert result["Сумма платежа, RUB"].isna().all()
+
+
+def test_convert_only_rubles(store):
+    """Рублевые операции не требуют курсов"""
+    df = pd.DataFrame(
+        {"Дата операции": ["01.03.2024 12:00:00"], "Сумма операции": [-100.0], "Валюта операции": ["RUB"]}
+    )
+
+    with patch("src.market_store.get_currency_timeseries") as mock_fetch:
+        result = convert_to_rub(df, store, output_column="RUB")
+
+    mock_fetch.assert_not_called()
+    assert result["RUB"].tolist() == [-100.0]
+    assert not np.isnan(result["Курс к RUB"]).any()
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.indexes import OperationsIndex, load_indexed_operations
+from src.query import OperationsQuery
+from src.reports import spending_by_category
+
+
+@pytest.fixture
+def operations():
+    """Операции в произвольном порядке дат, с пропусками"""
+    return pd.DataFrame(
+        {
+            "Дата операции": pd.to_datetime(
+                ["2024-02-05 12:00", "2024-01-10 10:00", None, "2024-03-01 09:00", "2024-01-31 23:30"]
+            ),
+            "Номер карты": ["*7197", "*5091", "*7197", None, "*5091"],
+            "Статус": ["OK", "OK", "OK", "FAILED", "OK"],
+            "Сумма операции": [-40.0, -100.0, -10.0, -75.0, -250.0],
+            "MCC": [5411.0, 5912.0, np.nan, 5912.0, 5411.0],
+            "Категория": ["Супермаркеты", "Аптеки", "Аптеки", "Аптеки", "Супермаркеты"],
+        }
+    )
+
+
+def test_build_postings(operations):
+    """Для каждого значения хранятся отсортированные номера строк"""
+    index = OperationsIndex.build(operations)
+
+    assert list(index.lookup("Категория", "Аптеки")) == [1, 2, 3]
+    assert list(index.lookup("Номер карты", "*5091")) == [1, 4]
+    assert list(index.lookup("MCC", 5912)) == [1, 3]
+    assert len(index.lookup("Категория", "Нет такой")) == 0
+
+
+def test_build_skips_missing_values(operations):
+    """Пропуски не попадают в индекс"""
+    index = OperationsIndex.build(operations)
+
+    assert sum(len(rows) for rows in index.postings["Номер карты"].values()) == 4
+
+
+def test_date_range(operations):
+    """Диапазон дат по индексу, строки с NaT пропускаются"""
+    index = OperationsIndex.build(operations)
+
+    rows = index.date_range(pd.Timestamp("2024-01-10"), pd.Timestamp("2024-02-05 12:00"))
+
+    assert list(rows) == [0, 1, 4]
+    assert list(index.date_range(None, pd.Timestamp("2024-02-05 12:00"), end_inclusive=False)) == [1, 4]
+
+
+def test_date_range_without_dates():
+    index = OperationsIndex.build(pd.DataFrame({"Категория": ["Аптеки"]}))
+
+    with pytest.raises(ValueError):
+        index.date_range(None, None)
+
+
+@pytest.mark.parametrize(
+    "build_query",
+    [
+        lambda q: q.category("Аптеки"),
+        lambda q: q.category("Аптеки").card("*5091"),
+        lambda q: q.between("2024-01-01", "2024-01-31", whole_days=True),
+        lambda q: q.between("2024-01-01", "2024-02-28").category("Супермаркеты").expenses(),
+        lambda q: q.between("2024-01-01", "2024-02-28").status("OK").mcc(5411),
+        lambda q: q.expenses(),
+    ],
+)
+def test_indexed_query_matches_scan(operations, build_query):
+    """Запрос через индекс дает тот же результат, что и полный просмотр"""
+    index = OperationsIndex.build(operations)
+
+    plain = build_query(OperationsQuery(operations)).collect()
+    indexed = build_query(OperationsQuery(operations, index)).collect()
+
+    pd.testing.assert_frame_equal(plain, indexed)
+
+
+def test_stale_index_is_ignored(operations):
+    """Индекс от таблицы другого размера не используется"""
+    index = OperationsIndex.build(operations.iloc[:2])
+
+    result = OperationsQuery(operations, index).category("Аптеки").collect()
+
+    assert len(result) == 3
+
+
+def test_spending_by_category_with_index(sample_transactions):
+    """spending_by_category с индексом совпадает с результатом без него"""
+    plain = spending_by_category(sample_transactions.copy(), "Рестораны", "2024-04-20")
+
+    indexed_df = sample_transactions.copy()
+    indexed_df["Дата операции"] = pd.to_datetime(indexed_df["Дата операции"], format="%d.%m.%Y %H:%M:%S")
+    indexed = spending_by_category(indexed_df, "Рестораны", "2024-04-20", index=OperationsIndex.build(indexed_df))
+
+    assert len(plain) == 3
+    pd.testing.assert_frame_equal(plain, indexed)
+
+
+def test_load_indexed_operations(tmp_path, sample_transactions):
+    """Загрузка файла строит индексы по датам и категориям"""
+    path = tmp_path / "operations.xlsx"
+    sample_transactions.to_excel(path, sheet_name="Отчет по операциям", index=False)
+
+    df, index = load_indexed_operations(str(path))
+
+    assert pd.api.types.is_datetime64_any_dtype(df["Дата операции"])
+    assert list(index.lookup("Категория", "Рестораны")) == [1, 3, 5, 7]
+    assert index.size == len(df)
@@ -0,0 +1,154 @@
+import json
+import threading
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from src.live import LiveDashboard, consume, socket_events, tail_jsonl
+from src.query import OperationsQuery
+from src.replay import JsonlWriter, SocketWriter, replay
+from src.serializers import dataframe_records
+from src.views import build_data_sections
+
+
+def _event(moment, amount, card="*1111", category="Супермаркеты", description="Покупка"):
+    return {
+        "Дата операции": moment,
+        "Дата платежа": moment[:10],
+        "Номер карты": card,
+        "Сумма операции": amount,
+        "Сумма операции с округлением": abs(amount) if isinstance(amount, float) else None,
+        "Категория": category,
+        "Описание": description,
+    }
+
+
+@pytest.fixture
+def events(sample_transactions):
+    """Операции sample_transactions в порядке времени, с суммой с округлением"""
+    df = sample_transactions.assign(**{"Сумма операции с округлением": sample_transactions["Сумма операции"].abs()})
+    return list(dataframe_records(df))
+
+
+def test_live_state_matches_views_sections(sample_transactions, events):
+    """Карты и топ текущего месяца совпадают с расчетом по таблице"""
+    state = LiveDashboard(top_k=5)
+    consume(state, events)
+
+    df = sample_transactions.assign(
+        **{
+            "Дата операции": pd.to_datetime(sample_transactions["Дата операции"], dayfirst=True),
+            "Сумма операции с округлением": sample_transactions["Сумма операции"].abs(),
+        }
+    )
+    month = OperationsQuery(df).between(pd.Timestamp("2024-04-01"), state.latest).collect()
+    expected = build_data_sections(month)
+
+    assert state.current_month == "2024-04"
+    assert state.cards() == expected["cards"]
+    assert state.top_transactions() == expected["top_transactions"]
+    assert json.loads(state.views(compact=True))["cards"] == expected["cards"]
+
+
+def test_month_rollover_evicts_state():
+    state = LiveDashboard(investment_months=2, category_months=1)
+    state.apply(_event("10.01.2024 12:00:00", -41.0))
+    state.apply(_event("10.02.2024 12:00:00", -41.0))
+    state.apply(_event("20.03.2024 12:00:00", -120.0, card="*2222"))
+
+    assert state.stats["rollovers"] == 2
+    assert state.cards() == [{"last_digits": "2222", "total_spent": 120, "cashback": 1.2}]
+    assert list(state.investments()) == ["2024-02", "2024-03"]
+    assert state.investments("2024-02") == {"2024-02": {10: 9.0, 50: 9.0, 100: 59.0}}
+    # Расход 10 февраля старше месяца до 20 марта
+    assert state.category_totals() == {"Супермаркеты": 120.0}
+    assert state.category_totals(date(2024, 3, 19)) == {}
+
+
+def test_top_heap_is_bounded():
+    state = LiveDashboard(top_k=2)
+    for i, amount in enumerate([-10.0, -30.0, -20.0, -30.0, -5.0], start=1):
+        state.apply(_event(f"0{i}.05.2024 10:00:00", amount, description=f"#{i}"))
+
+    top = state.top_transactions()
+
+    assert [(row["amount"], row["description"]) for row in top] == [("30.0", "#2"), ("30.0", "#4")]
+
+
+def test_late_and_invalid_events():
+    state = LiveDashboard()
+    state.apply(_event("10.03.2024 12:00:00", -100.0))
+
+    assert not state.apply({"Дата операции": "не дата", "Сумма операции": -1})
+    assert not state.apply(_event("11.03.2024 12:00:00", None))
+    assert not state.apply(_event("11.03.2024 12:00:00", "сто рублей"))
+    assert state.apply(_event("28.02.2024 12:00:00", "-1 000,50 ₽"))
+    assert state.apply(_event("12.03.2024 12:00:00", "-2\u00a0000,00 RUB"))
+
+    assert state.stats == {"events": 3, "rejected": 3, "late": 1, "rollovers": 0}
+    assert state.cards() == [{"last_digits": "1111", "total_spent": 2100, "cashback": 21.0}]
+    assert state.category_totals() == {"Супермаркеты": 3100.5}
+
+
+def test_tail_jsonl_reads_appended_lines(tmp_path, events):
+    path = str(tmp_path / "events.jsonl")
+    writer = JsonlWriter(path)
+    for event in events[:3]:
+        writer(event)
+    with open(path, "a", encoding="utf-8") as file:
+        file.write("не json\n")
+    writer(events[3])
+    writer.close()
+
+    assert list(tail_jsonl(path)) == events[:4]
+
+
+def test_socket_events(events):
+    """Операции, переданные replay по TCP, применяются к состоянию"""
+    state = LiveDashboard()
+    ready = threading.Event()
+    address = {}
+
+    def listening(port):
+        address["port"] = port
+        ready.set()
+
+    receiver = threading.Thread(target=consume, args=(state, socket_events("127.0.0.1", 0, ready=listening)))
+    receiver.start()
+    assert ready.wait(5)
+    writer = SocketWriter("127.0.0.1", address["port"])
+    replay(iter(events), writer, speed=0)
+    writer.close()
+    receiver.join(5)
+
+    assert state.stats["events"] == len(events)
+    assert state.current_month == "2024-04"
+
+
+def test_replay_scales_and_caps_pauses(events):
+    pauses = []
+    emitted = []
+
+    count = replay(iter(events[:3]), emitted.append, speed=86400, max_sleep=10, sleep=pauses.append)
+
+    assert count == 3
+    assert emitted == events[:3]
+    # При ускорении «сутки за секунду» интервалы в 45 и 17 дней сокращаются до 10 с
+    assert pauses == [10, 10]
+    replay(iter(events[:3]), emitted.append, speed=0, sleep=pauses.append)
+    assert len(pauses) == 2
+
+
+def test_outliers_of_current_month():
+    """Крупный расход текущего месяца попадает в раздел outliers, при переходе месяца раздел очищается"""
+    state = LiveDashboard()
+    for day in range(1, 29):
+        state.apply(_event(f"{day:02d}.02.2024 12:00:00", -100.0 - day % 5))
+    state.apply(_event("15.03.2024 12:00:00", -104.0))
+    state.apply(_event("16.03.2024 12:00:00", -4000.0, description="Телевизор"))
+
+    outliers = state.views_data()["outliers"]
+    assert [(row["amount"], row["description"]) for row in outliers] == [("4000.0", "Телевизор")]
+    state.apply(_event("01.04.2024 12:00:00", -100.0))
+    assert state.outliers() == []
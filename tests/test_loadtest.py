@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from benchmarks.loadtest import (DashboardServer, HttpTarget, InProcessTarget, date_sampler, kind_sampler,
+                                 run_load)
+from src.context import OperationsCache
+from src.stub_server import StubMarketServer, stub_context
+
+
+@pytest.fixture
+def stub_ctx(sample_transactions, tmp_path):
+    """Контекст с маленькой выгрузкой и настройками, API — локальная заглушка"""
+    operations = tmp_path / "operations.xlsx"
+    rounded = sample_transactions["Сумма операции"].abs()
+    sample_transactions.assign(**{"Сумма операции с округлением": rounded}).to_excel(
+        operations, sheet_name="Отчет по операциям", index=False
+    )
+    settings = tmp_path / "user_settings.json"
+    settings.write_text(json.dumps({"user_currencies": ["USD"], "user_stocks": ["AAPL"]}), encoding="utf-8")
+    with StubMarketServer() as stub:
+        yield stub, stub_context(
+            stub, operations_path=str(operations), settings_path=str(settings), operations_cache=OperationsCache()
+        )
+
+
+def _samplers():
+    return (
+        kind_sampler({"views": 0.5, "views_compact": 0.5}, seed=1),
+        date_sampler("uniform", "2024-01-01 00:00:00", "2024-04-30 23:59:59", seed=1),
+    )
+
+
+def test_run_load_in_process(stub_ctx):
+    """Небольшая нагрузка на main_views с заглушкой: все запросы успешны, сводка по видам запросов"""
+    stub, ctx = stub_ctx
+
+    result = run_load(InProcessTarget(ctx), 6, 3, *_samplers())
+
+    summary = result["results"]
+    assert summary["all"]["requests"] == 6
+    assert summary["all"]["errors"] == 0
+    assert sum(summary[kind]["requests"] for kind in ("views", "views_compact") if kind in summary) == 6
+    assert summary["all"]["p50_ms"] <= summary["all"]["p99_ms"] <= summary["all"]["max_ms"]
+    assert stub.stats()["by_route"]["convert"]["200"] == 6
+
+
+def test_run_load_over_http(stub_ctx):
+    """Те же запросы через локальный HTTP-сервис страницы «Главная»"""
+    _, ctx = stub_ctx
+
+    with DashboardServer(ctx) as dashboard:
+        target = HttpTarget(dashboard.base_url)
+        assert json.loads(target("views_compact", "2024-04-20 12:00:00"))["currency_rates"][0]["currency"] == "USD"
+        result = run_load(target, 4, 2, *_samplers())
+
+    assert result["results"]["all"]["requests"] == 4
+    assert result["results"]["all"]["errors"] == 0
+
+
+def test_samplers_validate_arguments():
+    with pytest.raises(ValueError):
+        kind_sampler({"unknown": 1.0})
+    with pytest.raises(ValueError):
+        date_sampler("normal", "2024-01-01 00:00:00", "2024-02-01 00:00:00")
+    next_date = date_sampler("recent", "2024-01-01 00:00:00", "2024-02-01 00:00:00", seed=0)
+    assert all("2024-01-01 00:00:00" <= next_date() <= "2024-02-01 00:00:00" for _ in range(100))
@@ -0,0 +1,202 @@
+import json
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from src.context import ViewsContext
+from src.market_store import MAX_TIMESERIES_DAYS, MarketStore
+from src.utils_views import get_stocks
+
+# «Сегодня» по часам контекста в тестах с фиксированными часами
+TODAY_NOON = datetime(2024, 3, 6, 12)
+TODAY = TODAY_NOON.date()
+
+
+def bar(day: date, close: float) -> dict:
+    """Дневной агрегат в формате API"""
+    timestamp = datetime(day.year, day.month, day.day, 4, tzinfo=timezone.utc).timestamp() * 1000
+    return {"o": close - 1, "h": close + 1, "l": close - 2, "c": close, "v": 1000, "t": timestamp}
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Пустое хранилище во временной папке"""
+    return MarketStore(str(tmp_path / "market.db"))
+
+
+@pytest.fixture
+def clock_store(tmp_path):
+    """Пустое хранилище, у которого «сегодня» — TODAY"""
+    return MarketStore(str(tmp_path / "market.db"), ViewsContext.from_env(clock=lambda: TODAY_NOON))
+
+
+def test_missing_dates_empty_store(store):
+    """В пустом хранилище отсутствуют все дни периода"""
+    missing = store.missing_dates("AAPL", date(2024, 3, 1), date(2024, 3, 3))
+
+    assert missing == [date(2024, 3, 1), date(2024, 3, 2), date(2024, 3, 3)]
+
+
+def test_ensure_fetches_only_missing_days(store):
+    """Повторно запрашиваются только недостающие дни"""
+    bars = [bar(date(2024, 3, 1), 170.0), bar(date(2024, 3, 4), 172.0)]
+
+    with patch("src.market_store.get_daily_aggregates", return_value=bars) as mock_fetch:
+        assert store.ensure("AAPL", date(2024, 3, 1), date(2024, 3, 4)) is True
+        assert store.ensure("AAPL", date(2024, 3, 2), date(2024, 3, 4)) is False
+        store.ensure("AAPL", date(2024, 3, 3), date(2024, 3, 6))
+
+    assert mock_fetch.call_count == 2
+    assert mock_fetch.call_args.args == ("AAPL", date(2024, 3, 5), date(2024, 3, 6))
+
+
+def test_get_range(store):
+    """Исторический диапазон отдается из хранилища"""
+    bars = [bar(date(2024, 3, 1), 170.0), bar(date(2024, 3, 4), 172.0)]
+
+    with patch("src.market_store.get_daily_aggregates", return_value=bars):
+        result = store.get_range("AAPL", date(2024, 3, 1), date(2024, 3, 4))
+
+    assert [row["date"] for row in result] == ["2024-03-01", "2024-03-04"]
+    assert result[1]["c"] == 172.0
+
+
+def test_latest_close_uses_older_data(store):
+    """Если за последние дни нет баров, берется последняя известная цена"""
+    with patch("src.market_store.get_daily_aggregates", return_value=[bar(date(2024, 3, 1), 170.0)]):
+        store.get_range("AAPL", date(2024, 3, 1), date(2024, 3, 1))
+    with patch("src.market_store.get_daily_aggregates", return_value=[]):
+        assert store.latest_close("AAPL", date(2024, 3, 3)) == 170.0
+
+
+def test_latest_close_unknown_ticker(store):
+    """Для тикера без данных возвращается None"""
+    with patch("src.market_store.get_daily_aggregates", return_value=[]):
+        assert store.latest_close("MSFT", date(2024, 3, 3)) is None
+
+
+def test_get_stocks_with_store_repeat_call_is_offline(tmp_path):
+    """Повторный вызов get_stocks с хранилищем в тот же день не обращается к сети"""
+    settings = tmp_path / "user_settings.json"
+    settings.write_text(json.dumps({"user_stocks": ["AAPL", "MSFT"]}), encoding="utf-8")
+    ctx = ViewsContext.from_env(clock=lambda: TODAY_NOON)
+    store = MarketStore(str(tmp_path / "market.db"), ctx)
+
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"results": [bar(TODAY - timedelta(days=1), 175.0), bar(TODAY, 175.5)]}
+
+    with patch("requests.get", return_value=mock_response) as mock_get:
+        first = get_stocks(str(settings), store, ctx)
+        second = get_stocks(str(settings), store, ctx)
+
+    assert mock_get.call_count == 2
+    assert f"/range/1/day/{TODAY - timedelta(days=1)}/{TODAY}?" in mock_get.call_args.args[0]
+    assert first == second == [{"stock": "AAPL", "price": 175.5}, {"stock": "MSFT", "price": 175.5}]
+
+
+def test_ensure_covers_fetched_days_before_today(clock_store):
+    """После успешного ответа отмечаются все запрошенные дни, кроме сегодняшнего, даже без баров"""
+    start = TODAY - timedelta(days=5)
+
+    with patch("src.market_store.get_daily_aggregates", return_value=[bar(start + timedelta(days=1), 170.0)]):
+        clock_store.ensure("AAPL", start, TODAY)
+
+    assert clock_store.missing_dates("AAPL", start, TODAY) == [TODAY]
+
+
+def test_latest_close_weekend_is_not_refetched(tmp_path):
+    """В выходные и для тикера без баров повторный вызов latest_close не идет в сеть"""
+    sunday = date(2024, 3, 10)
+    store = MarketStore(str(tmp_path / "market.db"), ViewsContext.from_env(clock=lambda: datetime(2024, 3, 10, 12)))
+    with patch("src.market_store.get_daily_aggregates", return_value=[bar(date(2024, 3, 8), 170.0)]):
+        store.get_range("AAPL", date(2024, 3, 8), date(2024, 3, 8))
+
+    with patch("src.market_store.get_daily_aggregates", return_value=[]) as mock_fetch:
+        assert store.latest_close("AAPL") == store.latest_close("AAPL", sunday) == 170.0
+        assert store.latest_close("MSFT") is None
+        assert store.latest_close("MSFT") is None
+
+    assert mock_fetch.call_count == 2
+
+
+@pytest.mark.parametrize(
+    "status_code, payload",
+    [(429, {"error": "rate limit exceeded"}), (500, {"error": "internal server error"}), (200, {"status": "ERROR"})],
+)
+def test_ensure_error_response_is_not_cached(store, status_code, payload):
+    """Ответ с ошибкой — исключение; дни не отмечаются, и следующий вызов снова идет в сеть"""
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(payload).encode()
+
+    with patch("requests.get", return_value=response):
+        with pytest.raises(requests.HTTPError):
+            store.ensure("AAPL", date(2024, 3, 1), date(2024, 3, 4))
+
+    assert len(store.missing_dates("AAPL", date(2024, 3, 1), date(2024, 3, 4))) == 4
+    with patch("src.market_store.get_daily_aggregates", return_value=[bar(date(2024, 3, 4), 172.0)]) as mock_fetch:
+        assert store.ensure("AAPL", date(2024, 3, 1), date(2024, 3, 4)) is True
+    assert mock_fetch.call_count == 1
+
+
+def test_ensure_rates_fetches_only_missing_days(store):
+    """Курсы валюты догружаются одним запросом только за недостающие дни"""
+    rates = {"2024-03-01": 90.5, "2024-03-02": 90.7}
+
+    with patch("src.market_store.get_currency_timeseries", return_value=rates) as mock_fetch:
+        assert store.ensure_rates("USD", date(2024, 3, 1), date(2024, 3, 2)) is True
+        assert store.ensure_rates("USD", date(2024, 3, 1), date(2024, 3, 2)) is False
+        result = store.get_rates("USD", date(2024, 3, 1), date(2024, 3, 4))
+
+    assert mock_fetch.call_count == 2
+    assert mock_fetch.call_args.args == ("USD", date(2024, 3, 3), date(2024, 3, 4))
+    assert result == [("2024-03-01", 90.5), ("2024-03-02", 90.7)]
+    # Курсы не смешиваются с акциями с тем же названием
+    assert store.missing_dates("USD", date(2024, 3, 1), date(2024, 3, 1)) == [date(2024, 3, 1)]
+
+
+def test_ensure_rates_splits_long_periods(store):
+    """Период длиннее года (как USD в data/operations.xlsx) запрашивается окнами не длиннее 365 дней"""
+    start, end = date(2018, 5, 1), date(2021, 8, 31)
+
+    def timeseries(currency, first, last, ctx=None):
+        return {day.isoformat(): 60.0 for day in (first + timedelta(days=i) for i in range((last - first).days + 1))}
+
+    with patch("src.market_store.get_currency_timeseries", side_effect=timeseries) as mock_fetch:
+        assert store.ensure_rates("USD", start, end) is True
+
+    windows = [call.args[1:] for call in mock_fetch.call_args_list]
+    assert all((last - first).days + 1 <= MAX_TIMESERIES_DAYS for first, last in windows)
+    assert windows[0][0] == start and windows[-1][1] == end
+    assert all(following[0] - previous[1] == timedelta(days=1) for previous, following in zip(windows, windows[1:]))
+    assert store.missing_dates("USD/RUB", start, end) == []
+
+
+def test_ensure_rates_covers_only_returned_days(store):
+    """Дни без курса в ответе не отмечаются и запрашиваются снова"""
+    with patch("src.market_store.get_currency_timeseries", return_value={"2024-03-01": 90.5}):
+        store.ensure_rates("USD", date(2024, 3, 1), date(2024, 3, 3))
+
+    assert store.missing_dates("USD/RUB", date(2024, 3, 1), date(2024, 3, 3)) == [date(2024, 3, 2), date(2024, 3, 3)]
+
+
+@pytest.mark.parametrize(
+    "status_code, payload",
+    [
+        (429, {"message": "API rate limit exceeded"}),
+        (200, {"success": False, "error": {"code": 104, "type": "usage_limit_reached"}}),
+    ],
+)
+def test_ensure_rates_error_response_is_not_cached(store, status_code, payload):
+    """Ответ Fixer с ошибкой — исключение, курсы и отметки о днях не записываются"""
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(payload).encode()
+
+    with patch("requests.get", return_value=response):
+        with pytest.raises(requests.HTTPError):
+            store.ensure_rates("USD", date(2024, 3, 1), date(2024, 3, 2))
+
+    assert len(store.missing_dates("USD/RUB", date(2024, 3, 1), date(2024, 3, 2))) == 2
@@ -0,0 +1,60 @@
+import numpy as np
+
+from src import memprofile
+from src.memprofile import check_ceilings, profiled, profiling, stage
+
+MB = memprofile.MB
+
+
+@profiled
+def _allocate(megabytes):
+    with stage("inner"):
+        data = np.ones(megabytes * MB // 8)
+    return data
+
+
+def test_disabled_profiling_is_transparent():
+    """Без включенного профилирования функции и этапы работают как обычно"""
+    assert memprofile._profile is None
+    assert len(_allocate(1)) == MB // 8
+    with stage("ничего"):
+        pass
+
+
+def test_stages_record_peak_and_allocated():
+    with profiling(sample_interval=0.001) as profile:
+        kept = _allocate(8)
+        with stage("outer"):
+            _allocate(4)
+
+    stages = profile.report()["stages"]
+    inner = stages["test_memprofile._allocate/inner"]
+    assert inner["calls"] == 2
+    assert inner["peak"] >= 8 * MB
+    # Массив возвращается из функции: память остается занятой после этапа
+    assert stages["test_memprofile._allocate"]["allocated"] >= 8 * MB
+    # Временный массив вложенного вызова входит в пик внешнего этапа, но не в занятую память
+    assert stages["outer"]["peak"] >= 4 * MB
+    assert stages["outer"]["allocated"] < MB
+    assert memprofile._profile is None
+    del kept
+
+
+def test_check_ceilings():
+    report = {
+        "rss_available": True,
+        "stages": {"utils_views.load_operations": {"peak": 30 * MB, "rss_peak": 50 * MB}},
+    }
+
+    assert check_ceilings(report, {"utils_views.load_operations": 40}) == []
+    assert check_ceilings(report, {"utils_views.load_operations": 20, "utils_views.load_operations:rss": 100}) == [
+        "utils_views.load_operations: 30.0 МБ > 20 МБ"
+    ]
+    assert check_ceilings(report, {"reports.category_spending": 10}) == [
+        "reports.category_spending: этап не найден в отчете"
+    ]
+
+
+def test_read_rss():
+    rss = memprofile.read_rss()
+    assert rss is None or rss > 0
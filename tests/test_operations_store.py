@@ -0,0 +1,192 @@
+import json
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.cashback import CashbackRule, CashbackRules
+from src.operations_store import OperationsStore
+from src.outliers import flag_outliers
+from src.reports import category_spending
+from src.services import investment_bank, investment_bank_store, stream_round_ups
+from src.utils_views import get_card, get_date_period, get_period, get_top_transactions, load_operations
+
+
+def make_operations(rows: int = 600, seed: int = 1) -> pd.DataFrame:
+    """Выгрузка с повторяющимися датами и суммами, пропусками категорий и строковыми суммами"""
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp("2023-10-01") + pd.to_timedelta(rng.integers(0, 200, rows) * 3600 * 11, unit="s")
+    amounts = -rng.integers(1, 40, rows) * 50.0
+    amounts[rng.random(rows) < 0.1] *= -1
+    amounts[::97] = -100_000.0
+    categories = pd.Series(rng.choice(["Супермаркеты", "Рестораны", "Такси", ""], size=rows, p=[0.5, 0.3, 0.15, 0.05]))
+    return pd.DataFrame(
+        {
+            "Дата операции": dates.strftime("%d.%m.%Y %H:%M:%S"),
+            "Дата платежа": dates.strftime("%d.%m.%Y"),
+            "Номер карты": rng.choice(["*7197", "*5091", "*4556"], size=rows),
+            "Статус": "OK",
+            "Сумма операции": [f"{amount:,.2f} ₽".replace(",", " ") for amount in amounts],
+            "Кэшбэк": np.where(rng.random(rows) < 0.3, 5.0, np.nan),
+            "Категория": categories.mask(categories == "", np.nan),
+            "MCC": rng.choice([5411.0, 5812.0, 4121.0, np.nan], size=rows),
+            "Описание": rng.choice(["Магнит", "Колхоз", "Яндекс Такси"], size=rows),
+            "Бонусы (включая кэшбэк)": np.where(rng.random(rows) < 0.5, 1.0, np.nan),
+            "Округление на инвесткопилку": 0,
+            "Сумма операции с округлением": np.abs(amounts),
+        }
+    )
+
+
+@pytest.fixture
+def raw_operations():
+    return make_operations()
+
+
+@pytest.fixture
+def store(tmp_path, raw_operations):
+    """База, загруженная тремя порциями"""
+    operations_store = OperationsStore(str(tmp_path / "operations.db"))
+    chunks = [raw_operations.iloc[start:start + 250] for start in range(0, len(raw_operations), 250)]
+    operations_store.load(chunks)
+    return operations_store
+
+
+@pytest.fixture
+def operations(raw_operations):
+    """Та же выгрузка в памяти, как после load_operations"""
+    df = raw_operations.copy()
+    df["Дата операции"] = pd.to_datetime(df["Дата операции"], dayfirst=True)
+    return df
+
+
+def test_period_matches_pandas(store, operations):
+    """Выборка периода совпадает с get_period: строки, порядок, индекс и типы"""
+    period = get_date_period("2023-12-20 15:00:00")
+
+    pd.testing.assert_frame_equal(store.get_period(period), get_period(operations, period))
+
+
+def test_load_excel_matches_load_operations(tmp_path, raw_operations):
+    """Загрузка xlsx порциями дает те же строки и типы, что и чтение файла целиком"""
+    path = str(tmp_path / "operations.xlsx")
+    raw_operations.to_excel(path, sheet_name="Отчет по операциям", index=False)
+    store = OperationsStore(str(tmp_path / "operations.db"))
+    period = get_date_period("2024-01-31 23:59:59")
+
+    assert store.load_excel(path, chunk_size=100) == len(raw_operations)
+    pd.testing.assert_frame_equal(store.get_period(period), get_period(load_operations(path), period))
+
+
+def test_store_reopens_with_column_types(store, operations):
+    """Типы колонок сохраняются в базе и доступны при повторном открытии"""
+    reopened = OperationsStore(store.db_path)
+    period = get_date_period("2024-01-31 23:59:59")
+
+    assert reopened.columns == list(operations.columns)
+    pd.testing.assert_frame_equal(reopened.get_period(period), get_period(operations, period))
+
+
+@pytest.mark.parametrize(
+    "rules",
+    [
+        None,
+        CashbackRules([CashbackRule(5, mcc=[5411]), CashbackRule(1.5, mcc=[5812])], default_percent=0.25),
+        CashbackRules([CashbackRule(3.3, mcc=[5411])]),
+        CashbackRules([CashbackRule(10, categories=["Такси"], start=pd.Timestamp("2023-12-05").date())]),
+    ],
+)
+def test_get_card_matches_pandas(store, operations, rules):
+    """Суммы и кэшбэк по картам совпадают с get_card при любых правилах"""
+    period = get_date_period("2023-12-20 15:00:00")
+
+    assert store.get_card(period, rules) == get_card(get_period(operations, period), rules)
+
+
+def test_top_transactions_matches_pandas_on_ties(store, operations):
+    """Топ с одинаковыми суммами совпадает с get_top_transactions"""
+    period = get_date_period("2024-02-28 12:00:00")
+    sorted_df = get_period(operations, period)
+
+    for get_top in (1, 5, 20):
+        assert store.get_top_transactions(period, get_top) == get_top_transactions(sorted_df, get_top)
+
+
+def test_flag_outliers_matches_pandas(store, raw_operations):
+    """Аномалии по потоку из базы совпадают с flag_outliers по таблице"""
+    raw_operations["Дата операции"] = pd.to_datetime(raw_operations["Дата операции"], format="%d.%m.%Y %H:%M:%S")
+
+    flags = store.flag_outliers()
+
+    assert flags == flag_outliers(raw_operations)
+    assert flags
+
+
+@pytest.mark.parametrize("category", ["Супермаркеты", "Такси", "Нет такой"])
+def test_category_spending_matches_pandas(store, raw_operations, category):
+    """Расходы категории за окно совпадают с category_spending"""
+    raw_operations["Дата операции"] = pd.to_datetime(raw_operations["Дата операции"], format="%d.%m.%Y %H:%M:%S")
+    start, end = pd.Timestamp("2023-11-15").date(), pd.Timestamp("2024-02-15").date()
+
+    outliers = store.flag_outliers()
+
+    result = store.category_spending(category, start, end, outliers)
+
+    expected = category_spending(raw_operations, category, start, end, outliers=outliers)
+    pd.testing.assert_frame_equal(result, expected)
+    # Без outliers аномалии ищутся по всей истории, как в category_spending
+    pd.testing.assert_frame_equal(store.category_spending(category, start, end), expected)
+    pd.testing.assert_frame_equal(category_spending(raw_operations, category, start, end), expected)
+
+
+@pytest.mark.parametrize("limit", [10, 50, 100])
+def test_round_ups_match_investment_bank(store, raw_operations, limit):
+    """Суммы копилки по месяцам совпадают с stream_round_ups и investment_bank"""
+    records = raw_operations.assign(
+        **{"Дата операции": pd.to_datetime(raw_operations["Дата операции"], dayfirst=True).dt.strftime("%Y-%m-%d")}
+    ).to_dict("records")
+
+    assert store.round_ups(limit) == stream_round_ups(records, limit)
+    for month in ("2023-11", "2024-01", "2022-01"):
+        expected = json.loads(investment_bank(month, records, limit))
+        result = json.loads(investment_bank_store(month, store, limit))
+        expected.pop("calculation_date")
+        result.pop("calculation_date")
+        assert result == expected
+
+
+def test_investment_bank_store_validates_month(store):
+    """Неверный месяц — ответ с ошибкой, как у investment_bank"""
+    result = json.loads(investment_bank_store("2024-13", store, 50))
+
+    assert result["status"] == "error"
+
+
+def test_queries_use_indexes(store):
+    """Выборки по периоду и по категории идут по индексам"""
+    period_plan = " ".join(
+        store.explain('SELECT * FROM operations WHERE "Дата операции" BETWEEN ? AND ?', ("2024-01-01", "2024-01-31"))
+    )
+    category_plan = " ".join(
+        store.explain(
+            'SELECT * FROM operations WHERE "Категория" = ? AND "Дата операции" >= ?', ("Такси", "2024-01-01")
+        )
+    )
+
+    assert "operations_date" in period_plan
+    assert "operations_category_date" in category_plan
+
+
+def test_load_replaces_previous_operations(store, raw_operations):
+    """Повторная загрузка заменяет операции, а не добавляет их"""
+    assert store.load([raw_operations.head(10)]) == 10
+
+    with sqlite3.connect(store.db_path) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM operations").fetchone()[0] == 10
+
+
+def test_load_without_operations(tmp_path):
+    """Пустая последовательность порций — ошибка"""
+    with pytest.raises(ValueError):
+        OperationsStore(str(tmp_path / "operations.db")).load([])
@@ -0,0 +1,105 @@
+import math
+import random
+
+import numpy as np
+import pandas as pd
+
+from src.outliers import OutlierDetector, P2Quantile, RunningStats, flag_outliers
+from src.utils_views import get_outliers
+
+
+def _operations(amounts, category="Супермаркеты", card="*1111"):
+    """Расходы по одному в день, начиная с 1 января 2024"""
+    return pd.DataFrame(
+        {
+            "Дата операции": pd.date_range("2024-01-01 12:00", periods=len(amounts), freq="D"),
+            "Дата платежа": pd.date_range("2024-01-01", periods=len(amounts), freq="D").strftime("%d.%m.%Y"),
+            "Номер карты": card,
+            "Сумма операции": [-amount for amount in amounts],
+            "Категория": category,
+            "Описание": [f"#{i}" for i in range(len(amounts))],
+        }
+    )
+
+
+def test_running_stats_matches_numpy():
+    generator = random.Random(1)
+    values = [generator.uniform(-500, 5000) for _ in range(1000)]
+    stats = RunningStats()
+    for value in values:
+        stats.update(value)
+
+    assert stats.count == 1000
+    assert math.isclose(stats.mean, np.mean(values))
+    assert math.isclose(stats.std, np.std(values, ddof=1))
+
+
+def test_p2_quantile_is_close_to_exact():
+    """Приближенный квантиль P² близок к точному без хранения значений"""
+    generator = random.Random(2)
+    values = [generator.lognormvariate(6, 1) for _ in range(20000)]
+    quantile = P2Quantile(0.99)
+    for value in values:
+        quantile.update(value)
+
+    exact = np.quantile(values, 0.99)
+    assert abs(quantile.value - exact) / exact < 0.05
+    assert len(quantile._heights) == 5
+
+
+def test_detector_needs_history():
+    """Пока в группе меньше min_count расходов, аномалии не отмечаются"""
+    detector = OutlierDetector(min_count=5)
+    assert detector.check(10000.0, "Супермаркеты") is None
+    for amount in [100.0, 110.0, 90.0, 105.0]:
+        detector.check(amount, "Супермаркеты")
+    assert detector.check(10000.0, "Супермаркеты") is None
+
+
+def test_flag_outliers_by_category_and_card():
+    amounts = [100.0 + i % 7 for i in range(30)] + [5000.0, 104.0]
+    operations = _operations(amounts)
+
+    flags = flag_outliers(operations)
+
+    assert list(flags) == [30]
+    assert flags[30]["scope"] in ("category", "card")
+    assert flags[30]["z_score"] > 3
+
+
+def test_flag_outliers_in_time_order():
+    """Строки обрабатываются по времени операции, а не по порядку в таблице"""
+    operations = _operations([100.0 + i % 7 for i in range(30)] + [5000.0])
+    reversed_operations = operations.iloc[::-1]
+
+    assert list(flag_outliers(reversed_operations)) == [30]
+
+
+def test_flag_outliers_shared_detector():
+    """Статистика детектора переносится между порциями"""
+    operations = _operations([100.0 + i % 7 for i in range(30)] + [5000.0])
+    detector = OutlierDetector()
+
+    assert flag_outliers(operations.iloc[:20], detector) == {}
+    assert list(flag_outliers(operations.iloc[20:], detector)) == [30]
+
+
+def test_get_outliers_uses_history():
+    """За короткий период статистики мало: аномалия находится только по всей истории"""
+    operations = _operations([100.0 + i % 7 for i in range(30)] + [5000.0])
+    period = operations.iloc[28:]
+
+    assert get_outliers(period) == []
+    outliers = get_outliers(period, operations)
+    assert len(outliers) == 1
+    assert outliers[0]["amount"] == "5000.0"
+    assert outliers[0]["last_digits"] == "1111"
+    assert outliers[0]["description"] == "#30"
+
+
+def test_get_outliers_with_precomputed_flags():
+    """Посчитанные один раз аномалии дают тот же результат, что и проход по истории"""
+    operations = _operations([100.0 + i % 7 for i in range(30)] + [5000.0])
+    period = operations.iloc[28:]
+
+    assert get_outliers(period, flags=flag_outliers(operations)) == get_outliers(period, operations)
@@ -0,0 +1,141 @@
+import pandas as pd
+import pytest
+
+from src.query import OperationsQuery
+
+
+@pytest.fixture
+def operations():
+    """Операции с уже преобразованной датой"""
+    return pd.DataFrame(
+        {
+            "Дата операции": pd.to_datetime(
+                [
+                    "2024-01-10 10:00:00",
+                    "2024-01-31 23:30:00",
+                    "2024-02-05 12:00:00",
+                    "2024-02-20 18:00:00",
+                    "2024-03-01 09:00:00",
+                ]
+            ),
+            "Номер карты": ["*7197", "*5091", "*7197", "*7197", "*5091"],
+            "Статус": ["OK", "OK", "FAILED", "OK", "OK"],
+            "Сумма операции": [-100.0, -250.0, -40.0, 500.0, -75.0],
+            "MCC": [5411, 5912, 5411, 5411, 5912],
+            "Категория": ["Супермаркеты", "Аптеки", "Супермаркеты", "Пополнения", "Аптеки"],
+        }
+    )
+
+
+def test_between_inclusive(operations):
+    """Границы диапазона дат включаются"""
+    result = OperationsQuery(operations).between("2024-01-31 23:30:00", "2024-02-20 18:00:00").collect()
+
+    assert list(result.index) == [1, 2, 3]
+
+
+def test_between_whole_days(operations):
+    """В режиме whole_days последний день входит целиком"""
+    result = OperationsQuery(operations).between("2024-01-10", "2024-01-31", whole_days=True).collect()
+
+    assert list(result.index) == [0, 1]
+
+
+def test_between_unsorted_matches_sorted(operations):
+    """Результат не зависит от того, отсортирована ли таблица"""
+    shuffled = operations.iloc[[3, 0, 4, 1, 2]]
+
+    sorted_result = OperationsQuery(operations).between("2024-01-15", "2024-02-25").collect()
+    shuffled_result = OperationsQuery(shuffled).between("2024-01-15", "2024-02-25").collect()
+
+    assert sorted(shuffled_result.index) == list(sorted_result.index)
+
+
+def test_between_uses_datetime_index(operations):
+    """Диапазон дат сужается по отсортированному индексу"""
+    indexed = operations.set_index("Дата операции", drop=False)
+    indexed.index.name = "Дата операции"
+
+    result = OperationsQuery(indexed).between("2024-02-01", "2024-02-28").collect()
+
+    assert list(result["Сумма операции"]) == [-40.0, 500.0]
+
+
+def test_fused_filters(operations):
+    """Несколько условий применяются вместе"""
+    result = OperationsQuery(operations).card("*7197").status("OK").expenses().mcc(5411).collect()
+
+    assert list(result.index) == [0]
+
+
+def test_income_and_category(operations):
+    query = OperationsQuery(operations)
+
+    assert list(query.income().collect().index) == [3]
+    assert list(query.category("Аптеки").collect().index) == [1, 4]
+
+
+def test_query_is_immutable(operations):
+    """Добавление условия не меняет исходный запрос"""
+    base = OperationsQuery(operations).expenses()
+    base.category("Аптеки")
+
+    assert len(base.collect()) == 4
+
+
+def test_select_and_derive(operations):
+    """Проекция и вычисляемые колонки"""
+    result = (
+        OperationsQuery(operations)
+        .select(["Категория", "Сумма операции"])
+        .derive("abs", lambda df: df["Сумма операции"].abs())
+        .collect()
+    )
+
+    assert list(result.columns) == ["Категория", "Сумма операции", "abs"]
+    assert result["abs"].iloc[1] == 250.0
+
+
+def test_select_missing_column(operations):
+    with pytest.raises(KeyError):
+        OperationsQuery(operations).select(["Нет такой колонки"]).collect()
+
+
+def test_top_k(operations):
+    """Топ операций по значению колонки"""
+    result = OperationsQuery(operations).top_k("Сумма операции", 2).collect()
+
+    assert list(result["Сумма операции"]) == [500.0, -40.0]
+
+
+def test_group_by_aggregate(operations):
+    """Группировка сохраняет порядок первого появления ключа"""
+    result = (
+        OperationsQuery(operations)
+        .expenses()
+        .group_by("Номер карты")
+        .aggregate(total=("Сумма операции", "sum"), count=("Сумма операции", "size"))
+    )
+
+    assert list(result["Номер карты"]) == ["*7197", "*5091"]
+    assert list(result["total"]) == [-140.0, -325.0]
+    assert list(result["count"]) == [2, 2]
+
+
+def test_group_by_empty(operations):
+    result = OperationsQuery(operations).category("Нет").group_by("Номер карты").aggregate(t=("Сумма операции", "sum"))
+
+    assert result.empty
+    assert list(result.columns) == ["Номер карты", "t"]
+
+
+def test_unknown_operator(operations):
+    with pytest.raises(ValueError):
+        OperationsQuery(operations).where("MCC", "~", 1).collect()
+
+
+def test_rows_restricts_query(operations):
+    """Запрос ограничивается заданными строками"""
+    result = OperationsQuery(operations).rows([4, 0, 2]).expenses().between("2024-01-01", "2024-02-28").collect()
+
+    assert list(result.index) == [0, 2]
@@ -8,7 +8,9 @@ import pandas as pd
 import pytest
 import xlsxwriter
 
-from src.reports import save_to_file, spending_by_category
+from src.outliers import flag_outliers
+from src.reports import (OUTPUT_COLUMNS, iter_spending_by_category, save_to_file, spending_by_category,
+                         spending_by_category_chunked)
 
 
 # Создаем мок-функцию для тестирования декоратора
@@ -294,3 +296,126 @@ def test_inf_nan_handling():
 
     # Проверяем, что NaN заменены на 0
     assert result.notna().all().all()
+
+
+def _split(df, size):
+    """Делит таблицу на порции по size строк"""
+    return [chunk for _, chunk in df.groupby(np.arange(len(df)) // size)]
+
+
+def test_chunked_matches_full(sample_transactions):
+    """Склеенные порции совпадают с результатом spending_by_category"""
+    expected = spending_by_category(sample_transactions.copy(), "Супермаркеты", "2024-04-15")
+
+    parts = list(iter_spending_by_category(_split(sample_transactions, 3), "Супермаркеты", "2024-04-15"))
+
+    pd.testing.assert_frame_equal(pd.concat(parts), expected)
+
+
+def test_chunked_sink(sample_transactions):
+    """Порции передаются в sink, возвращается число строк"""
+    received = []
+
+    written = spending_by_category_chunked(
+        _split(sample_transactions, 2), "Рестораны", "2024-04-15", sink=received.append
+    )
+
+    assert written == sum(len(part) for part in received) == 4
+    assert all(len(part) > 0 for part in received)
+
+
+def test_chunked_default_sink_writes_excel(sample_transactions, tmp_path):
+    """По умолчанию результат пишется в xlsx построчно"""
+    path = str(tmp_path / "result.xlsx")
+
+    with patch("src.reports.file_path_result", path):
+        written = spending_by_category_chunked(_split(sample_transactions, 3), "Супермаркеты", "2024-04-15")
+
+    saved = pd.read_excel(path)
+    assert list(saved.columns) == OUTPUT_COLUMNS
+    assert len(saved) == written == 3
+
+
+def test_chunked_empty_result(sample_transactions, tmp_path):
+    path = str(tmp_path / "result.xlsx")
+
+    with patch("src.reports.file_path_result", path):
+        written = spending_by_category_chunked(_split(sample_transactions, 3), "Нет такой", "2024-04-15")
+
+    assert written == 0
+    assert pd.read_excel(path).empty
+
+
+def test_string_amounts_are_cleaned(sample_transactions):
+    """Суммы-строки из выгрузки приводятся к числам, некорректные не попадают в отчет"""
+    raw = sample_transactions.copy()
+    raw["Сумма операции"] = raw["Сумма операции"].map(lambda amount: f"{amount},00 ₽").astype(object)
+    raw.loc[2, "Сумма операции"] = "не число"
+
+    result = spending_by_category(raw, "Супермаркеты", "2024-04-15")
+    expected = spending_by_category(sample_transactions.drop(index=2), "Супермаркеты", "2024-04-15")
+
+    assert result["Сумма операции"].tolist() == expected["Сумма операции"].tolist()
+    assert result["Кэшбэк"].tolist() == expected["Кэшбэк"].tolist()
+
+
+def test_outlier_column():
+    """Колонка «Аномалия» отмечает расход, необычно крупный для категории"""
+    amounts = [100.0 + i % 7 for i in range(40)] + [5000.0]
+    transactions = pd.DataFrame(
+        {
+            "Дата операции": pd.date_range("2024-01-01 12:00", periods=len(amounts), freq="D").strftime(
+                "%d.%m.%Y %H:%M:%S"
+            ),
+            "Дата платежа": "01.01.2024",
+            "Номер карты": "*1111",
+            "Статус": "OK",
+            "Сумма операции": [-amount for amount in amounts],
+            "Кэшбэк": np.nan,
+            "MCC": 5411,
+            "Категория": "Супермаркеты",
+            "Описание": "Покупка",
+            "Округление на инвесткопилку": 0,
+            "Бонусы (включая кэшбэк)": 0,
+        }
+    )
+
+    outliers = flag_outliers(
+        transactions.assign(**{"Дата операции": pd.to_datetime(transactions["Дата операции"], dayfirst=True)})
+    )
+
+    result = spending_by_category(transactions.copy(), "Супермаркеты", "2024-02-15", outliers=outliers)
+
+    assert list(result.columns) == OUTPUT_COLUMNS
+    assert result.loc[result["Аномалия"], "Сумма операции"].tolist() == [-5000.0]
+    assert result["Аномалия"].sum() == 1
+    # Без outliers аномалии ищутся по всей переданной таблице
+    pd.testing.assert_frame_equal(spending_by_category(transactions, "Супермаркеты", "2024-02-15"), result)
+
+
+def test_chunked_outliers_match_full():
+    """Аномалии в порционном режиме совпадают с полным расчетом, даже если выгрузка идет от новых к старым"""
+    amounts = [100.0 + i % 7 for i in range(40)] + [5000.0, 4000.0]
+    transactions = pd.DataFrame(
+        {
+            "Дата операции": pd.date_range("2024-01-01 12:00", periods=len(amounts), freq="D").strftime(
+                "%d.%m.%Y %H:%M:%S"
+            ),
+            "Дата платежа": "01.01.2024",
+            "Номер карты": "*1111",
+            "Статус": "OK",
+            "Сумма операции": [-amount for amount in amounts],
+            "Кэшбэк": np.nan,
+            "MCC": 5411,
+            "Категория": "Супермаркеты",
+            "Описание": "Покупка",
+            "Округление на инвесткопилку": 0,
+            "Бонусы (включая кэшбэк)": 0,
+        }
+    ).iloc[::-1]
+    expected = spending_by_category(transactions.copy(), "Супермаркеты", "2024-02-15")
+
+    parts = list(iter_spending_by_category(_split(transactions, 5), "Супермаркеты", "2024-02-15"))
+
+    assert expected["Аномалия"].any()
+    pd.testing.assert_frame_equal(pd.concat(parts), expected)
@@ -0,0 +1,168 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from src.resilience import (CircuitBreaker, CircuitOpenError, Deadline, DeadlineExceeded, LastKnownCache,
+                            resilient_get)
+from src.utils_views import get_currency_with_fallback, get_stocks_with_fallback
+
+
+class FakeClock:
+    """Управляемые часы для тестов"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def ok_response(payload):
+    response = MagicMock()
+    response.json.return_value = payload
+    return response
+
+
+def test_deadline_remaining():
+    """Оставшееся время уменьшается и не уходит в минус"""
+    clock = FakeClock()
+    deadline = Deadline(5, clock)
+
+    clock.now = 2
+    assert deadline.remaining() == 3
+    clock.now = 10
+    assert deadline.remaining() == 0
+    assert deadline.expired()
+
+
+def test_circuit_breaker_opens_and_recovers():
+    """Выключатель размыкается после серии ошибок и пропускает пробный запрос позже"""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+
+    breaker.record_failure("host")
+    assert breaker.allow("host")
+    breaker.record_failure("host")
+    assert not breaker.allow("host")
+
+    clock.now = 31
+    assert breaker.allow("host")
+    assert not breaker.allow("host")
+    breaker.record_success("host")
+    assert breaker.allow("host")
+    assert not breaker.is_open("host")
+
+
+def test_resilient_get_passes_timeout():
+    """Таймаут запроса не превышает оставшийся бюджет"""
+    with patch("requests.get", return_value=ok_response({})) as mock_get:
+        resilient_get("https://example.com/a", Deadline(1.5), breaker=CircuitBreaker(), per_call_timeout=3)
+
+    assert 0 < mock_get.call_args.kwargs["timeout"] <= 1.5
+
+
+def test_resilient_get_retries_with_backoff():
+    """После сетевой ошибки запрос повторяется"""
+    side_effect = [requests.ConnectionError("boom"), ok_response({"result": 1})]
+
+    with patch("requests.get", side_effect=side_effect) as mock_get:
+        with patch("time.sleep") as mock_sleep:
+            response = resilient_get("https://example.com/a", Deadline(10), breaker=CircuitBreaker())
+
+    assert response.json() == {"result": 1}
+    assert mock_get.call_count == 2
+    assert mock_sleep.call_count == 1
+
+
+def test_resilient_get_counts_one_failure_per_call():
+    """Запрос с повторами — одна ошибка выключателя, а не по одной на попытку"""
+    breaker = CircuitBreaker(failure_threshold=3)
+
+    with patch("requests.get", side_effect=requests.ConnectionError("boom")) as mock_get:
+        with patch("time.sleep"):
+            for call in range(3):
+                with pytest.raises(requests.ConnectionError):
+                    resilient_get("https://example.com/a", Deadline(10), breaker=breaker, retries=2)
+                assert breaker.is_open("example.com") == (call == 2)
+
+    assert mock_get.call_count == 9
+
+
+def test_resilient_get_no_retry_on_client_error():
+    """Ошибка 4xx (кроме 429) не повторяется"""
+    error_response = MagicMock(status_code=401)
+    response = MagicMock()
+    response.raise_for_status.side_effect = requests.HTTPError("401", response=error_response)
+
+    with patch("requests.get", return_value=response) as mock_get:
+        with pytest.raises(requests.HTTPError):
+            resilient_get("https://example.com/a", Deadline(10), breaker=CircuitBreaker())
+
+    assert mock_get.call_count == 1
+
+
+def test_resilient_get_circuit_open():
+    """Отключенный хост не запрашивается"""
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_failure("example.com")
+
+    with patch("requests.get") as mock_get:
+        with pytest.raises(CircuitOpenError):
+            resilient_get("https://example.com/a", Deadline(10), breaker=breaker)
+
+    mock_get.assert_not_called()
+
+
+def test_resilient_get_deadline_exceeded():
+    """При исчерпанном бюджете запрос не выполняется"""
+    clock = FakeClock()
+    deadline = Deadline(1, clock)
+    clock.now = 2
+
+    with patch("requests.get") as mock_get:
+        with pytest.raises(DeadlineExceeded):
+            resilient_get("https://example.com/a", deadline, breaker=CircuitBreaker())
+
+    mock_get.assert_not_called()
+
+
+def test_last_known_cache():
+    """Кэш возвращает значение и время его получения"""
+    cache = LastKnownCache()
+    cache.put("USD", 90.0)
+
+    value, fetched_at = cache.get("USD")
+    assert value == 90.0
+    assert fetched_at is not None
+    assert cache.get("EUR") is None
+
+
+def test_fallback_returns_stale_and_partial(tmp_path):
+    """При сбое используются сохраненные значения, а недоступные без кэша пропускаются"""
+    settings = tmp_path / "user_settings.json"
+    settings.write_text(json.dumps({"user_currencies": ["USD", "CNY"], "user_stocks": ["AAPL"]}), encoding="utf-8")
+
+    with patch("src.utils_views.get_currency_rate", side_effect=[91.5, DeadlineExceeded("slow")]):
+        fresh = get_currency_with_fallback(str(settings), Deadline(10))
+    with patch("src.utils_views.get_currency_rate", side_effect=CircuitOpenError("host")):
+        degraded = get_currency_with_fallback(str(settings), Deadline(10))
+
+    assert fresh == [{"currency": "USD", "rate": 91.5}]
+    assert degraded[0]["currency"] == "USD"
+    assert degraded[0]["rate"] == 91.5
+    assert degraded[0]["stale"] is True
+    assert "as_of" in degraded[0]
+    assert len(degraded) == 1
+
+
+def test_stocks_fallback_fresh(tmp_path):
+    """Успешно полученные цены не помечаются как устаревшие"""
+    settings = tmp_path / "user_settings.json"
+    settings.write_text(json.dumps({"user_stocks": ["AAPL"]}), encoding="utf-8")
+
+    with patch("requests.get", return_value=ok_response({"results": [{"c": 175.5}]})):
+        result = get_stocks_with_fallback(str(settings), Deadline(10))
+
+    assert result == [{"stock": "AAPL", "price": 175.5}]
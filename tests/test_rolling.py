@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.reports import spending_by_category
+from src.rolling import rolling_category_spending, window_starts
+
+
+def test_window_starts_month_ends():
+    """Начало окна считается по календарю с учетом коротких месяцев"""
+    anchors = pd.date_range("2024-05-30", "2024-06-01", freq="D")
+
+    starts = window_starts(anchors, 3)
+
+    assert [str(d) for d in starts] == ["2024-02-29", "2024-02-29", "2024-03-01"]
+
+
+def test_rolling_matches_spending_by_category(sample_transactions):
+    """Для каждой даты результат совпадает с итогами spending_by_category"""
+    result = rolling_category_spending(sample_transactions.copy(), start="2024-01-01", end="2024-04-30")
+
+    assert set(result) == {"spent", "cashback", "bonuses"}
+    for anchor in ["2024-01-01", "2024-02-15", "2024-03-01", "2024-04-15", "2024-04-30"]:
+        for category in ["Супермаркеты", "Рестораны"]:
+            expected = spending_by_category(sample_transactions.copy(), category, anchor)
+            assert result["spent"].loc[anchor, category] == pytest.approx(expected["Сумма операции"].abs().sum())
+            assert result["cashback"].loc[anchor, category] == pytest.approx(expected["Кэшбэк"].sum())
+            assert result["bonuses"].loc[anchor, category] == pytest.approx(expected["Бонусы (включая кэшбэк)"].sum())
+
+
+def test_rolling_dense_matrix(sample_transactions):
+    """Матрица плотная: по строке на каждый день и по колонке на категорию"""
+    result = rolling_category_spending(sample_transactions.copy(), start="2024-02-01", end="2024-02-29")
+    spent = result["spent"]
+
+    assert len(spent) == 29
+    assert list(spent.columns) == ["Супермаркеты", "Рестораны"]
+    assert not spent.isna().any().any()
+
+
+def test_rolling_selected_categories(sample_transactions):
+    """Можно выбрать категории, в том числе без операций"""
+    result = rolling_category_spending(
+        sample_transactions.copy(), months=1, start="2024-03-01", end="2024-03-02", categories=["Рестораны", "Аптеки"]
+    )
+
+    assert list(result["spent"].columns) == ["Рестораны", "Аптеки"]
+    assert result["spent"]["Аптеки"].tolist() == [0.0, 0.0]
+    # 15.02 (150) входит в окно с 01.02 по 01.03
+    assert result["spent"].loc["2024-03-01", "Рестораны"] == 150.0
+
+
+def test_rolling_default_period(sample_transactions):
+    """По умолчанию период — от первой до последней операции"""
+    spent = rolling_category_spending(sample_transactions.copy())["spent"]
+
+    assert spent.index[0] == pd.Timestamp("2023-12-01")
+    assert spent.index[-1] == pd.Timestamp("2024-04-15")
+
+
+def test_rolling_ignores_income_and_inf():
+    """Поступления не учитываются, бесконечный кэшбэк заменяется нулем"""
+    df = pd.DataFrame(
+        {
+            "Дата операции": ["01.01.2024 12:00:00", "02.01.2024 14:00:00", "03.01.2024 10:00:00"],
+            "Сумма операции": [-100, 500, -200],
+            "Кэшбэк": [np.inf, None, None],
+            "Категория": ["Супермаркеты", "Супермаркеты", "Супермаркеты"],
+            "Бонусы (включая кэшбэк)": [None, None, None],
+        }
+    )
+
+    result = rolling_category_spending(df, start="2024-01-03", end="2024-01-03")
+
+    assert result["spent"].iloc[0, 0] == 300.0
+    assert result["cashback"].iloc[0, 0] == 2.0
+
+
+def test_rolling_empty():
+    df = pd.DataFrame(
+        columns=["Дата операции", "Сумма операции", "Кэшбэк", "Категория", "Бонусы (включая кэшбэк)"]
+    )
+
+    assert rolling_category_spending(df)["spent"].empty
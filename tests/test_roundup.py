@@ -0,0 +1,89 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.roundup import simulate_round_ups
+from src.services import investment_bank
+
+TRANSACTIONS = [
+    {"Дата операции": "2024-01-15", "Сумма операции": -1712},
+    {"Дата операции": "2024-01-20", "Сумма операции": -1245.5},
+    {"Дата операции": "2024-01-21", "Сумма операции": 5000},
+    {"Дата операции": "2024-02-01", "Сумма операции": "-1 712 ₽"},
+    {"Дата операции": "2024-02-03", "Сумма операции": "не число"},
+    {"Дата операции": "", "Сумма операции": -999},
+    {"Дата операции": "2024-03-10", "Сумма операции": -500},
+]
+
+
+def test_simulate_matches_investment_bank():
+    """Каждая ячейка таблицы совпадает с результатом investment_bank"""
+    limits = [10, 50, 100, 500, 1000]
+
+    table = simulate_round_ups(TRANSACTIONS, limits)
+
+    assert list(table.index) == ["2024-01", "2024-02", "2024-03"]
+    assert list(table.columns) == limits
+    for month in table.index:
+        for limit in limits:
+            expected = json.loads(investment_bank(month, TRANSACTIONS, limit))["total_investment"]
+            assert table.loc[month, limit] == pytest.approx(expected)
+
+
+def test_simulate_example_values():
+    """Пример из условия: 1712 при лимите 50 дает 38"""
+    table = simulate_round_ups([{"Дата операции": "2024-01-15", "Сумма операции": -1712}], [50, 100])
+
+    assert table.loc["2024-01", 50] == 38.0
+    assert table.loc["2024-01", 100] == 88.0
+
+
+def test_simulate_datetime_dates():
+    """Даты типа datetime группируются по месяцам так же, как строки"""
+    df = pd.DataFrame(
+        {
+            "Дата операции": pd.to_datetime(["2024-01-15", "2024-01-31", "2024-02-01"]),
+            "Сумма операции": [-1712.0, -10.0, -1245.0],
+        }
+    )
+
+    table = simulate_round_ups(df, [50])
+
+    assert table[50].tolist() == [38.0 + 40.0, 5.0]
+
+
+def test_simulate_requested_months():
+    """Месяцы без расходов заполняются нулями"""
+    table = simulate_round_ups(TRANSACTIONS, [50], months=["2023-12", "2024-01"])
+
+    assert list(table.index) == ["2023-12", "2024-01"]
+    assert table.loc["2023-12", 50] == 0.0
+
+
+def test_simulate_empty():
+    table = simulate_round_ups([], [10, 50])
+
+    assert table.empty
+    assert list(table.columns) == [10, 50]
+
+
+@pytest.mark.parametrize("limits", [[], [0], [-10], ["50"]])
+def test_simulate_invalid_limits(limits):
+    with pytest.raises(ValueError):
+        simulate_round_ups(TRANSACTIONS, limits)
+
+
+def test_simulate_numpy_limits():
+    """Лимиты массивом numpy (np.int64) считаются так же, как список"""
+    table = simulate_round_ups(TRANSACTIONS, np.array([10, 50], dtype=np.int64))
+
+    pd.testing.assert_frame_equal(table, simulate_round_ups(TRANSACTIONS, [10, 50]))
+    assert list(table.columns) == [10, 50]
+
+
+@pytest.mark.parametrize("limits", [np.array([], dtype=np.int64), np.array([10.0, 50.0]), np.array([10, -50])])
+def test_simulate_invalid_numpy_limits(limits):
+    with pytest.raises(ValueError):
+        simulate_round_ups(TRANSACTIONS, limits)
@@ -0,0 +1,105 @@
+import datetime
+import json
+from decimal import Decimal
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.serializers import dataframe_records, dumps, iter_dataframe_ndjson, iter_ndjson, to_builtin
+
+
+def test_to_builtin_numpy_scalars():
+    """Скаляры numpy приводятся к встроенным типам"""
+    assert to_builtin(np.int64(5)) == 5
+    assert isinstance(to_builtin(np.int64(5)), int)
+    assert to_builtin(np.float32(1.5)) == 1.5
+    assert to_builtin(np.float64("nan")) is None
+    assert to_builtin(np.bool_(True)) is True
+
+
+def test_to_builtin_dates():
+    """Даты и Timestamp сериализуются в ISO-формат"""
+    assert to_builtin(pd.Timestamp("2024-03-15 14:30:00")) == "2024-03-15T14:30:00"
+    assert to_builtin(datetime.date(2024, 3, 15)) == "2024-03-15"
+    assert to_builtin(np.datetime64("2024-03-15")) == "2024-03-15T00:00:00"
+    assert to_builtin(pd.NaT) is None
+
+
+def test_to_builtin_unknown_type():
+    """Неизвестный тип не превращается молча в строку"""
+    with pytest.raises(TypeError):
+        to_builtin(object())
+
+
+def test_dumps_compact_and_indent():
+    """Компактный режим без пробелов, режим с отступом — как json.dumps"""
+    data = {"month": "2024-03", "total": np.float64(37.5), "count": np.int64(2), "name": "Аптеки"}
+
+    assert json.loads(dumps(data)) == {"month": "2024-03", "total": 37.5, "count": 2, "name": "Аптеки"}
+    assert "Аптеки" in dumps(data)
+    assert dumps({"a": 1}, indent=2) == json.dumps({"a": 1}, indent=2)
+
+
+def test_dumps_stdlib_fallback():
+    """Без orjson используется стандартная библиотека"""
+    with patch("src.serializers.orjson", None):
+        assert dumps({"a": [1, 2], "b": np.int64(3)}) == '{"a":[1,2],"b":3}'
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"nan": float("nan"), "np_nan": np.float64("nan"), "inf": float("-inf"), "values": [1.5, np.float32("nan")]},
+        {"array": np.array([1.0, np.nan, np.inf]), "decimal": [Decimal("NaN"), Decimal("2.5")]},
+        {1: "int", 2.5: "float", None: "none", datetime.date(2024, 3, 15): "date"},
+        {False: "bool", datetime.datetime(2024, 3, 15, 14, 30): "datetime"},
+        {np.int64(3): "numpy", pd.Timestamp("2024-03-15 14:30:00"): "timestamp", "nested": {7: [float("nan")]}},
+    ],
+)
+def test_dumps_backends_match(data):
+    """orjson и стандартная библиотека дают одинаковый текст для NaN и ключей не-строк"""
+    pytest.importorskip("orjson")
+
+    fast = dumps(data)
+    with patch("src.serializers.orjson", None):
+        fallback = dumps(data)
+
+    assert fast == fallback
+    assert "NaN" not in fast and "Infinity" not in fast
+    json.loads(fast)
+
+
+def test_dumps_nan_and_keys_with_indent():
+    """В режиме с отступом NaN — null, ключи-числа — строки"""
+    assert json.loads(dumps({1: np.float64("nan"), None: [float("inf")]}, indent=2)) == {"1": None, "null": [None]}
+
+
+def test_dataframe_records_replaces_missing():
+    """Пропуски в DataFrame заменяются на None"""
+    df = pd.DataFrame({"a": [1.0, np.nan], "b": ["x", None], "c": pd.to_datetime(["2024-01-01", None])})
+
+    records = list(dataframe_records(df))
+
+    assert records[0]["a"] == 1.0
+    assert records[1] == {"a": None, "b": None, "c": None}
+
+
+def test_iter_ndjson():
+    """Каждая запись — отдельная строка"""
+    lines = list(iter_ndjson([{"a": 1}, {"a": np.int64(2)}]))
+
+    assert lines == ['{"a":1}\n', '{"a":2}\n']
+
+
+def test_iter_dataframe_ndjson():
+    """DataFrame выдается построчно в NDJSON"""
+    df = pd.DataFrame({"Сумма операции": [-100, -200], "Дата": pd.to_datetime(["2024-01-01", "2024-01-02"])})
+
+    lines = [json.loads(line) for line in iter_dataframe_ndjson(df)]
+
+    assert lines == [
+        {"Сумма операции": -100, "Дата": "2024-01-01T00:00:00"},
+        {"Сумма операции": -200, "Дата": "2024-01-02T00:00:00"},
+    ]
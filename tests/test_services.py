@@ -4,7 +4,8 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
-from src.services import investment_bank, main_services_example
+from src.services import (STREAM_BATCH_SIZE, investment_bank, investment_bank_stream, investment_bank_stream_by_month,
+                          main_services_example, stream_round_ups)
 
 
 def test_investment_bank_success():
@@ -346,3 +347,57 @@ def test_main_services_example_output(capsys):
         except (json.JSONDecodeError, KeyError):
             # Если не удалось распарсить, это нормально - функция могла измениться
             pass
+
+
+STREAM_TRANSACTIONS = [
+    {"Дата операции": "2024-03-15", "Сумма операции": -1712},
+    {"Дата операции": "2024-03-20", "Сумма операции": "-850 ₽"},
+    {"Дата операции": "2024-04-01", "Сумма операции": "-1 245,50"},
+    {"Дата операции": "2024-04-02", "Сумма операции": 500},
+    {"Дата операции": "", "Сумма операции": -100},
+    {"Сумма операции": -100},
+    {"Дата операции": "2024-03-25", "Сумма операции": "не число"},
+]
+
+
+def _total(response):
+    return json.loads(response)["total_investment"]
+
+
+@pytest.mark.parametrize("month", ["2024-03", "2024-04", "2024-05"])
+@pytest.mark.parametrize("limit", [10, 50, 100])
+def test_investment_bank_stream_matches_list(month, limit):
+    """Потоковый расчет по генератору совпадает с investment_bank по списку"""
+    stream = (transaction for transaction in STREAM_TRANSACTIONS)
+
+    assert _total(investment_bank_stream(month, stream, limit)) == _total(
+        investment_bank(month, STREAM_TRANSACTIONS, limit)
+    )
+
+
+def test_investment_bank_stream_by_month():
+    """За один проход считается каждый месяц потока"""
+    result = investment_bank_stream_by_month(iter(STREAM_TRANSACTIONS), 50)
+
+    assert list(result) == ["2024-03", "2024-04"]
+    assert {month: _total(response) for month, response in result.items()} == {"2024-03": 38.0, "2024-04": 4.5}
+
+
+def test_stream_round_ups_across_batches():
+    """Накопители по месяцам продолжаются между порциями потока"""
+    count = 2 * STREAM_BATCH_SIZE + 10
+
+    def transactions():
+        for i in range(count):
+            yield {"Дата операции": f"2024-0{1 + i % 2}-10", "Сумма операции": -41}
+
+    totals = stream_round_ups(transactions(), 50)
+
+    assert totals == {"2024-01": 9.0 * ((count + 1) // 2), "2024-02": 9.0 * (count // 2)}
+
+
+def test_investment_bank_stream_validation():
+    assert json.loads(investment_bank_stream("03-2024", iter([]), 50))["status"] == "error"
+    assert json.loads(investment_bank_stream("2024-03", iter([]), 0))["status"] == "error"
+    with pytest.raises(ValueError):
+        investment_bank_stream_by_month(iter([]), -10)
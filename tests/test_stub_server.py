@@ -0,0 +1,111 @@
+from datetime import date
+
+import pytest
+import requests
+
+from src import utils_views
+from src.resilience import CircuitBreaker, Deadline, resilient_get
+from src.stub_server import FaultProfile, StubMarketServer, stub_context
+
+
+@pytest.fixture
+def stub():
+    """Заглушка без задержек и сбоев"""
+    with StubMarketServer() as server:
+        yield server
+
+
+def test_stub_context_points_to_stub(stub):
+    """Адреса API заглушки задаются в контексте, глобальные настройки не меняются"""
+    ctx = stub_context(stub, api_key="test")
+
+    assert ctx.fixer_base_url == ctx.stocks_base_url == stub.base_url
+    assert ctx.api_key == "test"
+    assert utils_views.ViewsContext.from_env().fixer_base_url != stub.base_url
+
+
+def test_currency_and_stocks_offline(stub):
+    """Функции utils_views получают ответы заглушки в формате настоящих API"""
+    ctx = stub_context(stub)
+    rate = utils_views.get_currency_rate("USD", ctx=ctx)
+    price = utils_views.get_stock_price("AAPL", ctx=ctx)
+    bars = utils_views.get_daily_aggregates("AAPL", date(2024, 3, 1), date(2024, 3, 10), ctx)
+    rates = utils_views.get_currency_timeseries("EUR", date(2024, 3, 1), date(2024, 3, 3), ctx)
+
+    assert 85 < rate < 95
+    assert price > 0
+    # Выходные дни баров не имеют
+    assert len(bars) == 6
+    assert list(rates) == ["2024-03-01", "2024-03-02", "2024-03-03"]
+    assert stub.stats()["by_route"] == {
+        "convert": {"200": 1},
+        "aggs": {"200": 2},
+        "timeseries": {"200": 1},
+    }
+
+
+def test_connection_reuse_is_counted(stub):
+    """Через сессию запросы идут по одному соединению, через requests.get — каждый по новому"""
+    with requests.Session() as session:
+        for _ in range(3):
+            session.get(f"{stub.base_url}/fixer/convert?from=USD&to=RUB&amount=1").raise_for_status()
+    assert stub.stats()["connections"] == 1
+
+    stub.reset_stats()
+    for _ in range(3):
+        requests.get(f"{stub.base_url}/fixer/convert?from=USD&to=RUB&amount=1")
+    assert stub.stats()["connections"] == 3
+
+
+def test_error_injection():
+    """При error_rate=1 все ответы — 500, resilient_get исчерпывает повторы"""
+    with StubMarketServer(FaultProfile(error_rate=1.0)) as server:
+        with pytest.raises(requests.HTTPError):
+            resilient_get(
+                f"{server.base_url}/fixer/convert?from=USD", Deadline(5), CircuitBreaker(10), retries=2, backoff=0
+            )
+        assert server.stats()["by_route"] == {"convert": {"500": 3}}
+
+
+def test_rate_limit_injection():
+    """Ответ 429 содержит Retry-After"""
+    with StubMarketServer(FaultProfile(rate_limit_rate=1.0, retry_after=7)) as server:
+        response = requests.get(f"{server.base_url}/v2/aggs/ticker/AAPL/range/1/day/2024-03-01/2024-03-02")
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "7"
+
+
+def test_unknown_route(stub):
+    assert requests.get(f"{stub.base_url}/unknown").status_code == 404
+
+
+@pytest.mark.parametrize(
+    "profile, low, high",
+    [
+        (FaultProfile("fixed", (0.25,)), 0.25, 0.25),
+        (FaultProfile("uniform", (0.1, 0.2), seed=1), 0.1, 0.2),
+        (FaultProfile("lognormal", (0.05, 0.5), seed=1), 0.0, 10.0),
+    ],
+)
+def test_latency_distributions(profile, low, high):
+    delays = [profile.delay() for _ in range(100)]
+
+    assert all(low <= delay <= high for delay in delays)
+
+
+def test_fault_rates_are_reproducible():
+    """С одним seed последовательность сбоев повторяется"""
+    profile_a = FaultProfile(error_rate=0.2, rate_limit_rate=0.3, seed=5)
+    profile_b = FaultProfile(error_rate=0.2, rate_limit_rate=0.3, seed=5)
+
+    faults = [profile_a.fault() for _ in range(200)]
+
+    assert faults == [profile_b.fault() for _ in range(200)]
+    assert {None, 429, 500} == set(faults)
+
+
+@pytest.mark.parametrize("kwargs", [{"latency": "normal"}, {"error_rate": 0.7, "rate_limit_rate": 0.5}])
+def test_invalid_profile(kwargs):
+    with pytest.raises(ValueError):
+        FaultProfile(**kwargs)
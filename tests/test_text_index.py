@@ -0,0 +1,89 @@
+import pandas as pd
+import pytest
+
+from src.text_index import DescriptionIndex, merchant_totals, search_merchants, tokenize
+
+
+@pytest.fixture
+def operations():
+    return pd.DataFrame(
+        {
+            "Дата операции": pd.to_datetime(
+                ["2021-12-01 10:00", "2021-12-05 12:00", "2021-12-20 18:00", "2022-01-03 09:00", "2021-12-07 11:00"]
+            ),
+            "Сумма операции": [-160.89, -64.0, -118.12, -99.0, -1200.0],
+            "Описание": ["Колхоз", "Магнит", "МАГНИТ у дома", "Магнолия", None],
+        }
+    )
+
+
+def test_tokenize():
+    """Слова приводятся к нижнему регистру, «ё» заменяется на «е»"""
+    assert tokenize("Пятёрочка, ул. Ленина 5") == ["пятерочка", "ул", "ленина", "5"]
+    assert tokenize(None) == []
+    assert tokenize(float("nan")) == []
+
+
+def test_search_exact_and_case(operations):
+    index = DescriptionIndex.build(operations)
+
+    assert list(index.search("магнит", prefix=False)) == [1, 2]
+    assert list(index.search("КОЛХОЗ")) == [0]
+
+
+def test_search_prefix(operations):
+    """Поиск по началу слова"""
+    index = DescriptionIndex.build(operations)
+
+    assert list(index.search("магн")) == [1, 2, 3]
+    assert len(index.search("магн", prefix=False)) == 0
+
+
+def test_search_all_words(operations):
+    """Все слова запроса должны встречаться в описании"""
+    index = DescriptionIndex.build(operations)
+
+    assert list(index.search("магнит дом")) == [2]
+    assert len(index.search("магнит колхоз")) == 0
+    assert len(index.search("")) == 0
+
+
+def test_incremental_add(operations):
+    """Индекс, построенный порциями, совпадает с построенным целиком"""
+    whole = DescriptionIndex.build(operations)
+    chunked = DescriptionIndex()
+    chunked.add(operations["Описание"].iloc[:2])
+    assert list(chunked.search("магн")) == [1]
+    chunked.add(operations["Описание"].iloc[2:])
+
+    assert chunked.size == whole.size == 5
+    assert chunked.postings == whole.postings
+    assert list(chunked.search("магн")) == [1, 2, 3]
+
+
+def test_search_merchants_date_window(operations):
+    """Поиск ограничивается периодом"""
+    index = DescriptionIndex.build(operations)
+
+    result = search_merchants(operations, index, "магн", "2021-12-01", "2021-12-31")
+
+    assert list(result["Описание"]) == ["Магнит", "МАГНИТ у дома"]
+
+
+def test_search_merchants_without_window(operations):
+    index = DescriptionIndex.build(operations)
+
+    assert len(search_merchants(operations, index, "магн")) == 3
+    assert search_merchants(operations, index, "ашан").empty
+
+
+def test_merchant_totals(operations):
+    """Итоги по продавцам"""
+    index = DescriptionIndex.build(operations)
+    matches = search_merchants(operations, index, "магн")
+
+    totals = merchant_totals(matches)
+
+    assert list(totals.columns) == ["Описание", "count", "total"]
+    assert totals["total"].sum() == pytest.approx(-281.12)
+    assert totals["count"].tolist() == [1, 1, 1]
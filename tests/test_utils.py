@@ -227,6 +227,13 @@ def test_calculate_investment_for_transactions_invalid_amounts():
     assert result == 38.0  # 1712 -> 1750, разница 38
 
 
+def test_calculate_investment_for_transactions_skips_non_dict():
+    """Элементы, не являющиеся словарями, пропускаются, остальные транзакции учитываются"""
+    transactions = [{"Дата операции": "2024-03-15", "Сумма операции": -12}, None, "-1712", 42]
+
+    assert calculate_investment_for_transactions(transactions, 50) == 38.0
+
+
 def test_calculate_investment_for_transactions_empty():
     """Тест с пустым списком транзакций"""
     result = calculate_investment_for_transactions([], 50)
@@ -412,3 +419,15 @@ def test_validate_limit_logging_error():
     with patch.object(logging.getLogger("validate_limit"), "error") as mock_error:
         validate_limit("не число")
         mock_error.assert_called_once()
+
+
+def test_calculate_investment_for_transactions_separators():
+    """Суммы с десятичной запятой и разделителями разрядов учитываются"""
+    transactions = [
+        {"Дата операции": "2024-03-15", "Сумма операции": "-1 712,50 ₽"},
+        {"Дата операции": "2024-03-20", "Сумма операции": "-1,245.00"},
+        {"Дата операции": "2024-03-25", "Сумма операции": None},
+    ]
+
+    # 1712.5 -> 1750, разница 37.5; 1245 -> 1250, разница 5
+    assert calculate_investment_for_transactions(transactions, 50) == 42.5
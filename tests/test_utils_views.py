@@ -1,12 +1,13 @@
 import json
-from datetime import datetime
+import threading
+from datetime import date, datetime
 from unittest.mock import MagicMock, mock_open, patch
 
 import pandas as pd
 import pytest
 
-from src.utils_views import (get_card, get_currency, get_date_period, get_path_and_period, get_stocks, get_time,
-                             get_top_transactions)
+from src.utils_views import (MAX_FETCH_WORKERS, _fetch_all, get_card, get_currency, get_currency_timeseries,
+                             get_date_period, get_path_and_period, get_stocks, get_time, get_top_transactions)
 
 
 def test_get_date_period_basic():
@@ -217,6 +218,22 @@ def test_3_get_currency():
             assert result[0]["rate"] == 90.0
 
 
+def test_get_currency_timeseries():
+    """Дневные курсы за период запрашиваются одним запросом"""
+    mock_response = MagicMock()
+    mock_response.json.return_value = {
+        "success": True,
+        "rates": {"2024-03-01": {"RUB": 90.5}, "2024-03-02": {"RUB": 90.7}, "2024-03-03": {}},
+    }
+
+    with patch("requests.get", return_value=mock_response) as mock_get:
+        result = get_currency_timeseries("USD", date(2024, 3, 1), date(2024, 3, 3))
+
+    assert result == {"2024-03-01": 90.5, "2024-03-02": 90.7}
+    assert mock_get.call_count == 1
+    assert "start_date=2024-03-01&end_date=2024-03-03&base=USD&symbols=RUB" in mock_get.call_args.args[0]
+
+
 def test_4_get_stocks():
     """Минимальный тест get_stocks"""
     # Мок файла
@@ -236,3 +253,47 @@ def test_4_get_stocks():
 
                 assert result[0]["stock"] == "AAPL"
                 assert result[0]["price"] == 175.5
+
+
+def test_get_stocks_fetches_concurrently():
+    """Цены всех акций запрашиваются одновременно, порядок сохраняется"""
+    json_data = '{"user_stocks": ["AAPL", "MSFT", "TSLA"]}'
+    # Барьер пропускает запросы, только когда все три выполняются одновременно
+    barrier = threading.Barrier(3, timeout=5)
+
+    def price(stock, deadline=None, ctx=None):
+        barrier.wait()
+        return {"AAPL": 1.0, "MSFT": 2.0, "TSLA": 3.0}[stock]
+
+    with patch("builtins.open", mock_open(read_data=json_data)):
+        with patch("src.utils_views.get_stock_price", side_effect=price):
+            result = get_stocks("stocks.json")
+
+    assert result == [
+        {"stock": "AAPL", "price": 1.0},
+        {"stock": "MSFT", "price": 2.0},
+        {"stock": "TSLA", "price": 3.0},
+    ]
+
+
+def test_fetch_all_limits_workers():
+    """Одновременно выполняется не больше MAX_FETCH_WORKERS запросов"""
+    lock = threading.Lock()
+    in_flight = {"now": 0, "peak": 0}
+    barrier = threading.Barrier(MAX_FETCH_WORKERS, timeout=5)
+
+    def fetch(item):
+        with lock:
+            in_flight["now"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        # Первая волна ждет, пока заняты все потоки, остальные проходят барьер сразу
+        if item < MAX_FETCH_WORKERS:
+            barrier.wait()
+        with lock:
+            in_flight["now"] -= 1
+        return item * 2
+
+    items = list(range(3 * MAX_FETCH_WORKERS))
+
+    assert _fetch_all(fetch, items) == [item * 2 for item in items]
+    assert in_flight["peak"] == MAX_FETCH_WORKERS
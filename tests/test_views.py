@@ -0,0 +1,164 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+from datetime import datetime
+from unittest.mock import patch
+
+import pandas as pd
+
+from src import views
+from src.context import OperationsCache
+from src.outliers import flag_outliers
+from src.resilience import Deadline
+
+# Таблица, курсы и акции: main_views должна выполнять все три одновременно
+PARALLEL_STAGES = 3
+
+
+def _operations(sample_transactions):
+    return sample_transactions.assign(
+        **{
+            "Дата операции": pd.to_datetime(sample_transactions["Дата операции"], dayfirst=True),
+            "Сумма операции с округлением": sample_transactions["Сумма операции"].abs(),
+        }
+    )
+
+
+def _together(barrier, value):
+    """Загрузка, которая завершается, только когда все участники барьера выполняются одновременно"""
+
+    def fetch(*args):
+        barrier.wait()
+        return value
+
+    return fetch
+
+
+def test_main_views_overlaps_fetches_with_compute(sample_transactions):
+    """Курсы, акции и чтение таблицы идут одновременно: время ответа — максимум, а не сумма"""
+    df = _operations(sample_transactions)
+    currency = [{"currency": "USD", "rate": 90.0}]
+    stocks = [{"stock": "AAPL", "price": 175.5}]
+
+    barrier = threading.Barrier(PARALLEL_STAGES, timeout=5)
+
+    with (
+        patch.object(views, "load_operations", _together(barrier, df)),
+        patch.object(views, "get_currency_with_fallback", _together(barrier, currency)),
+        patch.object(views, "get_stocks_with_fallback", _together(barrier, stocks)),
+    ):
+        result = json.loads(views.main_views("2024-04-20 12:00:00"))
+
+    month = views.get_period(df, views.get_date_period("2024-04-20 12:00:00"))
+    expected = json.loads(views.dumps(views.build_views_data(month, currency, stocks, df)))
+    assert result == expected
+    assert list(result) == ["greeting", "cards", "top_transactions", "outliers", "currency_rates", "stock_prices"]
+
+
+def test_main_views_without_budget_uses_plain_fetches(sample_transactions):
+    """С budget=None используются get_currency/get_stocks без бюджета времени"""
+    with (
+        patch.object(views, "load_operations", return_value=_operations(sample_transactions)),
+        patch.object(views, "get_currency", return_value=[]) as get_currency,
+        patch.object(views, "get_stocks", return_value=[]) as get_stocks,
+    ):
+        result = json.loads(views.main_views("2024-04-20 12:00:00", budget=None, compact=True))
+
+    ctx = views.ViewsContext.from_env()
+    get_currency.assert_called_once_with(ctx.settings_path, ctx=ctx)
+    get_stocks.assert_called_once_with(ctx.settings_path, ctx=ctx)
+    assert result["currency_rates"] == result["stock_prices"] == []
+
+
+def test_start_market_fetches_passes_deadline():
+    """Бюджет времени передается в функции с откатом на сохраненные значения"""
+    deadline = Deadline(5)
+    ctx = views.ViewsContext(settings_path="settings.json")
+    with (
+        patch.object(views, "get_currency_with_fallback", return_value=["c"]) as currency,
+        patch.object(views, "get_stocks_with_fallback", return_value=["s"]) as stocks,
+        views.ThreadPoolExecutor(max_workers=2) as executor,
+    ):
+        currency_future, stocks_future = views.start_market_fetches(executor, ctx, deadline)
+
+        assert (currency_future.result(), stocks_future.result()) == (["c"], ["s"])
+    currency.assert_called_once_with("settings.json", deadline, ctx)
+    stocks.assert_called_once_with("settings.json", deadline, ctx)
+
+
+def test_concurrent_requests_use_own_context(sample_transactions, tmp_path):
+    """Одновременные запросы с разными контекстами не влияют друг на друга"""
+    paths = []
+    for number, card in enumerate(["*1111", "*2222", "*3333", "*4444"]):
+        path = tmp_path / f"operations_{number}.xlsx"
+        _operations(sample_transactions).assign(**{"Номер карты": card}).to_excel(
+            path, sheet_name="Отчет по операциям", index=False
+        )
+        paths.append(str(path))
+    contexts = [
+        views.ViewsContext(operations_path=path, clock=lambda hour=hour: datetime(2024, 4, 20, hour))
+        for path, hour in zip(paths, [9, 13, 19, 23])
+    ]
+
+    with (
+        patch.object(views, "get_currency", return_value=[]),
+        patch.object(views, "get_stocks", return_value=[]),
+        views.ThreadPoolExecutor(max_workers=4) as executor,
+    ):
+        results = list(
+            executor.map(lambda ctx: json.loads(views.main_views("2024-04-20 12:00:00", None, True, ctx)), contexts)
+        )
+
+    assert [result["cards"][0]["last_digits"] for result in results] == ["1111", "2222", "3333", "4444"]
+    assert [result["greeting"] for result in results] == ["Доброе утро", "Добрый день", "Добрый вечер", "Доброй ночи"]
+
+
+def test_operations_cache_rereads_changed_file(sample_transactions, tmp_path):
+    path = str(tmp_path / "operations.xlsx")
+    sample_transactions.to_excel(path, sheet_name="Отчет по операциям", index=False)
+    cache = OperationsCache()
+    loads = []
+
+    def loader(file_path):
+        loads.append(file_path)
+        return views.load_operations(file_path)
+
+    first = cache.get(path, loader)
+    assert cache.get(path, loader) is first
+    sample_transactions.head(3).to_excel(path, sheet_name="Отчет по операциям", index=False)
+    assert len(cache.get(path, loader)) == 3
+    assert loads == [path, path]
+
+
+def test_operations_cache_flags_outliers_once_per_version(sample_transactions, tmp_path):
+    """Аномалии по всей таблице считаются один раз и пересчитываются после изменения файла"""
+    path = str(tmp_path / "operations.xlsx")
+    sample_transactions.to_excel(path, sheet_name="Отчет по операциям", index=False)
+    cache = OperationsCache()
+
+    with patch("src.context.flag_outliers", wraps=flag_outliers) as flag:
+        first = cache.outliers(path, views.load_operations)
+        assert cache.outliers(path, views.load_operations) is first
+        assert flag.call_count == 1
+        sample_transactions.head(3).to_excel(path, sheet_name="Отчет по операциям", index=False)
+        cache.outliers(path, views.load_operations)
+        assert flag.call_count == 2
+
+
+def test_import_does_not_change_cwd(tmp_path):
+    """Импорт модулей страницы «Главная» не меняет рабочий каталог процесса"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = "import os; import src.views, src.utils_views; print(os.getcwd())"
+
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=tmp_path,
+        env={**os.environ, "PYTHONPATH": root},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert os.path.samefile(completed.stdout.strip(), tmp_path)